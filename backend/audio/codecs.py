@@ -0,0 +1,209 @@
+"""
+Compressed audio ingestion for /stream_audio.
+
+Uncompressed 16 kHz LINEAR16 is ~256 kbit/s per speaker; Opus speech at 24-32 kbit/s is
+about a tenth of that. The codec is negotiated at connect time (?codec=...):
+
+    pcm        16 kHz LINEAR16 (default, what RealtimeAudioCapture sends)
+    webm_opus  MediaRecorder output (Chrome / Firefox)
+    ogg_opus   Ogg-encapsulated Opus (Firefox / Safari MediaRecorder, opus-recorder)
+    opus       raw Opus packets, one per message (WebCodecs AudioEncoder)
+
+WebM/Ogg Opus is forwarded to Google Speech as-is (it accepts WEBM_OPUS / OGG_OPUS), so
+the server does no audio work at all. Raw packets, or any Opus stream when
+ORATOR_AUDIO_DECODE=1 (for local PCM analysis), are decoded incrementally to 16 kHz mono
+PCM with PyAV, an optional dependency (pip install av).
+"""
+
+import importlib.util
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+import metrics
+from governor import governor
+
+CODECS = ("pcm", "webm_opus", "ogg_opus", "opus")
+# Encodings the recognition backend accepts directly
+FORWARDABLE = {"webm_opus": "WEBM_OPUS", "ogg_opus": "OGG_OPUS"}
+CONTAINER_FORMATS = {"webm_opus": "webm", "ogg_opus": "ogg"}
+# Sample rates Google accepts for Opus
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+PCM_RATE = 16000
+DEFAULT_OPUS_BITRATE = 32000
+
+decode_ms = metrics.histogram("orator_audio_decode_ms", "Opus decode + resample CPU time per decoded batch (ms)")
+
+# PyAV is optional and takes ~100 ms to import, so it is only imported by the first decoder
+HAVE_PYAV = importlib.util.find_spec("av") is not None
+
+
+def negotiate(codec: Optional[str] = None, sample_rate: Optional[int] = None,
+              bitrate: Optional[int] = None, decode: Optional[bool] = None) -> dict:
+    """
+    Decide how a /stream_audio connection's audio reaches the recognizer
+
+    Args:
+        codec: One of CODECS (default pcm)
+        sample_rate: Opus input rate (browsers encode at 48 kHz)
+        bitrate: Client's Opus bitrate in bit/s, used to size the ingest buffer
+        decode: Force server-side decoding (default: ORATOR_AUDIO_DECODE)
+
+    Returns:
+        dict: codec, mode ("pcm" | "forward" | "decode"), encoding and sample_rate for the
+        recognizer, and bytes_per_second of the buffered stream
+
+    Raises:
+        ValueError: Unknown codec, or decoding is needed but PyAV isn't installed
+    """
+    codec = (codec or "pcm").lower()
+    if codec not in CODECS:
+        raise ValueError(f"Unknown audio codec '{codec}', expected one of {', '.join(CODECS)}")
+    if codec == "pcm":
+        return {"codec": codec, "mode": "pcm", "encoding": "LINEAR16", "sample_rate": PCM_RATE,
+                "bytes_per_second": PCM_RATE * 2}
+
+    if decode is None:
+        decode = os.environ.get("ORATOR_AUDIO_DECODE", "0") == "1"
+    if codec in FORWARDABLE and not (decode and HAVE_PYAV):
+        rate = sample_rate if sample_rate in OPUS_RATES else 48000
+        return {"codec": codec, "mode": "forward", "encoding": FORWARDABLE[codec], "sample_rate": rate,
+                "bytes_per_second": (bitrate or DEFAULT_OPUS_BITRATE) // 8}
+
+    if not HAVE_PYAV:
+        raise ValueError(f"Decoding '{codec}' needs PyAV on the server (pip install av)")
+    return {"codec": codec, "mode": "decode", "encoding": "LINEAR16", "sample_rate": PCM_RATE,
+            "bytes_per_second": PCM_RATE * 2}
+
+
+class _StreamReader:
+    """Blocking file-like object fed from the receive loop, read by the demuxer thread"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def feed(self, data: bytes) -> None:
+        with self.cond:
+            self.buffer += data
+            self.cond.notify()
+
+    def close(self, discard: bool = False) -> None:
+        with self.cond:
+            self.closed = True
+            if discard:
+                self.buffer.clear()
+            self.cond.notify()
+
+    def read(self, size: int = -1) -> bytes:
+        with self.cond:
+            while not self.buffer and not self.closed:
+                self.cond.wait()
+            if size < 0 or size >= len(self.buffer):
+                size = len(self.buffer)
+            data = bytes(self.buffer[:size])
+            del self.buffer[:size]
+            return data
+
+
+class StreamingOpusDecoder:
+    """
+    Incremental Opus -> 16 kHz mono LINEAR16 decoder for one connection.
+
+    Container streams (webm_opus / ogg_opus) are demuxed on a helper thread that reads
+    from the bytes fed so far; raw packets are decoded synchronously in feed().
+
+    Args:
+        codec: "webm_opus", "ogg_opus" or "opus"
+        on_pcm: Called with each block of decoded PCM bytes
+        input_rate: Rate of raw Opus packets (containers carry their own)
+    """
+
+    def __init__(self, codec: str, on_pcm: Callable[[bytes], None], input_rate: int = 48000):
+        if not HAVE_PYAV:
+            raise RuntimeError("PyAV is not installed")
+        import av
+        self.av = av
+        self.codec = codec
+        self.on_pcm = on_pcm
+        self.resampler = av.AudioResampler(format="s16", layout="mono", rate=PCM_RATE)
+        self.cpu_seconds = 0.0
+        self.pcm_bytes = 0
+        self.error: Optional[str] = None
+        self.thread = None
+        if codec == "opus":
+            self.context = av.CodecContext.create("opus", "r")
+            self.context.sample_rate = input_rate
+            self.context.layout = "mono"
+        else:
+            self.reader = _StreamReader()
+            self.thread = threading.Thread(target=self._demux, daemon=True)
+            self.thread.start()
+
+    def _emit(self, frames) -> None:
+        for frame in frames:
+            for out in self.resampler.resample(frame):
+                pcm = out.to_ndarray().tobytes()
+                self.pcm_bytes += len(pcm)
+                self.on_pcm(pcm)
+
+    def _demux(self):
+        try:
+            container = self.av.open(self.reader, mode="r", format=CONTAINER_FORMATS[self.codec])
+            stream = container.streams.audio[0]
+            for packet in container.demux(stream):
+                started = time.thread_time()
+                frames = packet.decode()
+                self._emit(frames)
+                elapsed = time.thread_time() - started
+                self.cpu_seconds += elapsed
+                decode_ms.observe(elapsed * 1000)
+                governor.charge("audio", elapsed)
+            self._emit([None])  # flush the resampler
+            container.close()
+        except Exception as e:
+            self.error = str(e)
+            print(f"Opus decode error ({self.codec}): {e}")
+            self.reader.close(discard=True)  # nothing reads the stream anymore
+
+    @property
+    def failed(self) -> bool:
+        """The container demuxer died: later data can't be decoded and is dropped"""
+        return self.thread is not None and self.error is not None and not self.thread.is_alive()
+
+    def feed(self, data: bytes) -> None:
+        if self.thread is not None:
+            if self.error is None:
+                self.reader.feed(data)
+            return
+        started = time.thread_time()
+        try:
+            self._emit(self.context.decode(self.av.Packet(data)))
+        except Exception as e:
+            self.error = str(e)
+            metrics.debug("opus_decode", "Dropped undecodable packet: %s", e)
+        elapsed = time.thread_time() - started
+        self.cpu_seconds += elapsed
+        decode_ms.observe(elapsed * 1000)
+        governor.charge("audio", elapsed)
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Decode whatever was fed and stop"""
+        if self.thread is not None:
+            self.reader.close()
+            self.thread.join(timeout=timeout)
+        else:
+            self._emit([None])
+
+    def snapshot(self) -> dict:
+        audio_seconds = self.pcm_bytes / (PCM_RATE * 2)
+        return {
+            "codec": self.codec,
+            "audio_seconds": round(audio_seconds, 2),
+            "cpu_seconds": round(self.cpu_seconds, 4),
+            # CPU seconds per second of audio (0.01 = 1% of a core per stream)
+            "real_time_factor": round(self.cpu_seconds / audio_seconds, 5) if audio_seconds else None,
+            "error": self.error,
+        }
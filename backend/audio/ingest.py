@@ -0,0 +1,193 @@
+"""
+Bounded PCM ingest buffer between the /stream_audio receive loop and the recognizer.
+
+The browser sends whatever chunk sizes its audio callback produces (4096 samples, or
+much smaller with AudioWorklets). Forwarding them one by one adds per-request overhead
+to the gRPC stream, and an unbounded queue grows without limit when the recognizer
+stalls. AudioIngestBuffer instead:
+  - copies incoming PCM into a preallocated ring (bytearray) with a hard byte cap
+  - hands the recognizer fixed frames (100 ms by default, Google's recommended size)
+  - applies an explicit overflow policy when the cap is reached
+  - reports pause / resume transitions so the receive loop can signal backpressure
+  - measures how long audio waited in the buffer
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Iterator, Optional
+
+import metrics
+
+FRAME_MS = int(os.environ.get("ORATOR_AUDIO_FRAME_MS", "100"))
+MAX_BUFFER_MS = int(os.environ.get("ORATOR_AUDIO_MAX_BUFFER_MS", "5000"))
+# drop_oldest keeps the live edge (captions stay current), drop_newest keeps continuity,
+# drop_chunk drops a chunk that doesn't fit whole instead of truncating it (container
+# streams, where the client's chunk boundaries are the only safe cut points)
+OVERFLOW_POLICY = os.environ.get("ORATOR_AUDIO_OVERFLOW", "drop_oldest")
+POLICIES = ("drop_oldest", "drop_newest", "drop_chunk")
+
+# Pause above this share of the cap, resume below the lower one
+HIGH_WATERMARK = 0.5
+LOW_WATERMARK = 0.2
+
+queue_latency_ms = metrics.histogram("orator_audio_queue_latency_ms",
+                                     "Time audio waits in the ingest buffer before the recognizer (ms)")
+dropped_bytes = metrics.counter("orator_audio_dropped_bytes", "PCM bytes dropped by the ingest overflow policy")
+
+
+class AudioIngestBuffer:
+    """
+    Args:
+        sample_rate: PCM sample rate (16-bit mono)
+        bytes_per_second: Byte rate of a compressed stream (forwarded Opus); frames and the
+            cap are then sized from it and bytes are no longer kept sample-aligned
+        frame_ms: Size of the frames handed to the recognizer
+        max_buffer_ms: Byte cap, expressed in audio time
+        overflow: One of POLICIES
+        on_backpressure: Called with "pause" / "resume" when the fill level crosses the
+            watermarks (from the pushing or the consuming thread)
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = FRAME_MS,
+                 max_buffer_ms: int = MAX_BUFFER_MS, overflow: str = OVERFLOW_POLICY,
+                 on_backpressure: Optional[Callable[[str], None]] = None,
+                 bytes_per_second: Optional[int] = None):
+        if overflow not in POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}', expected one of {', '.join(POLICIES)}")
+        self.bytes_per_ms = max(1, (bytes_per_second or sample_rate * 2) // 1000)
+        self.align = 1 if bytes_per_second else 2
+        self.frame_bytes = frame_ms * self.bytes_per_ms
+        self.capacity = max(max_buffer_ms * self.bytes_per_ms, 2 * self.frame_bytes)
+        self.overflow = overflow
+        self.on_backpressure = on_backpressure
+        self.ring = bytearray(self.capacity)
+        self.view = memoryview(self.ring)
+        self.start = 0  # read position
+        self.size = 0   # buffered bytes
+        # (total bytes written when the chunk ended, arrival time) for queue latency
+        self.arrivals = deque()
+        self.written = 0
+        self.consumed = 0
+        self.paused = False
+        self.closed = False
+        self.cond = threading.Condition()
+        self.stats = {"received_bytes": 0, "frames": 0, "dropped_bytes": 0, "overflows": 0}
+
+    @property
+    def buffered_ms(self) -> int:
+        return self.size // self.bytes_per_ms
+
+    def _copy_in(self, data) -> None:
+        end = (self.start + self.size) % self.capacity
+        first = min(len(data), self.capacity - end)
+        self.view[end:end + first] = data[:first]
+        if first < len(data):
+            self.view[:len(data) - first] = data[first:]
+        self.size += len(data)
+        self.written += len(data)
+        self.arrivals.append((self.written, time.monotonic()))
+
+    def _drop_front(self, count: int) -> None:
+        self.start = (self.start + count) % self.capacity
+        self.size -= count
+        self.consumed += count
+        while self.arrivals and self.arrivals[0][0] <= self.consumed:
+            self.arrivals.popleft()
+
+    def push(self, data: bytes) -> int:
+        """
+        Append PCM from the client
+
+        Returns:
+            int: Bytes dropped by the overflow policy (0 when everything fit)
+        """
+        data = memoryview(data)
+        if self.align == 2:
+            data = data[:len(data) & ~1]  # whole 16-bit samples only
+        lost = 0
+        with self.cond:
+            if self.closed:
+                return len(data)
+            self.stats["received_bytes"] += len(data)
+            free = self.capacity - self.size
+            if len(data) > free:
+                self.stats["overflows"] += 1
+                if self.overflow == "drop_chunk":
+                    lost = len(data)
+                    data = data[:0]
+                elif self.overflow == "drop_newest":
+                    lost = len(data) - free
+                    data = data[:free]
+                else:
+                    if len(data) > self.capacity:
+                        # The head of an oversized chunk never reaches the ring
+                        lost = len(data) - self.capacity
+                        data = data[lost:]
+                    self._drop_front(len(data) - free)
+                    lost += len(data) - free
+                self.stats["dropped_bytes"] += lost
+                dropped_bytes.inc(lost)
+            if len(data):
+                self._copy_in(data)
+            self.cond.notify()
+            transition = self._update_backpressure()
+        self._signal(transition)
+        return lost
+
+    def _update_backpressure(self) -> Optional[str]:
+        fill = self.size / self.capacity
+        if not self.paused and fill >= HIGH_WATERMARK:
+            self.paused = True
+            return "pause"
+        if self.paused and fill <= LOW_WATERMARK:
+            self.paused = False
+            return "resume"
+        return None
+
+    def _signal(self, transition: Optional[str]) -> None:
+        if transition and self.on_backpressure is not None:
+            try:
+                self.on_backpressure(transition)
+            except Exception as e:
+                print(f"Backpressure callback failed: {e}")
+
+    def _pop_frame(self, count: int) -> bytes:
+        # Arrival time of the oldest byte in this frame
+        arrived = self.arrivals[0][1] if self.arrivals else time.monotonic()
+        end = self.start + count
+        if end <= self.capacity:
+            frame = bytes(self.view[self.start:end])
+        else:
+            frame = bytes(self.view[self.start:]) + bytes(self.view[:end - self.capacity])
+        self._drop_front(count)
+        self.stats["frames"] += 1
+        queue_latency_ms.observe((time.monotonic() - arrived) * 1000)
+        return frame
+
+    def frames(self) -> Iterator[bytes]:
+        """
+        Blocking generator of recognizer frames, ends after close() once drained.
+        A partial last frame is flushed on close.
+        """
+        while True:
+            with self.cond:
+                while self.size < self.frame_bytes and not self.closed:
+                    self.cond.wait()
+                if self.size == 0:
+                    return
+                frame = self._pop_frame(min(self.size, self.frame_bytes))
+                transition = self._update_backpressure()
+            metrics.audio_queue_depth.observe(self.size // self.frame_bytes)
+            self._signal(transition)
+            yield frame
+
+    def close(self) -> None:
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def snapshot(self) -> dict:
+        with self.cond:
+            return {**self.stats, "buffered_ms": self.buffered_ms, "paused": self.paused}
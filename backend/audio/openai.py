@@ -1,9 +1,15 @@
 import os
+from collections import deque
 from openai import OpenAI
 from typing import Dict, List, Optional
 import re
+import time
 from dotenv import load_dotenv
 
+import metrics
+from audio.semantic import ScriptIndex
+from session.memory import FEEDBACK_WINDOW
+
 # Load environment variables
 load_dotenv()
 
@@ -33,7 +39,26 @@ class PresentationAnalyzer:
         """
         self.script = script
         self.highlighted_topics = self._extract_highlighted_topics(script)
-        self.previous_feedback = []
+        # Recent results only, the session recording keeps every feedback
+        self.previous_feedback = deque(maxlen=FEEDBACK_WINDOW)
+        self.index = None
+        if script and script.strip():
+            try:
+                self.index = ScriptIndex(script, self.highlighted_topics)
+                print(f"Script index: {self.index.describe()}")
+            except Exception as e:
+                print(f"Script embedding failed, scoring disabled: {e}")
+
+    def score_segment(self, text: str) -> Optional[Dict]:
+        """
+        Local similarity of a transcript segment to the script (see audio/semantic.py)
+
+        Returns:
+            dict with score, method and nearest_sentence, or None when there is no script
+        """
+        if self.index is None:
+            return None
+        return self.index.score(text)
         
     def _extract_highlighted_topics(self, script: str) -> List[str]:
         """
@@ -92,6 +117,7 @@ class PresentationAnalyzer:
         # Detect stuttering
         repetitions = self._count_word_repetitions(live_transcript)
         stuttering_detected = len(repetitions) > 0
+        semantic = self.score_segment(live_transcript)
         
         # Build the full context
         full_context = context_window if context_window else ""
@@ -101,12 +127,14 @@ class PresentationAnalyzer:
         prompt = self._build_analysis_prompt(
             live_transcript=live_transcript,
             full_context=full_context,
-            repetitions=repetitions
+            repetitions=repetitions,
+            semantic=semantic
         )
         
         # Call OpenAI API
         try:
             client = get_openai_client()
+            started = time.perf_counter()
             response = client.chat.completions.create(
                 model="gpt-4o-mini",  # Fast and cost-effective for real-time analysis
                 messages=[
@@ -144,6 +172,7 @@ When they're currently off-topic: Gently redirect"""
                 max_tokens=400  # Keep feedback concise
             )
             
+            metrics.llm_round_trip_ms.observe((time.perf_counter() - started) * 1000)
             feedback_text = response.choices[0].message.content
             
             # Structure the response
@@ -153,6 +182,7 @@ When they're currently off-topic: Gently redirect"""
                 "stuttering_detected": stuttering_detected,
                 "stuttering_details": repetitions if stuttering_detected else None,
                 "highlighted_topics": self.highlighted_topics,
+                "semantic": semantic,
                 "timestamp": None  # Will be set by caller
             }
             
@@ -163,10 +193,12 @@ When they're currently off-topic: Gently redirect"""
             return {
                 "success": False,
                 "error": str(e),
-                "feedback": None
+                "feedback": None,
+                "semantic": semantic
             }
     
-    def _build_analysis_prompt(self, live_transcript: str, full_context: str, repetitions: Dict[str, int]) -> str:
+    def _build_analysis_prompt(self, live_transcript: str, full_context: str, repetitions: Dict[str, int],
+                               semantic: Optional[Dict] = None) -> str:
         """
         Build the analysis prompt for OpenAI
         
@@ -174,6 +206,7 @@ When they're currently off-topic: Gently redirect"""
             live_transcript: Recent transcript portion
             full_context: Full transcript context
             repetitions: Detected word repetitions
+            semantic: Local script similarity of live_transcript
             
         Returns:
             Formatted prompt string
@@ -184,6 +217,12 @@ When they're currently off-topic: Gently redirect"""
         if repetitions:
             stutter_list = [f"'{word}' (repeated {count} times)" for word, count in repetitions.items()]
             stuttering_note = f"\n\n**STUTTERING DETECTED:** {', '.join(stutter_list)}"
+
+        if semantic:
+            measure = ("meaning similarity" if semantic.get('method') == "semantic"
+                       else "word overlap only, paraphrases score low")
+            stuttering_note += (f"\n\n**CLOSEST SCRIPT SENTENCE** ({measure}: {semantic['score']:.2f}): "
+                                f"\"{semantic['nearest_sentence']}\"")
         
         prompt = f""" 
             **PRESENTATION SCRIPT (with HIGHLIGHTED IMPORTANT TOPICS):**
@@ -0,0 +1,203 @@
+"""
+Event-driven scheduling of the coaching LLM calls of one /stream_audio session.
+
+Instead of a fixed 4 s timer checked only when a final arrives, analysis is triggered by:
+  - sentence boundaries (final results) with enough new words since the last analysis
+  - pauses: speech stopped for PAUSE_SECONDS with unanalyzed text
+  - local anomalies: stuttering (consecutive repeats) or a burst of filler words
+  - approaching a highlighted topic (its first word shows up in the live transcript)
+Boundaries respect an interval that adapts to the measured LLM latency and backs off on
+errors; anomalies and topics only need MIN_GAP. Every call is charged to a per-session
+budget (a token bucket of calls per minute), at most one call is in flight, and nothing
+is sent during quiet stretches or while the session has no script. Each call gets the
+text that triggered it (the final, the interim approaching a topic, or the last final
+before a pause). Under CPU pressure the governor stretches the interval
+and shrinks the budget (analysis_interval_scale).
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+import metrics
+from governor import governor
+from session.recorder import count_fillers
+
+BUDGET_PER_MINUTE = float(os.environ.get("ORATOR_ANALYSIS_BUDGET", "8"))
+MIN_INTERVAL = 2.0    # seconds between boundary-triggered calls at best
+MAX_INTERVAL = 20.0   # ... and at worst (slow or failing LLM)
+MIN_GAP = 1.0         # seconds between any two calls
+PAUSE_SECONDS = 1.5
+MIN_NEW_WORDS = 4
+FILLER_BURST = 3      # fillers in one final
+
+analysis_calls = metrics.counter("orator_analysis_calls", "Coaching LLM calls started by the scheduler")
+analysis_skipped = metrics.counter("orator_analysis_skipped_budget", "Analysis triggers dropped by the call budget")
+
+
+def has_repetition(words) -> bool:
+    return any(a == b for a, b in zip(words, words[1:]))
+
+
+class AnalysisScheduler:
+    """
+    Args:
+        run: Performs one analysis, run(reason, text) -> bool success (called on a worker thread)
+        topics: Highlighted script topics
+        budget_per_minute: Max LLM calls per minute for this session
+        active: False while there is no script to coach against (no calls are made)
+    """
+
+    def __init__(self, run: Callable[[str, str], bool], topics: Iterable[str] = (),
+                 budget_per_minute: float = BUDGET_PER_MINUTE, active: bool = True):
+        self.run = run
+        self.lock = threading.Lock()
+        self.topic_words = {}
+        self.active = active
+        self.set_script(topics, active)
+        # Most recent final, what a pause trigger analyzes
+        self.last_final = ""
+        self.budget = budget_per_minute
+        self.tokens = min(budget_per_minute, 2.0)  # small initial burst
+        self.refilled = time.monotonic()
+        self.in_flight = False
+        self.last_call = 0.0
+        self.new_words = 0
+        self.latency_ewma: Optional[float] = None
+        self.consecutive_errors = 0
+        self.flagged_topics = {}  # topic -> last trigger time
+        self.pause_timer: Optional[threading.Timer] = None
+        self.closed = False
+        self.stats = {"calls": 0, "errors": 0, "skipped_budget": 0, "triggers": {}}
+
+    def set_script(self, topics: Iterable[str], active: bool = True) -> None:
+        """Topics of a new script (posted to /transcript mid-stream), active=False without one"""
+        topic_words = {}
+        for topic in topics:
+            words = re.findall(r"[a-z']+", topic.lower())
+            if words and len(words[0]) > 2:
+                topic_words.setdefault(words[0], topic)
+        with self.lock:
+            self.topic_words = topic_words
+            self.active = active
+
+    # ======== adaptive interval / budget ========= #
+    def interval(self) -> float:
+        """Boundary interval: ~3x the LLM round trip, doubled per consecutive error"""
+        base = MIN_INTERVAL if self.latency_ewma is None else max(MIN_INTERVAL, 3 * self.latency_ewma)
+        scale = governor.policy().analysis_interval_scale
+        return min(MAX_INTERVAL * scale, base * scale * (2 ** min(self.consecutive_errors, 4)))
+
+    def _take_token(self, now: float) -> bool:
+        budget = self.budget / governor.policy().analysis_interval_scale
+        self.tokens = min(budget, self.tokens + (now - self.refilled) * budget / 60.0)
+        self.refilled = now
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+    # ======== triggers ========= #
+    def on_interim(self, text: str) -> None:
+        topic = self._approaching_topic(text)
+        if topic:
+            # The sentence still being spoken is what approaches the topic
+            self._trigger("topic", text, urgent=True, topic=topic)
+
+    def on_final(self, text: str) -> None:
+        words = re.findall(r"[a-z']+", text.lower())
+        self.new_words += len(words)
+        self.last_final = text
+        self._schedule_pause_check()
+        if has_repetition(words) or count_fillers(text) >= FILLER_BURST:
+            self._trigger("anomaly", text, urgent=True)
+            return
+        topic = self._approaching_topic(text)
+        if topic:
+            self._trigger("topic", text, urgent=True, topic=topic)
+            return
+        if self.new_words >= MIN_NEW_WORDS:
+            self._trigger("sentence", text)
+
+    def _approaching_topic(self, text: str) -> Optional[str]:
+        if not self.topic_words:
+            return None
+        now = time.monotonic()
+        for word in re.findall(r"[a-z']+", text.lower()[-80:]):
+            topic = self.topic_words.get(word)
+            if topic and now - self.flagged_topics.get(topic, -1e9) > 60.0:
+                return topic
+        return None
+
+    def _schedule_pause_check(self) -> None:
+        with self.lock:
+            if self.pause_timer is not None:
+                self.pause_timer.cancel()
+            if self.closed:
+                return
+            self.pause_timer = threading.Timer(PAUSE_SECONDS, self._on_pause)
+            self.pause_timer.daemon = True
+            self.pause_timer.start()
+
+    def _on_pause(self) -> None:
+        if self.new_words > 0:
+            self._trigger("pause", self.last_final)
+
+    def _trigger(self, reason: str, text: str, urgent: bool = False, topic: Optional[str] = None) -> None:
+        if not text.strip():
+            return
+        now = time.monotonic()
+        with self.lock:
+            if self.closed or self.in_flight or not self.active:
+                return
+            gap = now - self.last_call
+            if gap < (MIN_GAP if urgent else self.interval()):
+                return
+            if not self._take_token(now):
+                self.stats["skipped_budget"] += 1
+                analysis_skipped.inc()
+                return
+            if topic:
+                self.flagged_topics[topic] = now
+            self.in_flight = True
+            self.last_call = now
+            self.new_words = 0
+            self.stats["calls"] += 1
+            self.stats["triggers"][reason] = self.stats["triggers"].get(reason, 0) + 1
+        analysis_calls.inc()
+        threading.Thread(target=self._run, args=(reason, text), daemon=True).start()
+
+    def _run(self, reason: str, text: str) -> None:
+        started = time.monotonic()
+        try:
+            with governor.cpu("analysis"):
+                ok = bool(self.run(reason, text))
+        except Exception as e:
+            print(f"Error in AI analysis: {e}")
+            ok = False
+        elapsed = time.monotonic() - started
+        with self.lock:
+            self.in_flight = False
+            if ok:
+                self.consecutive_errors = 0
+                self.latency_ewma = elapsed if self.latency_ewma is None else 0.7 * self.latency_ewma + 0.3 * elapsed
+            else:
+                self.consecutive_errors += 1
+                self.stats["errors"] += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                **self.stats,
+                "interval_seconds": round(self.interval(), 2),
+                "latency_ewma_seconds": None if self.latency_ewma is None else round(self.latency_ewma, 3),
+                "budget_per_minute": self.budget,
+            }
+
+    def close(self) -> None:
+        with self.lock:
+            self.closed = True
+            if self.pause_timer is not None:
+                self.pause_timer.cancel()
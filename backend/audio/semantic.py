@@ -0,0 +1,197 @@
+"""
+Local (CPU-only) semantic scoring of transcript segments against the presentation script.
+
+The script is split into sentences, and each sentence and each highlighted topic is
+embedded once. The vectors are cached on disk in ORATOR_EMBED_CACHE as <hash>.npz, keyed
+by the embedder and the script text, so re-uploading the same script costs a file read.
+Scoring a final transcript segment is one embedding (a few ms on CPU with the default
+model) plus one matrix-vector product over the unit-normalized sentence matrix (cosine
+similarity).
+
+Embedders:
+    <model>   (default all-MiniLM-L6-v2) a sentence-transformers model name in
+              ORATOR_EMBED_MODEL, run on CPU; paraphrases of the script score high
+    hashing   bag of word unigrams/bigrams and character trigrams hashed into a
+              fixed-size vector; numpy only, no model download. This only measures
+              lexical overlap, so paraphrases score low. Used when ORATOR_EMBED_MODEL is
+              "hashing" or the model can't be loaded
+
+Every score carries the embedder's method ("semantic" or "lexical") so the coaching
+prompt and the client can tell which one they got.
+"""
+
+import hashlib
+import importlib.util
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import metrics
+
+EMBED_MODEL = os.environ.get("ORATOR_EMBED_MODEL", "all-MiniLM-L6-v2")
+EMBED_CACHE = os.environ.get("ORATOR_EMBED_CACHE", "embeddings")
+HASH_DIM = 1024
+
+score_ms = metrics.histogram("orator_semantic_score_ms", "Embedding + similarity lookup per transcript segment (ms)")
+
+HAVE_SENTENCE_TRANSFORMERS = importlib.util.find_spec("sentence_transformers") is not None
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def split_sentences(script: str) -> List[str]:
+    """Script sentences (and lines), stripped, without empties"""
+    return [s.strip() for s in _SENTENCE_END.split(script or "") if s and s.strip()]
+
+
+class HashingEmbedder:
+    """Feature-hashed unigrams, bigrams and character trigrams (no model, ~20 µs per sentence)"""
+
+    name = f"hashing-{HASH_DIM}"
+    method = "lexical"
+
+    def __init__(self, dim: int = HASH_DIM):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        words = _WORD.findall(text.lower())
+        features = list(words)
+        features += [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"#{word}#"
+            features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                # crc32 is stable across processes, unlike hash()
+                h = zlib.crc32(feature.encode())
+                vectors[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return normalize(vectors)
+
+
+class SentenceTransformerEmbedder:
+    """sentence-transformers model on CPU"""
+
+    method = "semantic"
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+        return normalize(vectors.astype(np.float32))
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-9)
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    """Process-wide embedder: ORATOR_EMBED_MODEL when installed, hashing otherwise"""
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            if EMBED_MODEL != "hashing" and HAVE_SENTENCE_TRANSFORMERS:
+                try:
+                    _embedder = SentenceTransformerEmbedder(EMBED_MODEL)
+                except Exception as e:
+                    print(f"Could not load embedding model {EMBED_MODEL}, using lexical hashing: {e}")
+            elif EMBED_MODEL != "hashing":
+                print(f"sentence-transformers is not installed, using lexical hashing instead of {EMBED_MODEL}")
+            if _embedder is None:
+                _embedder = HashingEmbedder()
+        return _embedder
+
+
+class ScriptIndex:
+    """
+    Embedded script sentences and highlighted topics
+
+    Args:
+        script: The presentation script
+        topics: Highlighted topics (CAPITALIZED PHRASES)
+        embedder: Defaults to get_embedder()
+        cache_dir: Where vectors are persisted (None disables the cache)
+    """
+
+    def __init__(self, script: str, topics: List[str], embedder=None, cache_dir: Optional[str] = EMBED_CACHE):
+        self.embedder = embedder or get_embedder()
+        self.sentences = split_sentences(script)
+        self.topics = list(topics)
+        self.key = hashlib.sha256(f"{self.embedder.name}\0{script}".encode()).hexdigest()[:20]
+        self.cached = False
+        started = time.perf_counter()
+
+        path = os.path.join(cache_dir, f"{self.key}.npz") if cache_dir else None
+        if path and os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    self.sentence_vectors = data["sentences"]
+                    self.topic_vectors = data["topics"]
+                self.cached = True
+            except Exception as e:
+                print(f"Ignoring unreadable embedding cache {path}: {e}")
+        if not self.cached:
+            self.sentence_vectors = self._embed(self.sentences)
+            self.topic_vectors = self._embed(self.topics)
+            if path:
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.tmp.npz"
+                np.savez(tmp, sentences=self.sentence_vectors, topics=self.topic_vectors)
+                os.replace(tmp, path)
+        self.build_ms = (time.perf_counter() - started) * 1000
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 1), dtype=np.float32)
+        return self.embedder.embed(texts)
+
+    def score(self, text: str) -> Optional[Dict]:
+        """
+        Similarity of a transcript segment to the script
+
+        Returns:
+            dict with score (cosine similarity to the nearest sentence), method ("semantic",
+            or "lexical" for word overlap), nearest_sentence, sentence_index, and the
+            closest topic with its score, or None without a script
+        """
+        if not self.sentences or not text:
+            return None
+        with score_ms.time():
+            vector = self.embedder.embed([text])[0]
+            similarities = self.sentence_vectors @ vector
+            best = int(np.argmax(similarities))
+            result = {
+                "score": round(float(similarities[best]), 3),
+                "method": self.embedder.method,
+                "nearest_sentence": self.sentences[best],
+                "sentence_index": best,
+                "topic": None,
+                "topic_score": None,
+            }
+            if self.topics:
+                topic_similarities = self.topic_vectors @ vector
+                closest = int(np.argmax(topic_similarities))
+                result["topic"] = self.topics[closest]
+                result["topic_score"] = round(float(topic_similarities[closest]), 3)
+        return result
+
+    def describe(self) -> dict:
+        return {"embedder": self.embedder.name, "method": self.embedder.method, "key": self.key, "sentences": len(self.sentences),
+                "topics": len(self.topics), "cached": self.cached, "build_ms": round(self.build_ms, 2)}
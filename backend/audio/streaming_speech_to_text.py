@@ -1,14 +1,27 @@
 from google.cloud import speech_v1 as speech
 import json
 import os
+import time
 import traceback
-from typing import Callable
+from collections import deque
+from typing import Callable, Optional
+
+import metrics
 
 # Initialize the Speech client once at module level (lazy initialization)
 # client = speech.SpeechClient.from_service_account_file("gcp_key.json")
 
 def get_speech_client():
     """Lazy initialization of Speech client"""
+    # Local emulator / stub server (benchmarks, offline development), plaintext gRPC
+    endpoint = os.getenv("ORATOR_SPEECH_ENDPOINT")
+    if endpoint:
+        import grpc
+        from google.auth.credentials import AnonymousCredentials
+        from google.cloud.speech_v1.services.speech.transports import SpeechGrpcTransport
+        transport = SpeechGrpcTransport(channel=grpc.insecure_channel(endpoint), credentials=AnonymousCredentials())
+        return speech.SpeechClient(transport=transport)
+
     # Try environment variable first (for Railway/production)
     gcp_key = os.getenv("GCP_KEY_JSON")
     if gcp_key:
@@ -28,7 +41,8 @@ class StreamingSpeechRecognizer:
     """
     Handles streaming speech recognition using Google Cloud Speech-to-Text API
     """
-    def __init__(self, callback: Callable[[dict], None], sample_rate: int = 16000, language_code: str = "en-US"):
+    def __init__(self, callback: Callable[[dict], None], sample_rate: int = 16000, language_code: str = "en-US",
+                 encoding: str = "LINEAR16", bytes_per_second: Optional[int] = None, measure_latency: bool = True):
         """
         Initialize streaming recognizer
         
@@ -36,15 +50,25 @@ class StreamingSpeechRecognizer:
             callback: Function to call with transcription results
             sample_rate: Audio sample rate (default: 16000 Hz)
             language_code: Language code (default: "en-US")
+            encoding: RecognitionConfig.AudioEncoding name, e.g. "WEBM_OPUS" for forwarded Opus
+            bytes_per_second: Byte rate of compressed audio, to place chunks in audio time
+                (default: 16-bit PCM at sample_rate)
+            measure_latency: Record speech_result_latency_ms; off for audio sent faster than
+                real time (offline analysis), where it means nothing
         """
         self.callback = callback
+        self.bytes_per_second = bytes_per_second or sample_rate * 2
+        self.measure_latency = measure_latency
+        # (audio offset at the end of a sent chunk in seconds, when it was sent)
+        self.sent = deque()
+        self.sent_seconds = 0.0
         self.sample_rate = sample_rate
         self.language_code = language_code
         self.is_streaming = False
         
         # Configure streaming recognition
         self.config = speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            encoding=speech.RecognitionConfig.AudioEncoding[encoding],
             sample_rate_hertz=sample_rate,
             language_code=language_code,
             enable_automatic_punctuation=False,  # Disabled to prevent premature periods
@@ -59,7 +83,7 @@ class StreamingSpeechRecognizer:
             single_utterance=False,  # Continuous recognition - don't stop after first utterance
         )
         
-        print(f"StreamingSpeechRecognizer initialized: {sample_rate}Hz, {language_code}")
+        print(f"StreamingSpeechRecognizer initialized: {encoding} {sample_rate}Hz, {language_code}")
     
     def generate_requests(self, audio_generator):
         """
@@ -69,10 +93,11 @@ class StreamingSpeechRecognizer:
             audio_generator: Generator yielding audio chunks
         """
         # Just yield audio content (config passed separately to streaming_recognize)
-        chunk_count = 0
         for audio_chunk in audio_generator:
-            chunk_count += 1
-            print(f"Sending audio chunk #{chunk_count}: {len(audio_chunk)} bytes")
+            metrics.debug("speech_request", "Sending audio chunk: %d bytes", len(audio_chunk))
+            if self.measure_latency:
+                self.sent_seconds += len(audio_chunk) / self.bytes_per_second
+                self.sent.append((self.sent_seconds, time.monotonic()))
             yield speech.StreamingRecognizeRequest(audio_content=audio_chunk)
     
     def start_streaming(self, audio_generator) -> None:
@@ -124,13 +149,18 @@ class StreamingSpeechRecognizer:
                     transcript = alternative.transcript
                     is_final = result.is_final
                     
-                    print(f"Result #{response_count}: '{transcript}' (final={is_final})")
-                    
+                    metrics.debug("speech_result", "Result #%d: '%s' (final=%s)", response_count, transcript, is_final)
+
+                    end_time = getattr(result, 'result_end_time', None)
+                    if end_time is not None and self.measure_latency:
+                        self._observe_latency(end_time.total_seconds())
                     self.callback({
                         "transcript": transcript,
                         "confidence": alternative.confidence if is_final else 0.0,
                         "is_final": is_final,
-                        "stability": result.stability if hasattr(result, 'stability') else 0.0
+                        "stability": result.stability if hasattr(result, 'stability') else 0.0,
+                        # Offset from the start of the audio stream, used to place offline results on the timeline
+                        "end_time": end_time.total_seconds() if end_time is not None else None
                     })
                     
         except Exception as e:
@@ -144,6 +174,18 @@ class StreamingSpeechRecognizer:
             print("Streaming ended")
             self.is_streaming = False
     
+    def _observe_latency(self, end_seconds: float) -> None:
+        """Result arrival minus when the chunk holding the end of its audio was sent"""
+        # Result end offsets only grow, so chunks ending before this one are done with
+        while len(self.sent) > 1 and self.sent[0][0] < end_seconds:
+            self.sent.popleft()
+        try:
+            offset, sent_at = self.sent[0]
+        except IndexError:
+            return
+        if offset >= end_seconds:
+            metrics.speech_result_latency_ms.observe((time.monotonic() - sent_at) * 1000)
+
     def stop(self) -> None:
         """Stop streaming recognition"""
         self.is_streaming = False
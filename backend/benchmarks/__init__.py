@@ -0,0 +1 @@
+# Benchmarks for the backend hot paths (run with python -m benchmarks.<name>)
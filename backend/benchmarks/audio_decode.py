@@ -0,0 +1,117 @@
+"""
+Opus ingest decoder benchmark: CPU per stream and upstream bandwidth per codec
+
+    python -m benchmarks.audio_decode --seconds 60 --bitrate 32000
+
+Encodes synthetic speech-like audio with PyAV (48 kHz mono Opus, like browsers), then
+feeds it to StreamingOpusDecoder in browser-sized pieces (100 ms MediaRecorder
+timeslices, or one packet per message for raw Opus) and reports decode CPU time per
+second of audio. Prints a JSON summary per codec.
+"""
+
+import argparse
+import io
+import json
+import time
+
+import numpy as np
+
+from audio.codecs import HAVE_PYAV, PCM_RATE, StreamingOpusDecoder
+
+
+def speech_like(seconds: float, rate: int = 48000, seed: int = 0) -> np.ndarray:
+    """Voiced harmonics with a syllable-rate envelope plus noise, float32 in [-1, 1]"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * rate)) / rate
+    pitch = 120 + 30 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) ** 2
+    audio = 0.3 * voiced * envelope + 0.01 * rng.normal(size=t.size)
+    return audio.astype(np.float32)
+
+
+def encode(samples: np.ndarray, codec: str, bitrate: int, rate: int = 48000):
+    """Returns a container byte stream (webm_opus / ogg_opus) or a list of raw Opus packets"""
+    import av
+    frame_size = 960  # 20 ms at 48 kHz
+    if codec == "opus":
+        encoder = av.CodecContext.create("libopus", "w")
+        encoder.sample_rate, encoder.layout, encoder.format, encoder.bit_rate = rate, "mono", "flt", bitrate
+        packets = []
+    else:
+        output = io.BytesIO()
+        container = av.open(output, mode="w", format="webm" if codec == "webm_opus" else "ogg")
+        encoder = container.add_stream("libopus", rate=rate, layout="mono")
+        encoder.bit_rate = bitrate
+
+    pts = 0
+    for start in range(0, len(samples) - frame_size + 1, frame_size):
+        frame = av.AudioFrame.from_ndarray(samples[None, start:start + frame_size], format="flt", layout="mono")
+        frame.sample_rate, frame.pts = rate, pts
+        pts += frame_size
+        if codec == "opus":
+            packets.extend(bytes(p) for p in encoder.encode(frame))
+        else:
+            for packet in encoder.encode(frame):
+                container.mux(packet)
+    if codec == "opus":
+        packets.extend(bytes(p) for p in encoder.encode(None))
+        return packets
+    for packet in encoder.encode(None):
+        container.mux(packet)
+    container.close()
+    return output.getvalue()
+
+
+def bench_codec(codec: str, samples: np.ndarray, seconds: float, bitrate: int) -> dict:
+    encoded = encode(samples, codec, bitrate)
+    if codec == "opus":
+        messages = encoded
+    else:
+        # ~100 ms MediaRecorder timeslices
+        step = max(1, int(len(encoded) / seconds / 10))
+        messages = [encoded[i:i + step] for i in range(0, len(encoded), step)]
+    upstream = sum(len(m) for m in messages)
+
+    pcm = []
+    decoder = StreamingOpusDecoder(codec, pcm.append)
+    wall = time.perf_counter()
+    for message in messages:
+        decoder.feed(message)
+    decoder.close(timeout=30)
+    wall = time.perf_counter() - wall
+    stats = decoder.snapshot()
+    return {
+        "messages": len(messages),
+        "upstream_kbit_per_s": round(upstream * 8 / seconds / 1000, 1),
+        "pcm_kbit_per_s": PCM_RATE * 16 / 1000,
+        "compression": round(PCM_RATE * 2 * seconds / upstream, 1),
+        "decoded_seconds": stats["audio_seconds"],
+        "decode_cpu_seconds": stats["cpu_seconds"],
+        "real_time_factor": stats["real_time_factor"],
+        "streams_per_core": round(1 / stats["real_time_factor"]) if stats["real_time_factor"] else None,
+        "wall_seconds": round(wall, 3),
+        "error": stats["error"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--bitrate", type=int, default=32000)
+    parser.add_argument("--codecs", nargs="+", default=["webm_opus", "ogg_opus", "opus"])
+    args = parser.parse_args()
+    if not HAVE_PYAV:
+        raise SystemExit("PyAV is required for this benchmark (pip install av)")
+
+    samples = speech_like(args.seconds)
+    print(json.dumps({
+        "seconds": args.seconds,
+        "bitrate": args.bitrate,
+        "codecs": {codec: bench_codec(codec, samples, args.seconds, args.bitrate) for codec in args.codecs},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Multi-headset EEG load test with BrainFlow synthetic boards
+
+    python -m benchmarks.eeg_boards --boards 12 --seconds 30
+
+Connects N synthetic boards through eeg.boards.BoardManager (one acquisition thread and
+ring buffer each), then, like N presenters polling /eeg/detect, every board asks for the
+ratios of its latest --window seconds once per --interval. Reports request latency, how
+many windows the shared pool filtered per batch, process CPU use, and whether every
+acquisition thread kept up with the board's sampling rate.
+"""
+
+import argparse
+import json
+import threading
+import time
+
+from brainflow.board_shim import BoardIds, BoardShim
+
+from .suite import latency_summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boards", type=int, default=12)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--window", type=float, default=5.0, help="Seconds of EEG per stress reading")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between readings per board")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    BoardShim.disable_board_logger()
+    import metrics
+    from eeg.boards import BoardManager
+
+    manager = BoardManager(workers=args.workers)
+    started = time.perf_counter()
+    boards = [manager.connect(f"synthetic-{i}", f"bench-{i}", board=BoardIds.SYNTHETIC_BOARD.value)
+              for i in range(args.boards)]
+    connect_ms = (time.perf_counter() - started) * 1000
+    for board in boards:
+        board.collect(args.window)  # fill the first window
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def poll(board):
+        next_at = time.perf_counter()
+        while next_at < deadline:
+            time.sleep(max(0.0, next_at - time.perf_counter()))
+            t0 = time.perf_counter()
+            try:
+                manager.ratios(board, args.window)
+                with lock:
+                    latencies.append((time.perf_counter() - t0) * 1000)
+            except Exception as e:
+                errors.append(str(e))
+            next_at += args.interval
+
+    cpu, wall = time.process_time(), time.perf_counter()
+    threads = [threading.Thread(target=poll, args=(board,)) for board in boards]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+
+    elapsed = time.perf_counter() - started
+    acquisition = [board.total / (elapsed * board.sampling_rate) for board in boards]
+    batches = metrics.histogram("orator_eeg_batch_size").snapshot()
+    manager.close()
+    print(json.dumps({
+        "boards": args.boards,
+        "seconds": args.seconds,
+        "window_seconds": args.window,
+        "workers": args.workers,
+        "connect_all_ms": round(connect_ms, 1),
+        "readings": len(latencies),
+        "errors": len(errors),
+        "reading_latency": latency_summary(latencies),
+        "mean_batch_size": batches["mean"],
+        "cpu_percent": round(100 * cpu / wall, 1),
+        # samples received / samples expected at the nominal rate (~1.0 = no acquisition gaps)
+        "acquisition_ratio_min": round(min(acquisition), 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Degradation policy under synthetic load
+
+    python -m benchmarks.governor                      # scripted samples, deterministic
+    python -m benchmarks.governor --burn --seconds 40  # real CPU load from busy processes
+
+The scripted run feeds Governor.tick a load profile (calm, CPU ramp, an audio SLO miss,
+saturation, moderate load, recovery) and tries to open a new session on every tick. It
+prints the level timeline and checks the policy: levels only move one step per tick, an
+audio SLO miss escalates on its first tick, new sessions are refused only while shedding
+or at --max-sessions, moderate load ends the shedding, and the level returns to normal
+once the load is gone. A second, audio-only run checks that the video and JPEG rungs are
+skipped when those subsystems use no CPU.
+
+--burn instead starts --processes busy-looping processes for the middle half of the run
+and lets the governor measure the real machine (/proc/stat) every --tick seconds.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+from governor import LEVELS, PRESSURE_TICKS, SLOS, CapacityError, Governor, Sample
+
+
+def profile(ticks: int):
+    """(cpu, latency) per tick: calm, ramp, audio miss, saturation, moderate, recovery"""
+    quiet = {name: None for name in SLOS}
+    for i in range(ticks):
+        phase = i / ticks
+        latency = dict(quiet)
+        if phase < 0.15:
+            cpu = 0.3
+        elif phase < 0.35:
+            cpu = 0.3 + (phase - 0.15) * 3.5
+            latency["video"] = 500 if cpu > 0.8 else 100
+        elif phase < 0.4:
+            cpu, latency["audio"] = 0.8, 1000
+        elif phase < 0.6:
+            cpu, latency["video"], latency["jpeg"] = 0.97, 1000, 50
+        elif phase < 0.75:
+            cpu = 0.75
+        else:
+            cpu = 0.25
+        yield cpu, latency
+
+
+def simulate(ticks: int, max_sessions: int) -> dict:
+    governor = Governor(max_sessions=max_sessions, tick_seconds=0)
+    notified = []
+    timeline, levels, outcomes = [], [], []
+    for i, (cpu, latency) in enumerate(profile(ticks)):
+        policy = governor.tick(Sample(1.0, cpu, latency, {"audio": 0.1, "video": 0.8, "jpeg": 0.1}))
+        try:
+            admission = governor.admit(f"session-{i}", "audio", on_level=notified.append)
+            outcome = "admitted"
+            if i % 3:
+                admission.close()  # two of three sessions are short
+        except CapacityError as e:
+            outcome = e.status["reason"]
+        levels.append(policy.level)
+        outcomes.append((policy, outcome))
+        timeline.append({"tick": i, "cpu": round(cpu, 2), "level": policy.level, "name": policy.name,
+                         "misses": [k for k, v in latency.items() if v and v > SLOS[k].limit_ms], "new_session": outcome})
+
+    checks = {
+        "one_step_per_tick": all(abs(a - b) <= 1 for a, b in zip(levels, levels[1:])),
+        "audio_miss_escalates_at_once": all(
+            levels[t["tick"]] > levels[t["tick"] - 1] for t in timeline
+            if "audio" in t["misses"] and "audio" not in timeline[t["tick"] - 1]["misses"]),
+        "reached_shedding": max(levels) == len(LEVELS) - 1,
+        "rejects_only_when_shedding_or_full": all(
+            o == "admitted" or not p.admitting or "capacity" in o for p, o in outcomes),
+        "moderate_load_ends_shedding": any(
+            p.admitting and levels[t["tick"] - 1] == len(LEVELS) - 1
+            for t, (p, _) in zip(timeline, outcomes) if t["cpu"] == 0.75),
+        "audio_only_skips_video_rungs": audio_only() == [0, 3, 4],
+        "recovered": levels[-1] == 0,
+        "sessions_notified": len(notified) > 0,
+    }
+    return {"timeline": timeline, "checks": checks, "stats": governor.snapshot()}
+
+
+def audio_only() -> list:
+    """Distinct levels under saturation while only audio is charged CPU"""
+    governor = Governor(tick_seconds=0)
+    levels = [0]
+    for _ in range(3 * PRESSURE_TICKS):
+        level = governor.tick(Sample(1.0, 0.97, {name: None for name in SLOS}, {"audio": 0.9})).level
+        if level != levels[-1]:
+            levels.append(level)
+    return levels
+
+
+def _burn(stop_at: float) -> None:
+    while time.time() < stop_at:
+        pass
+
+
+def burn(seconds: float, processes: int, tick: float) -> dict:
+    governor = Governor(tick_seconds=tick)
+    governor.sample()
+    started = time.time()
+    load_from, load_until = started + seconds / 4, started + 3 * seconds / 4
+    workers = []
+    timeline = []
+    while time.time() - started < seconds:
+        time.sleep(tick)
+        if not workers and time.time() >= load_from:
+            context = multiprocessing.get_context("spawn")
+            workers = [context.Process(target=_burn, args=(load_until,)) for _ in range(processes)]
+            for process in workers:
+                process.start()
+        policy = governor.tick()
+        sample = governor.last_sample
+        timeline.append({"t": round(time.time() - started, 1), "cpu": round(sample.cpu, 2),
+                         "level": policy.level, "name": policy.name})
+    for process in workers:
+        process.join()
+    return {"processes": processes, "timeline": timeline, "max_level": max(t["level"] for t in timeline),
+            "final_level": timeline[-1]["level"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ticks", type=int, default=60)
+    parser.add_argument("--max-sessions", type=int, default=12)
+    parser.add_argument("--burn", action="store_true", help="Real CPU load instead of scripted samples")
+    parser.add_argument("--seconds", type=float, default=40.0)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--tick", type=float, default=1.0)
+    args = parser.parse_args()
+
+    if args.burn:
+        print(json.dumps(burn(args.seconds, args.processes, args.tick), indent=2))
+    else:
+        print(json.dumps(simulate(args.ticks, args.max_sessions), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Server responsiveness while pose inference is saturated: in-process vs InferencePool
+
+    python -m benchmarks.inference_pool --sessions 4 --seconds 10 --workers 2
+    python -m benchmarks.inference_pool --stub   # no ultralytics needed
+
+A heartbeat thread stands in for the audio / HTTP / WebSocket threads: it wakes every
+5 ms and records how late it was. Meanwhile --sessions threads push 640x480 frames through
+GesturePipeline-style inference as fast as they can, first on an in-process model behind
+the shared lock, then through an InferencePool of --workers processes. Reports heartbeat
+lateness percentiles and inference throughput for both.
+
+--stub replaces YOLO with a model that holds the GIL for --stub-ms per frame, which is
+the behaviour that hurts the server's other threads.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from .suite import latency_summary
+
+STUB_MS = 30.0
+
+
+class _Array(np.ndarray):
+    """ndarray posing as a torch tensor (.cpu().numpy())"""
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return np.asarray(self)
+
+
+class _Result:
+    """Just enough of an Ultralytics pose result for video.pose.from_ultralytics"""
+
+    def __init__(self, width, height):
+        keypoints = np.tile(np.linspace([width * 0.4, height * 0.2], [width * 0.6, height * 0.9], 17), (1, 1, 1))
+        box = np.array([[width * 0.3, height * 0.1, width * 0.7, height]])
+        self.keypoints = type("K", (), {"xy": keypoints.view(_Array)})()
+        self.boxes = type("B", (), {"xyxy": box.view(_Array), "conf": np.array([0.9]).view(_Array)})()
+
+
+class StubPoseModel:
+    """Pure-Python busy loop: holds the GIL like eager PyTorch pre/post-processing does"""
+
+    def __init__(self, busy_ms: float = STUB_MS):
+        self.busy_ms = busy_ms
+
+    def predict(self, frame, **kwargs):
+        deadline = time.perf_counter() + self.busy_ms / 1000
+        checksum = 0
+        while time.perf_counter() < deadline:
+            checksum += int(frame[checksum % frame.shape[0], 0, 0])
+        return [_Result(frame.shape[1], frame.shape[0])]
+
+
+def load_stub_model():
+    return StubPoseModel(float(os.environ.get("ORATOR_STUB_POSE_MS", STUB_MS)))
+
+
+def run(predict, sessions: int, seconds: float) -> dict:
+    frame = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    stop = threading.Event()
+    lateness, frames = [], [0] * sessions
+
+    def heartbeat():
+        while not stop.is_set():
+            due = time.perf_counter() + 0.005
+            time.sleep(0.005)
+            lateness.append((time.perf_counter() - due) * 1000)
+
+    def session(i):
+        while not stop.is_set():
+            predict(frame)
+            frames[i] += 1
+
+    threads = [threading.Thread(target=heartbeat)] + [threading.Thread(target=session, args=(i,))
+                                                      for i in range(sessions)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return {"frames_per_second": round(sum(frames) / seconds, 1), "heartbeat_lateness": latency_summary(lateness)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--stub", action="store_true", help="Use a GIL-holding stub instead of YOLO")
+    parser.add_argument("--stub-ms", type=float, default=STUB_MS)
+    args = parser.parse_args()
+
+    os.environ["ORATOR_STUB_POSE_MS"] = str(args.stub_ms)
+    from video.workers import InferencePool
+
+    if args.stub:
+        model, loader = load_stub_model(), "benchmarks.inference_pool:load_stub_model"
+    else:
+        from video.backend import load_pose_model
+        model, loader = load_pose_model(), "video.backend:load_pose_model"
+
+    lock = threading.Lock()
+
+    def in_process(frame):
+        with lock:
+            return model.predict(frame, conf=0.7, verbose=False)
+
+    results = {"in_process": run(in_process, args.sessions, args.seconds)}
+    pool = InferencePool(args.workers, loader=loader, max_size=(640, 480))
+    try:
+        results["pool"] = run(lambda frame: pool.predict(frame, conf=0.7, verbose=False),
+                              args.sessions, args.seconds)
+        results["pool"]["stats"] = pool.snapshot()
+    finally:
+        pool.close()
+    print(json.dumps({"sessions": args.sessions, "workers": args.workers, "stub": args.stub, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Pose inference backend benchmark: per-frame latency and keypoint agreement with PyTorch
+
+    python -m benchmarks.pose_backend recording.mp4 --backends torch onnx openvino --int8 --threads 4
+
+Without a source, random noise frames are used (latency only, no people to agree on).
+Prints a JSON summary per backend.
+"""
+
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from video.backend import load_pose_model
+from video.pose import from_ultralytics
+from .roi_pose import keypoint_error, primary_keypoints
+
+
+def read_frames(source, count, shape=(720, 1280, 3)):
+    if source is None:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, shape, dtype=np.uint8) for _ in range(count)]
+    cap = cv2.VideoCapture(int(source) if source.isdigit() else source)  # pylint: disable=no-member
+    frames = []
+    while len(frames) < count:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", nargs="?", default=None, help="Video file or camera index")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "openvino"])
+    parser.add_argument("--int8", action="store_true", help="Also benchmark int8 exports")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    frames = read_frames(args.source, args.frames)
+    if not frames:
+        raise SystemExit(f"Could not read frames from {args.source}")
+
+    variants = [(b, False) for b in args.backends]
+    if args.int8:
+        variants += [(b, True) for b in args.backends if b != "torch"]
+
+    reference = None
+    results = {}
+    for backend, int8 in variants:
+        name = backend + ("-int8" if int8 else "")
+        started = time.perf_counter()
+        model = load_pose_model(backend, imgsz=args.imgsz, int8=int8, threads=args.threads)
+        load_seconds = time.perf_counter() - started
+
+        latencies, keypoints = [], []
+        for frame in frames:
+            start = time.perf_counter()
+            result = model.predict(frame, imgsz=args.imgsz, conf=0.7, verbose=False)[0]
+            latencies.append(time.perf_counter() - start)
+            keypoints.append(primary_keypoints(from_ultralytics(result)))
+
+        if backend == "torch" and not int8:
+            reference = keypoints
+        errors = [keypoint_error(r, k) for r, k in zip(reference, keypoints)] if reference else []
+        errors = np.array([e for e in errors if e is not None])
+        detected = sum(k is not None for k in keypoints)
+        lat = np.array(latencies) * 1000
+
+        results[name] = {
+            "load_and_warmup_seconds": round(load_seconds, 2),
+            "latency_ms_mean": round(float(lat.mean()), 2),
+            "latency_ms_p50": round(float(np.percentile(lat, 50)), 2),
+            "latency_ms_p95": round(float(np.percentile(lat, 95)), 2),
+            "fps": round(1000.0 / float(lat.mean()), 1),
+            "frames_with_person": detected,
+            "keypoint_error_px_mean": round(float(errors.mean()), 2) if len(errors) else None,
+            "detection_agreement": (
+                round(sum((r is None) == (k is None) for r, k in zip(reference, keypoints)) / len(frames), 3)
+                if reference else None
+            ),
+        }
+
+    print(json.dumps({
+        "source": args.source or "synthetic",
+        "frames": len(frames),
+        "imgsz": args.imgsz,
+        "threads": args.threads,
+        "backends": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+ROI pose inference benchmark: per-frame latency and keypoint error against full-frame inference
+
+    python -m benchmarks.roi_pose recording.mp4 --frames 300 --imgsz 320
+
+Prints a JSON summary per mode (full, downscale, crop).
+"""
+
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from video.roi import RoiPredictor
+
+
+def primary_keypoints(detections):
+    """Keypoints of the largest person, or None"""
+    if len(detections) == 0:
+        return None
+    boxes = detections.boxes
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return detections.keypoints[int(np.argmax(areas))]
+
+
+def keypoint_error(reference, candidate):
+    """Mean pixel distance over keypoints visible in both"""
+    if reference is None or candidate is None:
+        return None
+    visible = reference.any(axis=1) & candidate.any(axis=1)
+    if not visible.any():
+        return None
+    return float(np.linalg.norm(reference[visible] - candidate[visible], axis=1).mean())
+
+
+def summarize(latencies, errors, misses, frames):
+    lat = np.array(latencies) * 1000
+    err = np.array([e for e in errors if e is not None])
+    return {
+        "frames": frames,
+        "latency_ms_mean": round(float(lat.mean()), 2),
+        "latency_ms_p50": round(float(np.percentile(lat, 50)), 2),
+        "latency_ms_p95": round(float(np.percentile(lat, 95)), 2),
+        "keypoint_error_px_mean": round(float(err.mean()), 2) if len(err) else None,
+        "keypoint_error_px_p95": round(float(np.percentile(err, 95)), 2) if len(err) else None,
+        "missed_frames": misses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Video file (or camera index)")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--imgsz", type=int, default=320, help="Inference size for downscale/crop modes")
+    parser.add_argument("--reacquire-every", type=int, default=30)
+    parser.add_argument("--model", default="yolo11n-pose.pt")
+    args = parser.parse_args()
+
+    model = YOLO(args.model)
+    predictors = {
+        "full": RoiPredictor(model, "full"),
+        "downscale": RoiPredictor(model, "downscale", imgsz=args.imgsz),
+        "crop": RoiPredictor(model, "crop", imgsz=args.imgsz, reacquire_every=args.reacquire_every),
+    }
+    stats = {name: {"latencies": [], "errors": [], "misses": 0} for name in predictors}
+
+    source = int(args.source) if args.source.isdigit() else args.source
+    cap = cv2.VideoCapture(source)  # pylint: disable=no-member
+    ok, frame = cap.read()
+    frame_shape = list(frame.shape) if ok else None
+    if ok:
+        # Warm-up so first-call allocation doesn't skew the numbers
+        for predictor in predictors.values():
+            predictor.predict(frame)
+
+    frames = 0
+    while ok and frames < args.frames:
+        reference = None
+        for name, predictor in predictors.items():
+            start = time.perf_counter()
+            detections = predictor.predict(frame)
+            stats[name]["latencies"].append(time.perf_counter() - start)
+            kpts = primary_keypoints(detections)
+            if name == "full":
+                reference = kpts
+            if kpts is None:
+                stats[name]["misses"] += 1
+            stats[name]["errors"].append(keypoint_error(reference, kpts))
+        frames += 1
+        ok, frame = cap.read()
+    cap.release()
+
+    if frames == 0:
+        raise SystemExit(f"Could not read frames from {args.source}")
+
+    print(json.dumps({
+        "source": args.source,
+        "frame_shape": frame_shape,
+        "imgsz": args.imgsz,
+        "modes": {name: summarize(s["latencies"], s["errors"], s["misses"], frames) for name, s in stats.items()},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Throughput of N backend workers behind router.py
+
+    python -m benchmarks.scale_out --workers 1 2 4 --clients 16 --seconds 15
+
+For every worker count, starts `router.py --workers N` (with its session.resp stand-in)
+on a free port, then --clients threads, each its own session, keep posting a fresh
+--words script to /transcript?session= (script parsing, topic extraction and the
+embedding index: CPU-bound, one GIL per worker) and read /session_state back from the
+same session through the router. Reports requests per second, latency, how the sessions
+spread over workers, and the speedup over the first worker count.
+
+Scaling is bounded by physical cores: on an N-core machine expect roughly linear gains
+up to N workers.
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import Counter
+
+from .suite import latency_summary, long_script
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def run(workers: int, clients: int, seconds: float, words: int) -> dict:
+    port = free_port()
+    workdir = tempfile.mkdtemp(prefix="orator-scale-")
+    env = {**os.environ, "ORATOR_PREWARM": "", "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "benchmark"),
+           "ORATOR_EMBED_CACHE": os.path.join(workdir, "embeddings"),
+           "ORATOR_PROGRESS_DB": os.path.join(workdir, "progress.db"),
+           "ORATOR_RECORDINGS_DIR": os.path.join(workdir, "recordings")}
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    router = subprocess.Popen([sys.executable, "router.py", "--workers", str(workers), "--port", str(port)],
+                              cwd=backend_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for i in range(workers):
+            wait_ready(f"http://127.0.0.1:{port + 1 + i}/")
+        # Load the coach subsystem on every worker before measuring
+        for i in range(workers * 4):
+            request = urllib.request.Request(f"{base}/transcript?session=warm-{i}", data=b'"WARM UP script."',
+                                             headers={"Content-Type": "application/json"})
+            urllib.request.urlopen(request).read()
+
+        script = long_script(words)
+        latencies, served_by = [], Counter()
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def client(i):
+            n = 0
+            while time.perf_counter() < deadline:
+                body = json.dumps(f"{script} SESSION {i} TAKE {n}.").encode()
+                started = time.perf_counter()
+                request = urllib.request.Request(f"{base}/transcript?session=client-{i}", data=body,
+                                                 headers={"Content-Type": "application/json"})
+                urllib.request.urlopen(request).read()
+                state = json.loads(urllib.request.urlopen(f"{base}/session_state?session=client-{i}").read())
+                with lock:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    served_by[state["worker"]] += 1
+                n += 1
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        router.terminate()
+        router.wait(timeout=15)
+    return {
+        "workers": workers,
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "latency": latency_summary(latencies),
+        "served_by": dict(served_by),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=15.0)
+    parser.add_argument("--words", type=int, default=1500, help="Script length per /transcript")
+    args = parser.parse_args()
+
+    results = [run(n, args.clients, args.seconds, args.words) for n in args.workers]
+    for result in results:
+        result["speedup"] = round(result["requests_per_second"] / max(results[0]["requests_per_second"], 1e-9), 2)
+    print(json.dumps({"cores": os.cpu_count(), "clients": args.clients, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Memory of one long rehearsal, simulated
+
+    python -m benchmarks.soak                    # two hours of session time
+    python -m benchmarks.soak --minutes 240 --fps 30
+
+Replays --minutes of session time as fast as possible through the live per-session state
+a real session builds up: pose tracks and their gesture history (--fps frames per second,
+two people walking through the frame), a final transcript segment every 4 s into the
+rolling window /stream_audio keeps, coaching feedback every 12 s on a PresentationAnalyzer,
+gesture and stress events on an event bus, and a SessionRecorder spilling all of it to a
+temporary recordings directory. Pose runs PoseTracker and video.gesture's keypoint
+history and gesture evaluation directly on synthetic detections, no pose model needed.
+
+Every --sample-minutes it records the process RSS and the session's accounting from
+session.memory.MemoryLedger. The result checks that both stay flat once the rolling
+windows are full (after the event timeline's retention, ORATOR_TIMELINE_SECONDS): RSS
+within --rss-tolerance-mb and no upward trend in the accounted bytes (the timeline trims
+in chunks, so they saw-tooth within 25%).
+"""
+
+import argparse
+import json
+import math
+import tempfile
+import time
+from collections import deque
+
+import numpy as np
+
+from session import events, recorder as session_recorder
+from session.events import EventBus
+from session.memory import MemoryLedger, TRANSCRIPT_WINDOW, rss_bytes
+from video.gesture import evaluate_gestures, record_keypoints
+from video.tracker import PoseTracker
+
+from .stubs import SAMPLE_TEXT
+
+SESSION = "soak"
+
+
+def skeleton(cx: float, cy: float) -> np.ndarray:
+    """(17, 2) COCO keypoints of a person centred at (cx, cy), roughly 200 x 400 px"""
+    offsets = np.array([
+        (0, -180), (-10, -190), (10, -190), (-20, -185), (20, -185),  # face
+        (-50, -120), (50, -120), (-70, -50), (70, -50), (-75, 10), (75, 10),  # arms
+        (-30, 20), (30, 20), (-30, 110), (30, 110), (-30, 200), (30, 200),  # legs
+    ], dtype=np.float64)
+    return offsets + (cx, cy)
+
+
+def detections(t: float):
+    """Boxes, keypoints and confidences at session time t: a pacing presenter and a passer-by"""
+    people = [(640 + 200 * math.sin(t / 3.0), 360)]
+    if (t % 60) < 20:
+        people.append((100 + (t % 60) * 50, 380))
+    keypoints = np.stack([skeleton(x, y) for x, y in people])
+    boxes = np.stack([np.concatenate([k.min(axis=0), k.max(axis=0)]) for k in keypoints])
+    return boxes, keypoints, np.linspace(0.9, 0.6, len(people))
+
+
+def run(minutes: float, fps: int, sample_minutes: float, workdir: str) -> dict:
+    session_recorder.RECORDINGS_DIR = workdir
+    bus = EventBus()
+    ledger = MemoryLedger(event_bus=bus)
+    tracker = PoseTracker()
+
+    from audio.openai import PresentationAnalyzer
+    analyzer = PresentationAnalyzer("")
+    full_transcript = deque(maxlen=TRANSCRIPT_WINDOW)  # as in /stream_audio
+    recorder = session_recorder.SessionRecorder(SESSION, event_bus=bus).start()
+
+    tracked = [
+        ledger.track(SESSION, "transcript", lambda: full_transcript),
+        ledger.track(SESSION, "analyzer_feedback", lambda: analyzer.previous_feedback),
+        ledger.track(SESSION, "recorder_buffer", lambda: (recorder._buffer, recorder._text)),
+        ledger.track(SESSION, "pose_tracks", lambda: tracker.tracks),
+    ]
+
+    base = events.now()
+    samples = []
+    word = 0
+    started = time.perf_counter()
+    for second in range(int(minutes * 60)):
+        t = float(second)
+        for frame in range(fps):
+            now = t + frame / fps
+            boxes, keypoints, confidences = detections(now)
+            for track in tracker.update(boxes, keypoints, now, confidences):
+                record_keypoints(track.history, track.keypoints, now)
+        if second % 2 == 0:
+            primary = tracker.primary()
+            if primary is not None:
+                result = evaluate_gestures(primary.history, primary.keypoints, t + 1)
+                bus.publish(SESSION, events.GESTURE, result, ts=base + t)
+
+        bus.publish(SESSION, events.STRESS, {"stressed": second % 7 == 0}, ts=base + t)
+
+        if second % 4 == 3:
+            text = " ".join(SAMPLE_TEXT[(word + i) % len(SAMPLE_TEXT)] for i in range(10))
+            word += 10
+            full_transcript.append(text)
+            bus.publish(SESSION, events.TRANSCRIPT, {"transcript": text, "confidence": 0.9, "semantic": None,
+                                                     "start": base + t - 4, "end": base + t}, ts=base + t)
+
+        if second % 12 == 11:
+            # What analyze_presentation keeps per successful call
+            result = {"success": True, "feedback": f"✓ Good flow! ({second})", "stuttering_detected": False,
+                      "stuttering_details": None, "highlighted_topics": analyzer.highlighted_topics,
+                      "semantic": None, "timestamp": None}
+            analyzer.previous_feedback.append(result)
+            bus.publish(SESSION, events.FEEDBACK, {"type": "ai_feedback", "feedback": result["feedback"],
+                                                   "stuttering_detected": False}, ts=base + t)
+
+        if second % int(sample_minutes * 60) == 0 or second == int(minutes * 60) - 1:
+            accounting = ledger.session(SESSION)
+            samples.append({
+                "minute": round(t / 60, 1),
+                "rss_mb": round((rss_bytes() or 0) / 2 ** 20, 2),
+                "session_kb": round(accounting["total_bytes"] / 1024, 1),
+                "timeline_events": accounting["timeline_events"],
+                "history_points": sum(len(p) for track in tracker.tracks for p in track.history.values()),
+                "recorded_rows": recorder.rows,
+            })
+
+    components = ledger.session(SESSION)["components"]
+    for handle in tracked:
+        handle.close()
+    recorder.close()
+    return {"elapsed_s": round(time.perf_counter() - started, 1), "samples": samples,
+            "components_kb": {k: round(v / 1024, 1) for k, v in components.items()}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=120.0, help="Simulated session length")
+    parser.add_argument("--fps", type=int, default=15, help="Pose frames per simulated second")
+    parser.add_argument("--sample-minutes", type=float, default=5.0)
+    parser.add_argument("--rss-tolerance-mb", type=float, default=4.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="orator-soak-") as workdir:
+        result = run(args.minutes, args.fps, args.sample_minutes, workdir)
+
+    # Flat once every window is full: the later half of the steady samples peaks no higher
+    # than the earlier half
+    warm_minute = events.TIMELINE_SECONDS / 60 + args.sample_minutes
+    steady = [s for s in result["samples"] if s["minute"] >= warm_minute]
+    if len(steady) >= 4:
+        earlier, later = steady[:len(steady) // 2], steady[len(steady) // 2:]
+        peak = lambda samples, key: max(s[key] for s in samples)
+        result["steady_state"] = {
+            "from_minute": steady[0]["minute"],
+            "rss_growth_mb": round(steady[-1]["rss_mb"] - steady[0]["rss_mb"], 2),
+            "session_kb_peaks": [peak(earlier, "session_kb"), peak(later, "session_kb")],
+        }
+        result["checks"] = {
+            "rss_flat": peak(later, "rss_mb") - steady[0]["rss_mb"] <= args.rss_tolerance_mb,
+            "session_flat": peak(later, "session_kb") <= peak(earlier, "session_kb") * 1.05,
+            "everything_recorded": steady[-1]["recorded_rows"] > steady[-1]["timeline_events"],
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
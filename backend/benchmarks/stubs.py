@@ -0,0 +1,180 @@
+"""
+Local stand-ins for Google Speech-to-Text and the OpenAI API with configurable latency,
+so benchmarks and load tests run offline and don't depend on remote service variance.
+
+    with stub_services(speech_latency=0.3, llm_latency=0.8):
+        ...  # get_speech_client() / get_openai_client() now talk to the stubs
+
+The speech stub speaks the real StreamingRecognize gRPC method (plaintext, selected with
+ORATOR_SPEECH_ENDPOINT); the OpenAI stub answers POST /v1/chat/completions (selected with
+OPENAI_BASE_URL).
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent import futures
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import grpc
+from google.cloud.speech_v1 import types
+
+BYTES_PER_SECOND = 16000 * 2  # LINEAR16 mono at 16 kHz
+SAMPLE_TEXT = (
+    "today I want to talk about how AI IN EDUCATION is changing the classroom um and why "
+    "teachers teachers should care about it uh the first point is PERSONALIZED LEARNING "
+    "which means every student gets feedback at their own pace so basically the second "
+    "point is accessibility for students who need extra support"
+).split()
+
+
+class SpeechStub:
+    """
+    StreamingRecognize server that turns received audio into canned words.
+
+    Args:
+        latency: Seconds added before each response
+        words_per_second: Speaking rate of the canned transcript
+        interim_every: Audio seconds between interim results
+        final_every: Audio seconds per final result (one "sentence")
+    """
+
+    def __init__(self, latency: float = 0.2, words_per_second: float = 2.5,
+                 interim_every: float = 0.5, final_every: float = 4.0):
+        self.latency = latency
+        self.words_per_second = words_per_second
+        self.interim_every = interim_every
+        self.final_every = final_every
+        self.server: Optional[grpc.Server] = None
+        self.address: Optional[str] = None
+        self.streams = 0
+
+    def _result(self, audio_seconds: float, start_seconds: float, is_final: bool):
+        first = int(start_seconds * self.words_per_second)
+        last = max(first + 1, int(audio_seconds * self.words_per_second))
+        words = [SAMPLE_TEXT[i % len(SAMPLE_TEXT)] for i in range(first, last)]
+        return types.StreamingRecognizeResponse(results=[types.StreamingRecognitionResult(
+            alternatives=[types.SpeechRecognitionAlternative(
+                transcript=" ".join(words), confidence=0.9 if is_final else 0.0)],
+            is_final=is_final,
+            stability=0.0 if is_final else 0.8,
+            result_end_time={"seconds": int(audio_seconds), "nanos": int(audio_seconds % 1 * 1e9)},
+        )])
+
+    def _streaming_recognize(self, request_iterator, context):
+        self.streams += 1
+        received = 0
+        sentence_start = 0.0
+        next_interim = self.interim_every
+        for request in request_iterator:
+            if not request.audio_content:
+                continue  # streaming_config
+            received += len(request.audio_content)
+            seconds = received / BYTES_PER_SECOND
+            if seconds >= sentence_start + self.final_every:
+                time.sleep(self.latency)
+                yield self._result(seconds, sentence_start, True)
+                sentence_start = seconds
+                next_interim = seconds + self.interim_every
+            elif seconds >= next_interim:
+                time.sleep(self.latency)
+                yield self._result(seconds, sentence_start, False)
+                next_interim = seconds + self.interim_every
+
+    def start(self, port: int = 0) -> str:
+        handler = grpc.method_handlers_generic_handler("google.cloud.speech.v1.Speech", {
+            "StreamingRecognize": grpc.stream_stream_rpc_method_handler(
+                self._streaming_recognize,
+                request_deserializer=types.StreamingRecognizeRequest.deserialize,
+                response_serializer=types.StreamingRecognizeResponse.serialize,
+            ),
+        })
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=64))
+        self.server.add_generic_rpc_handlers((handler,))
+        bound = self.server.add_insecure_port(f"127.0.0.1:{port}")
+        self.server.start()
+        self.address = f"127.0.0.1:{bound}"
+        return self.address
+
+    def stop(self):
+        if self.server is not None:
+            self.server.stop(grace=None)
+            self.server = None
+
+
+class OpenAIStub:
+    """Chat completions endpoint answering "✓" after `latency` seconds"""
+
+    def __init__(self, latency: float = 0.5, reply: str = "✓"):
+        self.latency = latency
+        self.reply = reply
+        self.requests = 0
+        self.server: Optional[ThreadingHTTPServer] = None
+        self.url: Optional[str] = None
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):  # noqa: N802 (http.server naming)
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.requests += 1
+                time.sleep(stub.latency)
+                body = json.dumps({
+                    "id": f"chatcmpl-stub-{stub.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": "stub",
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": stub.reply}}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 1, "total_tokens": 1},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self, port: int = 0) -> str:
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        return self.url
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+@contextmanager
+def stub_services(speech_latency: float = 0.2, llm_latency: float = 0.5, **speech_options):
+    """Run both stubs and point the backend clients at them for the duration of the block"""
+    speech_stub, llm_stub = SpeechStub(speech_latency, **speech_options), OpenAIStub(llm_latency)
+    overrides = {
+        "ORATOR_SPEECH_ENDPOINT": speech_stub.start(),
+        "OPENAI_BASE_URL": llm_stub.start(),
+        "OPENAI_API_KEY": "stub",
+    }
+    previous = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    try:
+        yield speech_stub, llm_stub
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        speech_stub.stop()
+        llm_stub.stop()
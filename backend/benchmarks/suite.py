@@ -0,0 +1,354 @@
+"""
+End-to-end benchmark and load-test suite for the backend hot paths
+
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --only eeg coach --baseline bench.json
+    python -m benchmarks.suite --only stream_audio --clients 16 --seconds 30 --speech-latency 0.3
+
+Benchmarks:
+    pose          process_frame on recorded (--video) or synthetic frames
+    eeg           process_eeg_data + average_features on synthetic 4-channel Muse data
+    coach         _count_word_repetitions / _build_analysis_prompt on a long script
+    stream_audio  /stream_audio under N concurrent simulated clients, with Google Speech
+                  and OpenAI replaced by local stubs (benchmarks/stubs.py)
+
+Results are one JSON document (stdout or --output) with the commit and machine it ran
+on. --baseline compares against an earlier run: every shared numeric result is listed
+with its ratio to the baseline.
+"""
+
+import argparse
+import base64
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from typing import Dict, List, Optional
+
+import numpy as np
+
+BENCHMARKS = ("pose", "eeg", "coach", "stream_audio")
+
+
+def latency_summary(samples_ms: List[float]) -> dict:
+    if not samples_ms:
+        return {"count": 0}
+    lat = np.asarray(samples_ms, dtype=float)
+    return {
+        "count": int(lat.size),
+        "mean_ms": round(float(lat.mean()), 3),
+        "p50_ms": round(float(np.percentile(lat, 50)), 3),
+        "p90_ms": round(float(np.percentile(lat, 90)), 3),
+        "p99_ms": round(float(np.percentile(lat, 99)), 3),
+        "max_ms": round(float(lat.max()), 3),
+    }
+
+
+def timed(fn, repeats: int) -> dict:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    summary = latency_summary(samples)
+    summary["per_second"] = round(1000 / summary["mean_ms"], 2) if summary["mean_ms"] else None
+    return summary
+
+
+def bench_pose(args) -> dict:
+    """process_frame end to end (inference, tracking, gestures, overlay)"""
+    try:
+        from video import gesture
+    except ImportError as e:
+        return {"skipped": f"pose dependencies missing: {e}"}
+    from .pose_backend import read_frames
+
+    frames = read_frames(args.video, args.frames)
+    if not frames:
+        return {"skipped": f"could not read frames from {args.video}"}
+    for frame in frames[:5]:
+        gesture.process_frame(frame)  # warm-up (allocations, lazy model init)
+
+    samples = []
+    started = time.perf_counter()
+    for frame in frames:
+        t0 = time.perf_counter()
+        gesture.process_frame(frame)
+        samples.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+    return {
+        "source": args.video or "synthetic",
+        "frame_shape": list(frames[0].shape),
+        "fps": round(len(frames) / elapsed, 2),
+        "latency": latency_summary(samples),
+    }
+
+
+def synthetic_eeg(seconds: float, sampling_rate: int = 256, channels: int = 4, seed: int = 0) -> np.ndarray:
+    """Muse-like EEG: theta/alpha/beta sines plus pink-ish noise, in microvolts"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sampling_rate)) / sampling_rate
+    data = np.empty((channels, t.size))
+    for c in range(channels):
+        data[c] = (20 * np.sin(2 * np.pi * 6 * t + c) + 15 * np.sin(2 * np.pi * 10 * t + 2 * c)
+                   + 8 * np.sin(2 * np.pi * 22 * t + 3 * c) + np.cumsum(rng.normal(0, 1, t.size)) * 0.5)
+    return data
+
+
+def bench_eeg(args) -> dict:
+    from eeg.DataPreprocess import process_eeg_data
+    from eeg.FeatureExtraction import average_features
+
+    results = {}
+    for seconds in (5, 60):
+        data = synthetic_eeg(seconds, args.sampling_rate)
+        frame = process_eeg_data(data, args.sampling_rate)
+        columns = frame.to_dict(orient="list")
+        results[f"{seconds}s"] = {
+            "samples": int(data.shape[1]),
+            "process_eeg_data": timed(lambda: process_eeg_data(data, args.sampling_rate), args.repeats),
+            "to_dict": timed(lambda: frame.to_dict(orient="list"), args.repeats),
+            "average_features": timed(lambda: average_features(columns), args.repeats),
+        }
+    return {"sampling_rate": args.sampling_rate, "windows": results}
+
+
+def long_script(words: int, seed: int = 0) -> str:
+    from .stubs import SAMPLE_TEXT
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(SAMPLE_TEXT), words)
+    return " ".join(SAMPLE_TEXT[i] for i in picks)
+
+
+def bench_coach(args) -> dict:
+    from audio.openai import PresentationAnalyzer
+
+    results = {}
+    for words in (500, 5000, 20000):
+        script = long_script(words)
+        analyzer = PresentationAnalyzer(script)
+        transcript = long_script(min(words, 2000), seed=1)
+        repetitions = analyzer._count_word_repetitions(transcript)
+        results[f"{words}_words"] = {
+            "topics": len(analyzer.highlighted_topics),
+            "init": timed(lambda: PresentationAnalyzer(script), max(1, args.repeats // 10)),
+            "count_word_repetitions": timed(lambda: analyzer._count_word_repetitions(transcript), args.repeats),
+            "build_analysis_prompt": timed(
+                lambda: analyzer._build_analysis_prompt(transcript[-500:], transcript, repetitions), args.repeats),
+        }
+    return results
+
+
+class SimulatedClient:
+    """One /stream_audio client sending real-time PCM chunks and timing the results"""
+
+    def __init__(self, url: str, seconds: float, chunk_ms: int):
+        self.url = url
+        self.seconds = seconds
+        self.chunk_bytes = 16000 * 2 * chunk_ms // 1000
+        self.chunk_seconds = chunk_ms / 1000
+        self.sent_at: List[float] = []  # wall time each chunk was sent
+        self.result_latency_ms: List[float] = []
+        self.counts = {"interim": 0, "final": 0, "feedback": 0, "error": 0}
+        self.bytes_received = 0
+        self.connect_ms: Optional[float] = None
+        self.failure: Optional[str] = None
+
+    def _on_message(self, message: str, received: float):
+        self.bytes_received += len(message)
+        data = json.loads(message)
+        if data.get("type") == "ai_feedback":
+            self.counts["feedback"] += 1
+            return
+        if data.get("type") not in (None, "interim"):
+            return  # audio_config / backpressure
+        if data.get("error"):
+            self.counts["error"] += 1
+            return
+        self.counts["final" if data.get("is_final") else "interim"] += 1
+        end_time = data.get("end_time")
+        if end_time:
+            # The chunk that completed the recognized audio
+            index = min(int(round(end_time / self.chunk_seconds)) - 1, len(self.sent_at) - 1)
+            if index >= 0:
+                self.result_latency_ms.append((received - self.sent_at[index]) * 1000)
+
+    def _reader(self, ws):
+        while True:
+            try:
+                message = ws.receive(timeout=1.0)
+            except Exception:
+                return
+            if message is not None:
+                self._on_message(message, time.perf_counter())
+
+    def run(self):
+        import simple_websocket
+        try:
+            started = time.perf_counter()
+            ws = simple_websocket.Client(self.url)
+            self.connect_ms = (time.perf_counter() - started) * 1000
+        except Exception as e:
+            self.failure = str(e)
+            return
+        reader = threading.Thread(target=self._reader, args=(ws,), daemon=True)
+        reader.start()
+        rng = np.random.default_rng(len(self.url))
+        payload = json.dumps({"audio": base64.b64encode(
+            rng.integers(-2000, 2000, self.chunk_bytes // 2, dtype=np.int16).tobytes()).decode()})
+        begin = time.perf_counter()
+        for i in range(int(self.seconds / self.chunk_seconds)):
+            # Real-time pacing against the start time so sleeps don't drift
+            delay = begin + i * self.chunk_seconds - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.sent_at.append(time.perf_counter())
+            ws.send(payload)
+        time.sleep(1.0)  # let trailing results arrive
+        ws.close()
+        reader.join(timeout=2.0)
+
+
+def bench_stream_audio(args) -> dict:
+    import urllib.request
+    from werkzeug.serving import make_server
+    from .stubs import SAMPLE_TEXT, stub_services
+
+    workdir = tempfile.mkdtemp(prefix="orator-bench-")
+    # Must be set before main.py (and the session modules) are imported
+    os.environ.setdefault("ORATOR_RECORDINGS_DIR", os.path.join(workdir, "recordings"))
+    os.environ.setdefault("ORATOR_PROGRESS_DB", os.path.join(workdir, "progress.db"))
+    os.environ["ORATOR_PREWARM"] = ""
+
+    with stub_services(args.speech_latency, args.llm_latency) as (speech_stub, llm_stub):
+        import main
+        import metrics
+        server = make_server("127.0.0.1", 0, main.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"ws://127.0.0.1:{server.server_port}/stream_audio"
+        query = "&delta=1" if args.delta else ""
+        # Coaching only runs against a script, post one per session first
+        script = json.dumps(" ".join(SAMPLE_TEXT)).encode()
+        for i in range(args.clients):
+            urllib.request.urlopen(urllib.request.Request(
+                f"http://127.0.0.1:{server.server_port}/transcript?session=bench-{i}", data=script,
+                headers={"Content-Type": "application/json"})).read()
+
+        clients = [SimulatedClient(f"{url}?session=bench-{i}&user=bench-{i}{query}", args.seconds, args.chunk_ms)
+                   for i in range(args.clients)]
+        threads = [threading.Thread(target=c.run) for c in clients]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        server.shutdown()
+
+    latencies = [ms for c in clients for ms in c.result_latency_ms]
+    totals = {key: sum(c.counts[key] for c in clients) for key in clients[0].counts} if clients else {}
+    return {
+        "clients": args.clients,
+        "audio_seconds_per_client": args.seconds,
+        "chunk_ms": args.chunk_ms,
+        "speech_latency_s": args.speech_latency,
+        "llm_latency_s": args.llm_latency,
+        "failed_clients": sum(c.failure is not None for c in clients),
+        "connect": latency_summary([c.connect_ms for c in clients if c.connect_ms is not None]),
+        "result_latency": latency_summary(latencies),
+        "delta": args.delta,
+        "downstream_bytes_per_client": round(sum(c.bytes_received for c in clients) / max(len(clients), 1)),
+        "results_per_second": round((totals.get("interim", 0) + totals.get("final", 0)) / elapsed, 2),
+        "messages": totals,
+        "speech_streams": speech_stub.streams,
+        "llm_requests": llm_stub.requests,
+        "server_metrics": metrics.snapshot(),
+    }
+
+
+def flatten(tree, prefix="") -> Dict[str, float]:
+    flat = {}
+    if isinstance(tree, dict):
+        for key, value in tree.items():
+            flat.update(flatten(value, f"{prefix}{key}."))
+    elif isinstance(tree, (int, float)) and not isinstance(tree, bool):
+        flat[prefix[:-1]] = tree
+    return flat
+
+
+def compare(results: dict, baseline: dict) -> dict:
+    """current / baseline for every numeric result present in both runs"""
+    current, previous = flatten(results), flatten(baseline.get("results", {}))
+    return {key: {"baseline": previous[key], "current": value,
+                  "ratio": round(value / previous[key], 3) if previous[key] else None}
+            for key, value in current.items() if key in previous}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier results to compare against")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--video", default=None, help="Recorded video for the pose benchmark")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--sampling-rate", type=int, default=256)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0, help="Audio per simulated client")
+    parser.add_argument("--chunk-ms", type=int, default=100)
+    parser.add_argument("--speech-latency", type=float, default=0.2)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--delta", action="store_true", help="Request delta-encoded interim transcripts")
+    args = parser.parse_args()
+
+    runners = {"pose": bench_pose, "eeg": bench_eeg, "coach": bench_coach, "stream_audio": bench_stream_audio}
+    results = {}
+    for name in args.only:
+        print(f"Running {name}...", file=sys.stderr)
+        started = time.perf_counter()
+        # Server / subsystem logging goes to stderr so stdout stays valid JSON
+        with redirect_stdout(sys.stderr):
+            try:
+                results[name] = runners[name](args)
+            except Exception as e:
+                results[name] = {"error": str(e)}
+        results[name]["wall_seconds"] = round(time.perf_counter() - started, 2)
+
+    document = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            document["comparison"] = compare(results, json.load(f))
+
+    text = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -42,13 +42,17 @@ def bandpass_filter(data, lowcut, highcut, fs, order=4):
 
 
 
+#find a scienfic research paper for this # Frequency bands in Hz 
+BANDS = { "Theta": (4, 8), 
+         "Alpha": (7.5, 13), 
+         "Beta": (18, 30), #high beta waves, known as "beta three" are linked to sigificant stress and is range from 18 to 40 
+         } # Channel labels corresponding to the Muse EEG device #TP9 = left ear, AF7 = left forehead, AF8 = right forehead, TP10 = right ear 
+CHANNEL_LABELS = ['TP9', 'AF7', 'AF8', 'TP10'] 
+
+
 def process_eeg_data(eeg_data, sampling_rate): 
-    #find a scienfic research paper for this # Frequency bands in Hz 
-    bands = { "Theta": (4, 8), 
-             "Alpha": (7.5, 13), 
-             "Beta": (18, 30), #high beta waves, known as "beta three" are linked to sigificant stress and is range from 18 to 40 
-             } # Channel labels corresponding to the Muse EEG device #TP9 = left ear, AF7 = left forehead, AF8 = right forehead, TP10 = right ear 
-    channel_labels = ['TP9', 'AF7', 'AF8', 'TP10'] 
+    bands = BANDS
+    channel_labels = CHANNEL_LABELS
     # Initialize a dictionary to store the filtered signals and raw signals 
     data_dict = {}
 
@@ -1,4 +1,5 @@
 import numpy as np
+from .DataPreprocess import BANDS, CHANNEL_LABELS, bandpass_filter
 
 #function to calculate the average power (= average of the squared amplitude) of the filtered singal
 def calculate_power(filtered_signal):
@@ -39,3 +40,29 @@ def average_features(filtered_data):
 
     return averaged_features
 
+
+def band_power_ratios(eeg_windows, sampling_rate, skip=0):
+    """
+    Alpha/beta and theta/beta power ratios of many EEG windows at once
+
+    Same features as average_features(process_eeg_data(...)), but every band is filtered
+    in one lfilter call over all windows and channels instead of once per channel.
+
+    Args:
+        eeg_windows: array of shape (windows, channels, samples), Muse channel order
+        sampling_rate: Sampling rate shared by all windows
+        skip: Leading samples filtered but left out of the power (filter warm-up)
+
+    Returns:
+        List of {"alpha_beta": ..., "theta_beta": ...}, one per window
+    """
+    windows = np.asarray(eeg_windows, dtype=np.float64)[:, :len(CHANNEL_LABELS), :]
+    powers = {}
+    for band, (low, high) in BANDS.items():
+        filtered = bandpass_filter(windows, low, high, sampling_rate)  # filters along the last axis
+        powers[band] = np.mean(filtered[:, :, skip:] ** 2, axis=(1, 2))
+    return [
+        {"alpha_beta": float(powers["Alpha"][i] / powers["Beta"][i]),
+         "theta_beta": float(powers["Theta"][i] / powers["Beta"][i])}
+        for i in range(windows.shape[0])
+    ]
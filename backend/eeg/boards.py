@@ -0,0 +1,371 @@
+"""
+Several BrainFlow headsets at once, one per coaching session.
+
+Each connected board streams continuously into its own ring buffer, filled by its own
+acquisition thread, so a stress reading is just "the last 5 s" instead of a blocking
+start/sleep/stop per request. Feature computation for all boards goes through one
+FeatureBatcher: requests that arrive within a few milliseconds of each other are stacked
+and filtered together on a shared worker pool.
+
+Boards are identified by a device id chosen by the client (e.g. the Muse's serial
+number) and bound to a session id. The synthetic board can be opened any number of
+times (each gets its own other_info), which is what benchmarks/eeg_boards.py uses to
+load-test many simultaneous streams.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+from brainflow.board_shim import BoardIds, BoardShim, BrainFlowInputParams
+
+import metrics
+from governor import governor
+from .FeatureExtraction import band_power_ratios
+
+DEFAULT_BOARD_ID = BoardIds.MUSE_S_BOARD.value  # 39
+DEFAULT_DEVICE = "muse"
+BUFFER_SECONDS = float(os.environ.get("ORATOR_EEG_BUFFER_SECONDS", "120"))
+POLL_SECONDS = 0.1
+# Failing reads back off exponentially up to MAX_BACKOFF; after MAX_FAILURES in a row the
+# board is given up (info() shows the error, the next connect() reopens it)
+MAX_BACKOFF = 5.0
+MAX_FAILURES = 20
+FEATURE_WORKERS = int(os.environ.get("ORATOR_EEG_WORKERS", "2"))
+BATCH_WINDOW = 0.01  # seconds to wait for more requests before filtering a batch
+
+eeg_batch_size = metrics.histogram("orator_eeg_batch_size", "EEG windows filtered per batch",
+                                   buckets=metrics.DEPTH_BUCKETS)
+eeg_samples_dropped = metrics.counter("orator_eeg_samples_dropped",
+                                      "EEG samples discarded because one poll exceeded the ring buffer")
+
+
+def resolve_board_id(board) -> int:
+    """39, "39", "muse_s", "MUSE_S_BOARD" or "synthetic" -> BrainFlow board id"""
+    if board is None or board == "":
+        return DEFAULT_BOARD_ID
+    if isinstance(board, int) or str(board).lstrip("-").isdigit():
+        return int(board)
+    name = str(board).upper()
+    for candidate in (name, f"{name}_BOARD"):
+        if candidate in BoardIds.__members__:
+            return BoardIds[candidate].value
+    raise ValueError(f"Unknown BrainFlow board '{board}'")
+
+
+class FeatureBatcher:
+    """
+    Shared pool computing band power ratios for all boards
+
+    Args:
+        workers: Worker threads (scipy's lfilter and numpy release the GIL)
+    """
+
+    def __init__(self, workers: int = FEATURE_WORKERS):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="eeg-features")
+        self.pending: List[tuple] = []
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self._dispatch, daemon=True)
+        self.thread.start()
+
+    def submit(self, window: np.ndarray, sampling_rate: int, skip: int = 0) -> Future:
+        """Ratios of one (channels, samples) window, resolved by a batch"""
+        future = Future()
+        with self.cond:
+            self.pending.append((window, (sampling_rate, skip), future))
+            self.cond.notify()
+        return future
+
+    def ratios(self, window: np.ndarray, sampling_rate: int, skip: int = 0,
+               timeout: float = 10.0) -> Dict[str, float]:
+        return self.submit(window, sampling_rate, skip).result(timeout=timeout)
+
+    def _dispatch(self):
+        while True:
+            with self.cond:
+                while not self.pending:
+                    self.cond.wait()
+            time.sleep(BATCH_WINDOW)  # let concurrent requests join the batch
+            with self.cond:
+                batch, self.pending = self.pending, []
+            # Only windows of the same shape, rate and warm-up can be stacked
+            groups: Dict[tuple, list] = {}
+            for item in batch:
+                groups.setdefault((item[0].shape, item[1]), []).append(item)
+            for (_, options), items in groups.items():
+                self.pool.submit(self._compute, items, *options)
+
+    @staticmethod
+    def _compute(items, sampling_rate, skip):
+        try:
+            with metrics.eeg_processing_ms.time(), governor.cpu("eeg"):
+                results = band_power_ratios(np.stack([window for window, _, _ in items]), sampling_rate, skip)
+            eeg_batch_size.observe(len(items))
+            for (_, _, future), ratios in zip(items, results):
+                future.set_result(ratios)
+        except Exception as e:
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+
+
+class ManagedBoard:
+    """
+    One streaming BrainFlow session with its acquisition thread and EEG ring buffer
+
+    Args:
+        device_id: Client-chosen device identifier
+        session_id: Coaching session the board is bound to
+        board_id: BrainFlow board id
+        params: BrainFlowInputParams (serial port, MAC address, ...)
+        buffer_seconds: Ring buffer length
+    """
+
+    def __init__(self, device_id: str, session_id: str, board_id: int, params: BrainFlowInputParams,
+                 buffer_seconds: float = BUFFER_SECONDS):
+        self.device_id = device_id
+        self.session_id = session_id
+        self.board_id = board_id
+        self.board = BoardShim(board_id, params)
+        self.sampling_rate = BoardShim.get_sampling_rate(board_id)
+        self.eeg_channels = BoardShim.get_eeg_channels(board_id)
+        self.eeg_names = BoardShim.get_eeg_names(board_id)
+        self.capacity = int(buffer_seconds * self.sampling_rate)
+        self.ring = np.zeros((len(self.eeg_channels), self.capacity), dtype=np.float64)
+        self.total = 0  # samples written since connect
+        self.cond = threading.Condition()
+        self.baseline: Optional[Dict[str, float]] = None
+        self.calibration = None  # latest eeg.calibration.Calibration
+        self.error: Optional[str] = None
+        self.closed = False
+
+        self.board.prepare_session()
+        try:
+            self.board.start_stream()
+        except Exception:
+            self.board.release_session()
+            raise
+        self.thread = threading.Thread(target=self._acquire, name=f"eeg-{device_id}", daemon=True)
+        self.thread.start()
+
+    def info(self) -> dict:
+        return {
+            "device_id": self.device_id,
+            "session_id": self.session_id,
+            "board_id": self.board_id,
+            "sampling_rate": self.sampling_rate,
+            "eeg_channels": self.eeg_names,
+            "buffered_seconds": round(min(self.total, self.capacity) / self.sampling_rate, 1),
+            "error": self.error,
+        }
+
+    def _acquire(self):
+        failures = 0
+        while not self.closed:
+            time.sleep(min(POLL_SECONDS * 2 ** failures, MAX_BACKOFF))
+            try:
+                data = self.board.get_board_data()
+            except Exception as e:
+                failures += 1
+                if failures == 1:
+                    print(f"EEG acquisition error ({self.device_id}): {e}")
+                if failures >= MAX_FAILURES:
+                    self.error = str(e)
+                    print(f"EEG board {self.device_id} stopped after {failures} failed reads: {e}")
+                    with self.cond:
+                        self.cond.notify_all()  # readers waiting for samples give up
+                    return
+                continue
+            if failures:
+                print(f"EEG acquisition of {self.device_id} recovered after {failures} failed reads")
+                failures = 0
+            if data.shape[1]:
+                self._append(data[self.eeg_channels])
+
+    def _append(self, samples: np.ndarray) -> None:
+        n = samples.shape[1]
+        if n > self.capacity:
+            eeg_samples_dropped.inc(n - self.capacity)
+            samples, n = samples[:, -self.capacity:], self.capacity
+        with self.cond:
+            start = self.total % self.capacity
+            first = min(n, self.capacity - start)
+            self.ring[:, start:start + first] = samples[:, :first]
+            self.ring[:, :n - first] = samples[:, first:]
+            self.total += n
+            self.cond.notify_all()
+
+    def window(self, seconds: float) -> np.ndarray:
+        """Latest `seconds` of EEG (channels, samples), or less if not that much arrived yet"""
+        with self.cond:
+            n = min(int(seconds * self.sampling_rate), self.total, self.capacity)
+            end = self.total % self.capacity
+            if n <= end:
+                return self.ring[:, end - n:end].copy()
+            return np.concatenate([self.ring[:, self.capacity - (n - end):], self.ring[:, :end]], axis=1)
+
+    def collect(self, seconds: float, fresh: bool = False, timeout: Optional[float] = None) -> np.ndarray:
+        """
+        Wait until `seconds` of EEG are buffered and return them
+
+        Args:
+            seconds: Window length
+            fresh: Only count samples arriving after this call (e.g. a calm baseline)
+            timeout: Give up after this many seconds (default: window length + 10 s)
+        """
+        n = int(seconds * self.sampling_rate)
+        deadline = time.monotonic() + (timeout if timeout is not None else seconds + 10.0)
+        with self.cond:
+            target = (self.total if fresh else 0) + n
+            while self.total < target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.closed or self.error:
+                    raise TimeoutError(f"Only {max(0, n - (target - self.total))} of {n} EEG samples "
+                                       f"arrived from {self.device_id}")
+                self.cond.wait(remaining)
+        return self.window(seconds)
+
+    def read(self, start: int, n: int, timeout: float = 10.0) -> np.ndarray:
+        """
+        Samples [start, start + n) counted since connect, waiting for them to arrive
+
+        Raises:
+            TimeoutError: They didn't arrive in time
+            ValueError: They were already overwritten in the ring buffer
+        """
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while self.total < start + n:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.closed or self.error:
+                    raise TimeoutError(f"EEG samples from {self.device_id} stopped arriving")
+                self.cond.wait(remaining)
+            if start < self.total - self.capacity:
+                raise ValueError("EEG samples were overwritten before being read")
+            index = np.arange(start, start + n) % self.capacity
+            return self.ring[:, index]
+
+    def close(self) -> None:
+        self.closed = True
+        with self.cond:
+            self.cond.notify_all()
+        self.thread.join(timeout=1.0)
+        for step in (self.board.stop_stream, self.board.release_session):
+            try:
+                step()
+            except Exception:
+                pass
+
+
+class BoardManager:
+    """Connected boards by device id, and which device each session uses"""
+
+    def __init__(self, workers: int = FEATURE_WORKERS):
+        self.boards: Dict[str, ManagedBoard] = {}
+        self.sessions: Dict[str, str] = {}  # session_id -> device_id
+        # Devices being opened (set once done): opening takes seconds, so it runs outside
+        # the lock and later connects of the same device wait for it
+        self.connecting: Dict[str, threading.Event] = {}
+        self.lock = threading.Lock()
+        self.batcher = FeatureBatcher(workers)
+
+    def connect(self, device_id: str = DEFAULT_DEVICE, session_id: str = "default", board=None,
+                serial_port: str = "", mac_address: str = "", serial_number: str = "",
+                buffer_seconds: float = BUFFER_SECONDS) -> ManagedBoard:
+        """
+        Open (or reuse) a board and bind it to a session
+
+        Raises:
+            BrainFlowError / ValueError: The board can't be opened
+        """
+        board_id = resolve_board_id(board)
+        while True:
+            stale = None
+            with self.lock:
+                managed = self.boards.get(device_id)
+                if managed is not None and (managed.board_id != board_id or managed.closed or managed.error):
+                    stale, managed = self.boards.pop(device_id), None
+                if managed is not None:
+                    replaced = self._bind(managed, session_id)
+                    break
+                opening = self.connecting.get(device_id)
+                if opening is None:
+                    opening = self.connecting[device_id] = threading.Event()
+                    break
+            if stale is not None:
+                stale.close()
+            opening.wait()  # another request is opening this device, then reuse it
+        if stale is not None:
+            stale.close()
+
+        if managed is None:
+            try:
+                params = BrainFlowInputParams()
+                params.serial_port = serial_port
+                params.mac_address = mac_address
+                params.serial_number = serial_number
+                # BrainFlow refuses two sessions with identical params, so make each device distinct
+                params.other_info = device_id
+                managed = ManagedBoard(device_id, session_id, board_id, params, buffer_seconds)
+                with self.lock:
+                    self.boards[device_id] = managed
+                    replaced = self._bind(managed, session_id)
+            finally:
+                with self.lock:
+                    self.connecting.pop(device_id, None)
+                opening.set()
+            print(f"EEG board {device_id} ({board_id}) connected for session {session_id}")
+        if replaced is not None:
+            replaced.close()
+        return managed
+
+    def _bind(self, managed: ManagedBoard, session_id: str) -> Optional[ManagedBoard]:
+        """Bind a board to a session (under self.lock), returns the session's previous board to close"""
+        # A device belongs to one session at a time
+        for session, device in list(self.sessions.items()):
+            if device == managed.device_id:
+                del self.sessions[session]
+        replaced = None
+        previous = self.sessions.get(session_id)
+        if previous and previous != managed.device_id and previous in self.boards:
+            replaced = self.boards.pop(previous)
+        managed.session_id = session_id
+        self.sessions[session_id] = managed.device_id
+        return replaced
+
+    def for_session(self, session_id: str) -> Optional[ManagedBoard]:
+        with self.lock:
+            device_id = self.sessions.get(session_id)
+            return self.boards.get(device_id) if device_id else None
+
+    def disconnect(self, device_id: str) -> bool:
+        with self.lock:
+            managed = self.boards.pop(device_id, None)
+            for session, device in list(self.sessions.items()):
+                if device == device_id:
+                    del self.sessions[session]
+        if managed is None:
+            return False
+        managed.close()
+        return True
+
+    def ratios(self, managed: ManagedBoard, seconds: float, fresh: bool = False) -> Dict[str, float]:
+        """Band power ratios of a board's latest window, computed in a shared batch"""
+        window = managed.collect(seconds, fresh=fresh)
+        return self.batcher.ratios(window, managed.sampling_rate)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {"boards": [b.info() for b in self.boards.values()], "sessions": dict(self.sessions)}
+
+    def close(self) -> None:
+        with self.lock:
+            boards, self.boards, self.sessions = list(self.boards.values()), {}, {}
+        for managed in boards:
+            managed.close()
+
+
+manager = BoardManager()
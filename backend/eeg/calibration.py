@@ -0,0 +1,191 @@
+"""
+Incremental calm-baseline calibration.
+
+Instead of one fixed 60 s recording, the baseline is estimated from consecutive 2 s
+epochs as they stream in. Each epoch's alpha/beta and theta/beta ratios update a running
+mean and variance (in log space, the ratios are skewed), and calibration stops as soon as
+the 95% confidence interval of both is within ORATOR_EEG_BASELINE_CI (relative,
+default 5%) or MAX_SECONDS is reached. With a steady signal this takes a few epochs.
+
+Finished baselines of a named user are stored per user and device (session.progress);
+without a user id the baseline is calibrated for the session only. A returning user
+is only verified: if the first VERIFY_EPOCHS epochs agree with the stored baseline it is
+reused right away, otherwise calibration continues from scratch. calibrate="skip" reuses a
+stored baseline without recording at all.
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from scipy.stats import t as student_t
+
+from session.progress import get_progress_store
+from .boards import ManagedBoard, manager
+
+EPOCH_SECONDS = 2.0
+WARMUP_SECONDS = 1.0  # filtered ahead of each epoch but not counted (IIR settling)
+MIN_EPOCHS = 3
+MAX_SECONDS = 60.0
+TARGET_CI = float(os.environ.get("ORATOR_EEG_BASELINE_CI", "0.05"))
+VERIFY_EPOCHS = 2
+REUSE_TOLERANCE = 0.2  # max |log(current / stored)| for a stored baseline to still count
+REUSE_MAX_AGE = 30 * 24 * 3600.0
+RATIOS = ("alpha_beta", "theta_beta")
+
+
+class Calibration:
+    """
+    One running baseline calibration of a board
+
+    Args:
+        board: Streaming board
+        prior: Stored baseline of this user and device to verify (or None)
+        target_ci: Relative 95% CI half-width to stop at
+        max_seconds: Stop after this much EEG even if not converged
+        calibration_id: Client-chosen id echoed in progress(), so pollers can tell this run
+            from the board's previous one
+    """
+
+    def __init__(self, board: ManagedBoard, prior: Optional[Dict] = None, target_ci: float = TARGET_CI,
+                 max_seconds: float = MAX_SECONDS, calibration_id: Optional[str] = None):
+        self.board = board
+        self.id = calibration_id
+        self.prior = prior
+        self.target_ci = target_ci
+        self.max_epochs = max(MIN_EPOCHS, int(max_seconds / EPOCH_SECONDS))
+        self.state = "idle"
+        self.epochs = 0
+        self.mean = dict.fromkeys(RATIOS, 0.0)
+        self.m2 = dict.fromkeys(RATIOS, 0.0)
+        self.started = None
+        self.baseline: Optional[Dict[str, float]] = None
+        self.error: Optional[str] = None
+        self.lock = threading.Lock()
+
+    def _update(self, ratios: Dict[str, float]) -> None:
+        # Welford's running mean / variance of the log ratios
+        with self.lock:
+            self.epochs += 1
+            for name in RATIOS:
+                value = math.log(ratios[name])
+                delta = value - self.mean[name]
+                self.mean[name] += delta / self.epochs
+                self.m2[name] += delta * (value - self.mean[name])
+
+    def ci(self) -> Optional[float]:
+        """Widest relative 95% CI half-width of the two ratios (None before 2 epochs)"""
+        if self.epochs < 2:
+            return None
+        t = student_t.ppf(0.975, self.epochs - 1)
+        widest = max(math.sqrt(self.m2[name] / (self.epochs - 1) / self.epochs) for name in RATIOS)
+        return math.expm1(t * widest)
+
+    def estimate(self) -> Dict[str, float]:
+        return {name: math.exp(self.mean[name]) for name in RATIOS}
+
+    def _matches_prior(self) -> bool:
+        current = self.estimate()
+        return all(abs(math.log(current[name] / self.prior[name])) <= REUSE_TOLERANCE for name in RATIOS)
+
+    def run(self) -> Dict[str, float]:
+        """Record epochs until converged and return the baseline ratios"""
+        self.state = "running"
+        self.started = time.monotonic()
+        rate = self.board.sampling_rate
+        epoch, warmup = int(EPOCH_SECONDS * rate), int(WARMUP_SECONDS * rate)
+        # Calm data starts now; the warm-up of the first epoch may reach back before that
+        start = max(self.board.total, warmup)
+        try:
+            while self.epochs < self.max_epochs:
+                begin = start + self.epochs * epoch
+                window = self.board.read(begin - warmup, warmup + epoch, timeout=EPOCH_SECONDS + 10.0)
+                self._update(manager.batcher.ratios(window, rate, skip=warmup))
+
+                if self.prior is not None and self.epochs == VERIFY_EPOCHS:
+                    if self._matches_prior():
+                        # Same person, same headset, similar state: keep the stored baseline
+                        self.baseline = {name: self.prior[name] for name in RATIOS}
+                        self.state = "reused"
+                        return self.baseline
+                    print(f"Stored EEG baseline of {self.board.device_id} no longer matches, recalibrating")
+                    self.prior = None
+                ci = self.ci()
+                if self.epochs >= MIN_EPOCHS and ci is not None and ci <= self.target_ci:
+                    self.state = "converged"
+                    break
+            else:
+                self.state = "max_duration"
+        except Exception as e:
+            self.state, self.error = "failed", str(e)
+            raise
+        self.baseline = self.estimate()
+        return self.baseline
+
+    def progress(self) -> dict:
+        """Snapshot for GET /eeg/baseline"""
+        ci = self.ci()
+        done = self.state in ("converged", "max_duration", "reused")
+        if done:
+            percent = 100
+        else:
+            needed = VERIFY_EPOCHS if self.prior is not None else MIN_EPOCHS
+            by_epochs = 60 * min(1.0, self.epochs / needed)
+            by_ci = 40 * min(1.0, self.target_ci / ci) if ci else 0.0
+            by_time = 100 * self.epochs / self.max_epochs
+            percent = int(min(99, max(by_epochs + by_ci, by_time)))
+        return {
+            "id": self.id,
+            "state": self.state,
+            "percent": percent,
+            "epochs": self.epochs,
+            "seconds": round(self.epochs * EPOCH_SECONDS, 1),
+            "estimate": self.estimate() if self.epochs else None,
+            "ci": None if ci is None else round(ci, 4),
+            "target_ci": self.target_ci,
+            "verifying_stored": self.prior is not None,
+            "error": self.error,
+        }
+
+
+def stored_baseline(user_id: str, device_id: str) -> Optional[Dict]:
+    """A user's stored baseline on a device, if recent enough to reuse"""
+    stored = get_progress_store().baseline(user_id, device_id)
+    if stored is None or time.time() - stored["recorded_at"] > REUSE_MAX_AGE:
+        return None
+    return stored
+
+
+def calibrate(board: ManagedBoard, user_id: Optional[str], calibrate: str = "auto",
+              max_seconds: float = MAX_SECONDS, calibration_id: Optional[str] = None) -> Dict[str, float]:
+    """
+    Calibrate (or reuse) the calm baseline of a user on a board
+
+    Args:
+        board: Streaming board; its .calibration shows progress while this runs
+        user_id: Baselines are stored per user and device; None calibrates without storing
+            or reusing one
+        calibrate: "auto" (verify a stored baseline, else calibrate), "skip" (reuse a stored
+            baseline without recording, else calibrate) or "full" (ignore stored baselines)
+        max_seconds: Upper bound on recording time
+        calibration_id: Echoed in the progress snapshots of this run
+
+    Returns:
+        Baseline ratios {"alpha_beta": ..., "theta_beta": ...}
+    """
+    named = user_id is not None
+    prior = stored_baseline(user_id, board.device_id) if named and calibrate != "full" else None
+    calibration = Calibration(board, prior=prior, max_seconds=max_seconds, calibration_id=calibration_id)
+    board.calibration = calibration
+    if prior is not None and calibrate == "skip":
+        calibration.state = "reused"
+        calibration.baseline = {name: prior[name] for name in RATIOS}
+        return calibration.baseline
+
+    baseline = calibration.run()
+    if named and calibration.state != "reused":
+        get_progress_store().save_baseline(user_id, board.device_id, baseline, time.time(),
+                                           calibration.epochs, calibration.ci())
+    return baseline
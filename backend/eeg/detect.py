@@ -1,50 +1,26 @@
-from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds
-import numpy as np
-from .DataPreprocess import read_data, filter_EEG_from_data, process_eeg_data
-from .FeatureExtraction import extract_features, average_features
-
-params = BrainFlowInputParams()
-params.serial_port = '/dev/tty' #Change this depending on your device and OS
-
-# module-level singleton to reuse existing board/session
-_board_instance = None
-BOARD_ID = 39
-
-def connectMuse():
-    global _board_instance
+from brainflow.board_shim import BoardIds
+import time
+import metrics
+from . import calibration
+from .boards import DEFAULT_BOARD_ID, DEFAULT_DEVICE, ManagedBoard, manager
+from .calibration import MAX_SECONDS
+
+SERIAL_PORT = '/dev/tty' #Change this depending on your device and OS
+BOARD_ID = DEFAULT_BOARD_ID
+
+def connectMuse(device_id=DEFAULT_DEVICE, session_id="default", board=None, serial_port=SERIAL_PORT,
+                mac_address="", serial_number=""):
+    """
+    Open (or reuse) a streaming board for a session, see eeg/boards.py
+
+    Returns:
+        ManagedBoard, or None if the device can't be opened
+    """
     try:
-        # reuse existing, healthy board if present
-        if _board_instance is not None:
-            try:
-                # quick health check: try to get sampling rate (will raise if session invalid)
-                _board_instance.get_sampling_rate(BOARD_ID)
-                print("Reusing existing board session.")
-                return _board_instance
-            except Exception:
-                # existing instance is invalid/closed — try to release and recreate
-                try:
-                    _board_instance.release_session()
-                except Exception:
-                    pass
-                _board_instance = None
-
-        # create and prepare new session
-        board = BoardShim(BOARD_ID, params)
-        board.prepare_session()
-        _board_instance = board
-        print("Prepared new board session.")
-        return board
-
+        return manager.connect(device_id, session_id, board=board if board is not None else BOARD_ID,
+                               serial_port=serial_port, mac_address=mac_address, serial_number=serial_number)
     except Exception as e:
-        # If BrainFlow reports "already exists" in logs but raised, try returning the singleton
         print("connectMuse error:", e)
-        if _board_instance is not None:
-            try:
-                _board_instance.get_sampling_rate(BOARD_ID)
-                print("Returning existing board after error.")
-                return _board_instance
-            except Exception:
-                pass
         return None
     
 
@@ -64,53 +40,39 @@ def detect_stress(current_ratio, baseline_ratios):
         
     return False
 
-def record_calm_state(board, board_id, sampling_rate):
-    print("Recording calm baseline for 60 seconds...")
-    calm_data = read_data(board, 60)                         # your existing read_data()
-    eeg_calm = filter_EEG_from_data(board, board_id, calm_data)
-    calm_df = process_eeg_data(eeg_calm, sampling_rate)
-
-    calm_features = average_features(calm_df.to_dict(orient='list'))
-
-    baseline_ratios = {
-        "alpha_beta": calm_features["Alpha"]["avg_power"] / calm_features["Beta"]["avg_power"],
-        "theta_beta": calm_features["Theta"]["avg_power"] / calm_features["Beta"]["avg_power"]
-    }
-    print("Baseline:", baseline_ratios)
+def record_calm_state(board: ManagedBoard, user_id=None, calibrate="auto", seconds=MAX_SECONDS,
+                      calibration_id=None):
+    print(f"Calibrating calm baseline of {user_id or 'an unnamed user'} on {board.device_id} "
+          f"(up to {seconds:.0f} seconds)...")
+    # Fresh samples only: the baseline starts when the user is told to relax
+    baseline_ratios = calibration.calibrate(board, user_id, calibrate=calibrate, max_seconds=seconds,
+                                            calibration_id=calibration_id)
+    print("Baseline:", baseline_ratios, board.calibration.progress()["state"])
     return baseline_ratios
 
 
-def record_current_state(board, board_id, sampling_rate):
-    current_data = read_data(board, 5)
-    eeg_current = filter_EEG_from_data(board, board_id, current_data)
-    curr_df = process_eeg_data(eeg_current, sampling_rate)
-    curr_features = average_features(curr_df.to_dict(orient='list'))
-
-    curr_ratios = {
-    "alpha_beta": curr_features["Alpha"]["avg_power"] / curr_features["Beta"]["avg_power"],
-    "theta_beta": curr_features["Theta"]["avg_power"] / curr_features["Beta"]["avg_power"]
-    }
-
-    print(curr_ratios)
+def record_current_state(board: ManagedBoard, seconds=5):
+    # The board streams continuously, so this is the latest window (no 5 s wait)
+    curr_ratios = manager.ratios(board, seconds)
+    metrics.debug("eeg", "%s", curr_ratios)
     return curr_ratios
 
 
 def main():
     #Prepares the board for reading data
+    board = connectMuse()
+    if board is None:
+        #  If the device cannot be found or is being used elsewhere, uses a synthetic board instead
+        print("Device could not be found or is being used by another program, using a synthetic board.")
+        board = connectMuse(device_id="synthetic", board=BoardIds.SYNTHETIC_BOARD.value)
     try:
-        board_id = 39 #Change this depending on your device
-        board = BoardShim(board_id, params)
-        board.prepare_session()
-        print("Successfully prepared physical board.")
-
-        sampling_rate = board.get_sampling_rate(board_id)
-
-        baseline_ratios = record_calm_state(board, board_id, sampling_rate)
+        baseline_ratios = record_calm_state(board)
 
         print("baseline_ratios", baseline_ratios)
 
         while(True):
-            current_ratio = record_current_state(board, board_id, sampling_rate)
+            time.sleep(5)
+            current_ratio = record_current_state(board)
             
             stress = detect_stress(current_ratio, baseline_ratios)
 
@@ -121,11 +83,8 @@ def main():
 
     except Exception as e:
         print(e)
-    #  If the device cannot be found or is being used elsewhere, creates a synthetic board instead
-        print("Device could not be found or is being used by another program, creating synthetic board.")
-        board_id = BoardIds.SYNTHETIC_BOARD
-        board = BoardShim(board_id, params)
-        board.prepare_session()
+    finally:
+        manager.close()
 
 
 if __name__ == "__main__":
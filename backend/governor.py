@@ -0,0 +1,374 @@
+"""
+Admission control and graceful degradation under CPU pressure.
+
+When the machine is overloaded every subsystem used to slow down at once. The governor
+instead watches, once per TICK_SECONDS window:
+  - machine CPU use (/proc/stat, which includes the pose worker processes)
+  - CPU time charged by each subsystem (`with governor.cpu("video"): ...`)
+  - latency SLOs on the hot-path histograms (windowed quantiles, see SLOS)
+and walks one step at a time along a fixed degradation ladder that protects audio
+transcription first:
+
+  level 0  normal
+  level 1  video inference FPS halved (uploaded frames and the server camera)
+  level 2  streamed JPEGs at half width and capped quality
+  level 3  coaching LLM calls spaced 3x further apart with a third of the budget
+  level 4  shed: no new sessions until pressure drops
+
+Audio itself is never throttled; a missed audio SLO escalates right away instead of
+after PRESSURE_TICKS windows. The per-subsystem CPU time picks the rungs: levels 1 and 2
+are skipped while video inference or JPEG encoding used no CPU in the window (an
+audio-only load gains nothing from them). Levels drop again after RELIEF_TICKS calm
+windows (below LOW_CPU); shedding already ends after RELIEF_TICKS windows below HIGH_CPU
+without SLO misses, so moderate load never keeps new sessions out. New sessions are
+refused at level 4 or once ORATOR_MAX_SESSIONS are open, and every admitted session is
+told when its level changes.
+
+Governor.tick accepts a synthetic Sample, so the policy can be exercised without real
+load (benchmarks/governor.py).
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import metrics
+
+TICK_SECONDS = float(os.environ.get("ORATOR_GOVERNOR_TICK", "1.0"))
+MAX_SESSIONS = int(os.environ.get("ORATOR_MAX_SESSIONS", "0") or 0)  # 0 = only CPU pressure limits
+HIGH_CPU = float(os.environ.get("ORATOR_GOVERNOR_HIGH_CPU", "0.85"))
+LOW_CPU = float(os.environ.get("ORATOR_GOVERNOR_LOW_CPU", "0.60"))
+PRESSURE_TICKS = 2   # overloaded windows before degrading one more level
+RELIEF_TICKS = 5     # calm windows before recovering one level
+IDLE_CORES = 0.001   # a subsystem below this did no work in the window
+MIN_OBSERVATIONS = 5  # an SLO is only judged on windows with this many samples
+RETRY_AFTER = 30     # seconds, suggested to rejected clients
+
+sessions_rejected = metrics.counter("orator_sessions_rejected", "Sessions refused by admission control")
+level_changes = metrics.counter("orator_degradation_level_changes", "Degradation level transitions")
+
+
+class Slo(NamedTuple):
+    histogram: str
+    quantile: float
+    limit_ms: float
+
+
+# Only CPU-bound stages: the LLM round trip is network time and can't be fixed by shedding
+SLOS = {
+    "audio": Slo("orator_audio_queue_latency_ms", 0.9, 500),
+    "audio_decode": Slo("orator_audio_decode_ms", 0.9, 50),
+    "video": Slo("orator_pose_frame_ms", 0.9, 200),
+    "jpeg": Slo("orator_jpeg_encode_ms", 0.9, 20),
+}
+PROTECTED = ("audio", "audio_decode")
+# Rungs that only relieve one subsystem (charged via governor.cpu), skipped while it is idle
+RELIEVES = {1: "video", 2: "jpeg"}
+
+
+class Policy(NamedTuple):
+    """What each subsystem should do at one degradation level"""
+    level: int
+    name: str
+    video_fps_scale: float
+    jpeg_width_scale: float
+    jpeg_quality_cap: int
+    analysis_interval_scale: float
+    admitting: bool
+
+    def describe(self) -> dict:
+        return self._asdict()
+
+
+LEVELS = (
+    Policy(0, "normal", 1.0, 1.0, 100, 1.0, True),
+    Policy(1, "video_fps", 0.5, 1.0, 100, 1.0, True),
+    Policy(2, "jpeg_resolution", 0.5, 0.5, 60, 1.0, True),
+    Policy(3, "analysis_rate", 0.5, 0.5, 60, 3.0, True),
+    Policy(4, "shed", 0.5, 0.5, 60, 3.0, False),
+)
+
+
+class Sample(NamedTuple):
+    """One observation window"""
+    seconds: float
+    cpu: float                            # machine CPU use, 0-1
+    latency: Dict[str, Optional[float]]   # SLO name -> windowed quantile (None = too few samples)
+    subsystem_cpu: Dict[str, float] = {}  # subsystem -> cores used
+
+
+class CapacityError(RuntimeError):
+    """A new session was refused, .status is the message for the client"""
+
+    def __init__(self, reason: str, policy: Policy):
+        super().__init__(reason)
+        self.status = {"type": "rejected", "status": 503, "reason": reason,
+                       "level": policy.level, "retry_after": RETRY_AFTER}
+
+
+class Admission:
+    """One admitted connection, close() when it ends"""
+
+    def __init__(self, governor: "Governor", session_id: str, kind: str,
+                 on_level: Optional[Callable[[dict], None]]):
+        self.governor = governor
+        self.session_id = session_id
+        self.kind = kind
+        self.on_level = on_level
+        self.closed = False
+
+    def notify(self, policy: Policy) -> None:
+        if self.on_level is None or self.closed:
+            return
+        try:
+            self.on_level({"type": "degradation", **policy.describe()})
+        except Exception as e:
+            print(f"Error sending degradation level to {self.session_id}: {e}")
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.governor._release(self)
+
+
+def _machine_cpu_times():
+    """(total, idle) jiffies of all CPUs, or None where /proc/stat doesn't exist"""
+    try:
+        with open("/proc/stat") as f:
+            fields = [float(v) for v in f.readline().split()[1:]]
+        return sum(fields), fields[3] + (fields[4] if len(fields) > 4 else 0.0)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _window_quantile(histogram: metrics.Histogram, previous: List[int], q: float):
+    """(quantile of the observations since `previous`, current bucket counts)"""
+    counts = histogram.bucket_counts()
+    delta = [now - before for now, before in zip(counts, previous or [0] * len(counts))]
+    total = sum(delta)
+    if total < MIN_OBSERVATIONS:
+        return None, counts
+    seen = 0
+    for bound, n in zip(histogram.buckets + (float("inf"),), delta):
+        seen += n
+        if seen >= q * total:
+            return min(bound, histogram.max), counts
+    return histogram.max, counts
+
+
+class Governor:
+    """
+    Degradation level and session admission of this server process
+
+    Args:
+        max_sessions: Distinct session ids admitted at once (0 = unlimited)
+        tick_seconds: Observation window of the background thread
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, tick_seconds: float = TICK_SECONDS):
+        self.max_sessions = max_sessions
+        self.tick_seconds = tick_seconds
+        self.level = 0
+        self.lock = threading.Lock()
+        self.admissions: List[Admission] = []
+        self.cpu_seconds: Dict[str, float] = {}
+        self.overloaded_ticks = 0
+        self.calm_ticks = 0
+        self.last_sample: Optional[Sample] = None
+        self.last_violations: List[str] = []
+        self.stats = {"admitted": 0, "rejected": 0, "level_changes": 0, "ticks": 0}
+        self._previous_counts: Dict[str, List[int]] = {}
+        self._previous_cpu: Dict[str, float] = {}
+        self._previous_times = None
+        self._previous_at = time.monotonic()
+        self.thread: Optional[threading.Thread] = None
+
+    # ======== inputs ========= #
+    def charge(self, subsystem: str, seconds: float) -> None:
+        """Add CPU seconds measured by the caller to `subsystem`"""
+        with self.lock:
+            self.cpu_seconds[subsystem] = self.cpu_seconds.get(subsystem, 0.0) + seconds
+
+    @contextmanager
+    def cpu(self, subsystem: str):
+        """Charge the calling thread's CPU time in the block to `subsystem`"""
+        started = time.thread_time()
+        try:
+            yield
+        finally:
+            self.charge(subsystem, time.thread_time() - started)
+
+    def sample(self) -> Sample:
+        """Measure the window since the previous sample"""
+        now = time.monotonic()
+        seconds, self._previous_at = max(1e-6, now - self._previous_at), now
+
+        times = _machine_cpu_times()
+        if times is not None and self._previous_times is not None:
+            total, idle = times[0] - self._previous_times[0], times[1] - self._previous_times[1]
+            cpu = 1.0 - idle / total if total > 0 else 0.0
+        else:
+            cpu = 0.0
+        self._previous_times = times
+
+        latency = {}
+        for name, slo in SLOS.items():
+            value, self._previous_counts[name] = _window_quantile(
+                metrics.histogram(slo.histogram), self._previous_counts.get(name), slo.quantile)
+            latency[name] = value
+
+        with self.lock:
+            charged = dict(self.cpu_seconds)
+        subsystem_cpu = {name: (used - self._previous_cpu.get(name, 0.0)) / seconds for name, used in charged.items()}
+        self._previous_cpu = charged
+        return Sample(seconds, cpu, latency, subsystem_cpu)
+
+    # ======== policy ========= #
+    def policy(self) -> Policy:
+        return LEVELS[self.level]
+
+    def tick(self, sample: Optional[Sample] = None) -> Policy:
+        """
+        Judge one window and move at most one level
+
+        Args:
+            sample: Synthetic observations (default: measure the real ones)
+        """
+        sample = sample or self.sample()
+        violations = [name for name, value in sample.latency.items()
+                      if value is not None and name in SLOS and value > SLOS[name].limit_ms]
+        with self.lock:
+            self.stats["ticks"] += 1
+            self.last_sample, self.last_violations = sample, violations
+            if violations or sample.cpu >= HIGH_CPU:
+                self.calm_ticks = 0
+                # Audio falling behind can't wait for a second window
+                self.overloaded_ticks += PRESSURE_TICKS if any(v in PROTECTED for v in violations) else 1
+                if self.overloaded_ticks >= PRESSURE_TICKS:
+                    self.overloaded_ticks = 0
+                    changed = self._set_level(self._next_level(sample))
+                else:
+                    changed = False
+            elif sample.cpu <= LOW_CPU or not self.policy().admitting:
+                # Lower levels wait for real headroom so they don't flap around HIGH_CPU,
+                # but shedding is for overload only and ends once the misses stop
+                self.overloaded_ticks = 0
+                self.calm_ticks += 1
+                if self.calm_ticks >= RELIEF_TICKS:
+                    self.calm_ticks = 0
+                    changed = self._set_level(self.level - 1)
+                else:
+                    changed = False
+            else:
+                self.overloaded_ticks = self.calm_ticks = 0
+                changed = False
+            policy, admissions = self.policy(), list(self.admissions)
+        if changed:
+            print(f"Degradation level {policy.level} ({policy.name}): cpu {sample.cpu:.0%}, "
+                  f"SLO misses {violations or 'none'}")
+            for admission in admissions:
+                admission.notify(policy)
+        return policy
+
+    def _next_level(self, sample: Sample) -> int:
+        """One level up, past the rungs whose subsystem charged no CPU in the window"""
+        level = self.level + 1
+        if sample.subsystem_cpu:  # nothing charged at all yet: don't guess
+            while level in RELIEVES and sample.subsystem_cpu.get(RELIEVES[level], 0.0) < IDLE_CORES:
+                level += 1
+        return level
+
+    def _set_level(self, level: int) -> bool:
+        level = min(max(level, 0), len(LEVELS) - 1)
+        if level == self.level:
+            return False
+        self.level = level
+        self.stats["level_changes"] += 1
+        level_changes.inc()
+        return True
+
+    # ======== admission ========= #
+    def sessions(self) -> set:
+        with self.lock:
+            return {a.session_id for a in self.admissions}
+
+    def admit(self, session_id: str, kind: str, on_level: Optional[Callable[[dict], None]] = None) -> Admission:
+        """
+        Admit a connection of a session
+
+        Another connection of an already admitted session (e.g. its video next to its
+        audio) is always let in, so a session is never half degraded into a rejection.
+
+        Args:
+            session_id: Coaching session
+            kind: "audio", "video", ... (for the snapshot)
+            on_level: Receives {"type": "degradation", ...} on every level change (the
+                current level is part of each endpoint's handshake message)
+
+        Raises:
+            CapacityError: Shedding load or at ORATOR_MAX_SESSIONS
+        """
+        with self.lock:
+            policy = self.policy()
+            known = any(a.session_id == session_id for a in self.admissions)
+            open_sessions = len({a.session_id for a in self.admissions})
+            reason = None
+            if not known and not policy.admitting:
+                reason = "Server is overloaded, try again shortly"
+            elif not known and self.max_sessions and open_sessions >= self.max_sessions:
+                reason = f"Server is at capacity ({self.max_sessions} sessions)"
+            if reason:
+                self.stats["rejected"] += 1
+                sessions_rejected.inc()
+                raise CapacityError(reason, policy)
+            admission = Admission(self, session_id, kind, on_level)
+            self.admissions.append(admission)
+            self.stats["admitted"] += 1
+        return admission
+
+    def _release(self, admission: Admission) -> None:
+        with self.lock:
+            if admission in self.admissions:
+                self.admissions.remove(admission)
+
+    # ======== background loop ========= #
+    def start(self) -> None:
+        """Tick every tick_seconds on a daemon thread (idempotent)"""
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self._run, name="governor", daemon=True)
+        self.sample()  # prime the CPU / histogram baselines
+        self.thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.tick_seconds)
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Governor tick failed: {e}")
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            sample = self.last_sample
+            sessions: Dict[str, List[str]] = {}
+            for a in self.admissions:
+                sessions.setdefault(a.session_id, []).append(a.kind)
+            return {
+                **self.policy().describe(),
+                "max_sessions": self.max_sessions,
+                "sessions": sessions,
+                "cpu": None if sample is None else round(sample.cpu, 3),
+                "latency_ms": None if sample is None else sample.latency,
+                "slo_ms": {name: slo.limit_ms for name, slo in SLOS.items()},
+                "slo_misses": self.last_violations,
+                "subsystem_cpu_cores": None if sample is None else
+                    {name: round(cores, 3) for name, cores in sample.subsystem_cpu.items()},
+                **self.stats,
+            }
+
+
+governor = Governor()
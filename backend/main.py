@@ -1,34 +1,48 @@
 import json
 import base64
-import queue
+import hashlib
+import multiprocessing
 import threading
 import time
-import cv2
 import os
+import subprocess
+import sys
+import uuid
+from collections import OrderedDict, deque
 
 #flask import
 from flask import Flask, jsonify, request, Response
 from flask_cors import CORS
 from flask_sock import Sock
 
-#speech to text import
-from audio.streaming_speech_to_text import StreamingSpeechRecognizer
-from audio.openai import PresentationAnalyzer
-
 #dot env
 from dotenv import load_dotenv
 
-#video detection (gesture)
-from video.gesture import process_frame
+#lazily loaded subsystems (speech, coach, pose, eeg, camera)
+from subsystems import subsystem, mark, prewarm, startup_report
+
+#hot-path histograms and sampled debug logging
+import metrics
+from governor import governor, CapacityError
+
+#bounded audio buffer between /stream_audio and the recognizer, optional Opus ingest
+from audio.ingest import AudioIngestBuffer
+from audio import codecs as audio_codecs
+from audio.scheduler import AnalysisScheduler
+
+#shared clock / event bus for all producers
+from session import events
+from session.events import bus, DEFAULT_SESSION
 
-#emotion detection (eeg)
-from eeg.detect import (
-    connectMuse,
-    record_calm_state,
-    record_current_state,
-    detect_stress,
-    BOARD_ID
-)
+#session recording and post-session reports
+from session.recorder import SessionRecorder, recording_path, check_id
+from session.report import report_for_path
+from session.progress import get_progress_store, summary_row
+from session.outbound import OutboundChannel
+from session.memory import ledger, TRANSCRIPT_WINDOW
+
+#session state shared across worker processes / nodes (see router.py for session affinity)
+from session.state import SessionState, get_state_store, job_key, WORKER_ID
 
 
 
@@ -36,168 +50,455 @@ from eeg.detect import (
 load_dotenv()
 
 app = Flask(__name__)
+# Uploaded recordings (/analyze_recording) are the largest request bodies
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get("ORATOR_MAX_UPLOAD_MB", "500")) * 2 ** 20
 # Configure CORS to allow requests from Vercel frontend
 CORS(app, 
      origins=["https://orator-liart.vercel.app", "http://localhost:5173", "http://localhost:3000"],
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-     allow_headers=["Content-Type", "Authorization"],
+     allow_headers=["Content-Type", "Authorization", "X-Orator-Session"],
      supports_credentials=True)
 sock = Sock(app)
 
-# Initialize camera (only if available, skip on production servers)
-try:
+# Heavy subsystems are initialized on first use (see subsystems.py and /startup_report)
+@subsystem("speech")
+def speech(stage):
+    #speech to text import
+    with stage("import"):
+        from audio import streaming_speech_to_text
+    return streaming_speech_to_text
+
+@subsystem("coach")
+def coach(stage):
+    with stage("import"):
+        from audio import openai as coach_module
+    return coach_module
+
+@subsystem("pose")
+def pose(stage):
+    #video detection (gesture)
+    with stage("import"):
+        import cv2  # noqa: F401
+        import ultralytics  # noqa: F401
+        from video import gesture
+    with stage("init"):
+        gesture.load_model()  # loads and warms up the YOLO weights, or starts the ORATOR_POSE_WORKERS pool
+    return gesture
+
+@subsystem("eeg")
+def eeg(stage):
+    #emotion detection (eeg)
+    with stage("import"):
+        from eeg import detect
+    return detect
+
+@subsystem("camera")
+def camera_subsystem(stage):
+    # Initialize camera (only if available, skip on production servers)
     if os.environ.get('RAILWAY_ENVIRONMENT') or os.environ.get('RENDER'):
         # Skip camera initialization on production servers
-        camera = None
-    else:
-        camera = cv2.VideoCapture(0)  # pylint: disable=no-member
-        camera.set(38, 5)  # CAP_PROP_BUFFERSIZE = 38
-        if camera.isOpened():
-            print("✓ Camera initialized successfully")
-        else:
+        return None
+    with stage("import"):
+        import cv2
+    with stage("init"):
+        try:
+            camera = cv2.VideoCapture(0)  # pylint: disable=no-member
+            camera.set(38, 5)  # CAP_PROP_BUFFERSIZE = 38
+            if camera.isOpened():
+                print("✓ Camera initialized successfully")
+                return camera
             print("✗ Camera opened but not working")
-            camera = None
-except Exception as e:
-    print(f"✗ Warning: Camera initialization failed: {e}")
-    camera = None
+        except Exception as e:
+            print(f"✗ Warning: Camera initialization failed: {e}")
+    return None
 
-presentation_analyzer = PresentationAnalyzer("")
+# Analyzers of recently active sessions on this worker, rebuilt from the script in the
+# shared session state whenever /transcript (on any worker) replaced it
+ANALYZER_CACHE = 64
+analyzers = OrderedDict()  # session_id -> (script version, PresentationAnalyzer)
+analyzers_lock = threading.Lock()
+
+def get_presentation_analyzer(session_id=DEFAULT_SESSION):
+    """The session's PresentationAnalyzer (created on first use, so importing main.py doesn't import the OpenAI SDK)"""
+    script = SessionState(session_id).get("script") or {"version": "", "script": ""}
+    with analyzers_lock:
+        cached = analyzers.get(session_id)
+        if cached is not None and cached[0] == script["version"]:
+            analyzers.move_to_end(session_id)
+            return cached[1]
+    analyzer = coach.get().PresentationAnalyzer(script["script"])
+    with analyzers_lock:
+        analyzers[session_id] = (script["version"], analyzer)
+        analyzers.move_to_end(session_id)
+        while len(analyzers) > ANALYZER_CACHE:
+            analyzers.popitem(last=False)
+    return analyzer
+
+def cached_analyzer(session_id):
+    """The session's current PresentationAnalyzer if one is cached, without creating one (memory accounting)"""
+    with analyzers_lock:
+        cached = analyzers.get(session_id)
+    return cached[1] if cached is not None else None
+
+def script_index_arrays(analyzer):
+    index = analyzer.index if analyzer is not None else None
+    return index and (index.sentences, index.sentence_vectors, index.topic_vectors)
 
 @app.route("/")
 def home():
     return jsonify({"message": "Flask backend running!"})
 
-def gen_frames():
-    global latest_gesture_data
-    # Check if camera is available
+def analyzed_frames(session_id=DEFAULT_SESSION):
+    """
+    Read camera frames and run gesture analysis, yielding (frame, visible_tracks, result).
+    Results are stored and published under session_id, the session watching the camera.
+    """
+    camera = camera_subsystem.get()
     if camera is None:
-        yield (b'--frame\r\n'
-               b'Content-Type: text/plain\r\n\r\n' + b'Camera not available on this server\r\n')
         return
-    
+
+    gesture = pose.get()
+    state = SessionState(session_id)
+    tracks, index = [], 0
     while True:
         success, frame = camera.read()
         if not success:
             break
-        
-        # Process frame with gesture analysis
-        annotated_frame = frame  # Default to original frame
+
+        # Under CPU pressure only every 1/video_fps_scale-th frame is analyzed
+        index += 1
         result = None
+        if index % max(1, round(1 / governor.policy().video_fps_scale)):
+            yield frame, tracks, None
+            continue
+
+        # Process frame with gesture analysis
         try:
-            annotated_frame, result = process_frame(frame)
+            tracks, result = gesture.analyze_frame(frame)
             if result:
                 # Update the latest gesture data
-                latest_gesture_data = result
+                state.set("gesture", result)
+                bus.publish(session_id, events.GESTURE, result)
         except Exception as e:
+            tracks = []
             print(f"Error processing frame with gesture analysis: {e}")
-        
-        # Encode annotated frame (with YOLO keypoints/boxes) as JPEG
-        ret, buffer = cv2.imencode('.jpg', annotated_frame)  # pylint: disable=no-member 
-        frame_bytes = buffer.tobytes()
+        yield frame, tracks, result
+
+def gen_frames(mode="annotated", quality=None, width=None, session_id=DEFAULT_SESSION):
+    """
+    MJPEG parts for /video_feed
+
+    Args:
+        mode: "annotated" (skeletons + gesture flags) or "raw"
+        quality: JPEG quality override
+        width: Max streamed width override
+        session_id: Session the gesture results belong to
+    """
+    # Check if camera is available
+    if camera_subsystem.get() is None:
+        yield (b'--frame\r\n'
+               b'Content-Type: text/plain\r\n\r\n' + b'Camera not available on this server\r\n')
+        return
+
+    from video.render import FrameRenderer
+    renderer = FrameRenderer(quality=quality, max_width=width)  # per viewer, reuses its canvas
+    for frame, tracks, _ in analyzed_frames(session_id):
+        image = renderer.annotate(frame, tracks) if mode == "annotated" else renderer.canvas(frame)
+        frame_bytes = renderer.encode(image)
         yield (b'--frame\r\n'
                b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
 
-# Global variable to store the latest gesture analysis results
-latest_gesture_data = {}
+def muse_state(session_id):
+    """EEG board bound to a session (see eeg/boards.py) if it's open on this worker, or None"""
+    if eeg.state != "ready":
+        return None
+    return eeg.get().manager.for_session(session_id)
 
-# Muse / EEG state tracking
-muse_state = {
-    "board": None,
-    "board_info": None,
-    "baseline": None
-}
+def no_board(session_id, message):
+    """400 response, or 409 when the session's board is open on another worker (requests not routed by session)"""
+    binding = SessionState(session_id).get("eeg")
+    if binding and binding.get("worker") != WORKER_ID:
+        return jsonify({
+            "status": "error",
+            "message": f"The EEG device of this session is connected on worker {binding['worker']}.",
+            "worker": binding["worker"]
+        }), 409
+    return jsonify({"status": "error", "message": message}), 400
 
 @app.route('/gesture_data')
 def get_gesture_data():
-    return jsonify(latest_gesture_data or {"message": "No gesture data available yet"})
+    """Latest gesture result of ?session= (from the server camera or the client's uploaded frames)"""
+    result = SessionState(request.args.get('session', DEFAULT_SESSION)).get("gesture")
+    return jsonify(result or {"message": "No gesture data available yet"})
 
 @app.route('/video_feed')
 def video_feed():
-    print(f"Video feed requested. Camera status: {'Available' if camera is not None else 'Not Available'}")
+    """MJPEG stream, optional ?mode=annotated|raw&quality=1-100&width=<px>"""
+    print(f"Video feed requested. Camera status: {'Available' if camera_subsystem.get() is not None else 'Not Available'}")
+    return Response(gen_frames(
+                        mode=request.args.get('mode', 'annotated'),
+                        quality=request.args.get('quality', type=int),
+                        width=request.args.get('width', type=int),
+                        session_id=request.args.get('session', DEFAULT_SESSION)
+                    ),
+                    mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@app.route('/keypoints_feed')
+def keypoints_feed():
+    """
+    Keypoints-only stream (Server-Sent Events): coordinates and gesture flags as JSON per
+    frame so the client draws the overlay on its own camera preview. No pixels are sent.
+    """
+    if camera_subsystem.get() is None:
+        return jsonify({"status": "error", "message": "Camera not available on this server"}), 503
+
+    from video.render import keypoints_payload
+    session_id = request.args.get('session', DEFAULT_SESSION)
     def generate():
-        global latest_gesture_data
-        for frame_with_gestures in gen_frames():
-            # Extract gesture data from the frame generation process
-            if hasattr(frame_with_gestures, 'gesture_data'):
-                latest_gesture_data = frame_with_gestures.gesture_data
-            yield frame_with_gestures
-    
-    return Response(generate(),
-                  mimetype='multipart/x-mixed-replace; boundary=frame')
+        for frame, tracks, result in analyzed_frames(session_id):
+            yield f"data: {json.dumps(keypoints_payload(frame.shape, tracks, result))}\n\n"
 
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@sock.route('/keypoints_stream')
+def keypoints_stream(ws):
+    """
+    Binary keypoint stream (see video/wire.py): a few hundred bytes per frame instead of a
+    JPEG, for clients that draw the overlay on their own local camera preview.
+
+    With a server camera, frames are pushed as they are analyzed. Without one (hosted
+    deployments), the client may send downscaled JPEG frames as binary messages (see
+    /video_ingest) and gets a keypoint frame back for every analyzed frame.
+    """
+    from video import wire
+    encoder = wire.KeypointEncoder()
+    ws.send(json.dumps(wire.describe()))
+    presenter = None
+    session_id = request.args.get('session', DEFAULT_SESSION)
+
+    try:
+        if camera_subsystem.get() is not None:
+            for frame, tracks, result in analyzed_frames(session_id):
+                presenter = result or presenter
+                ws.send(encoder.encode(frame.shape, tracks, presenter))
+            return
+
+        try:
+            admission = governor.admit(session_id, "video")
+        except CapacityError as e:
+            ws.send(json.dumps(e.status))
+            return
+        try:
+            ingest_frames(ws, session_id, encoder, admission)
+        finally:
+            admission.close()
+    except Exception as e:
+        print(f"Keypoint stream closed: {e}")
+
+def ingest_frames(ws, session_id, encoder, admission, params=None):
+    """
+    Analyze frames uploaded over `ws` with a pipeline private to this connection.
+    Keypoint frames are sent back as results come in, stats every couple of seconds,
+    degradation levels as they change (through the caller's governor admission).
+    """
+    from video.ingest import FrameIngest, negotiate
+    send_lock = threading.Lock()
+    presenter = {}
+    state = SessionState(session_id)
+    state.touch()
+
+    def send(message):
+        with send_lock:
+            ws.send(message)
+
+    gesture = pose.get()
+    params = params or negotiate(None)
+    # The client re-arms its upload timer with the fps of each new level (frames above it are dropped)
+    admission.on_level = lambda level: send(json.dumps({**level, "fps": params["fps"] * level["video_fps_scale"]}))
+
+    def on_result(frame, tracks, result):
+        if result:
+            presenter["result"] = result
+            state.set("gesture", result)
+            bus.publish(session_id, events.GESTURE, result)
+        send(encoder.encode(frame.shape, tracks, presenter.get("result")))
+
+    def on_dropped(reason):
+        # Every frame gets an answer: clients keep one frame in flight until they hear back
+        if reason == "invalid":
+            send(json.dumps({"type": "error", "message": "Could not decode frame"}))
+        else:
+            send(json.dumps({"type": "dropped", "reason": reason}))
+
+    pipeline = gesture.GesturePipeline()
+    ingest = FrameIngest(pipeline, params, on_result, on_dropped)
+    tracked = ledger.track(session_id, "pose_tracks", lambda: pipeline.tracker.tracks)
+    last_stats = time.monotonic()
+    try:
+        while True:
+            message = ws.receive()
+            if message is None:
+                break
+            if isinstance(message, (bytes, bytearray)):
+                ingest.submit(message)
+            if time.monotonic() - last_stats >= 2.0:
+                last_stats = time.monotonic()
+                send(json.dumps(ingest.snapshot()))
+    finally:
+        ingest.close()
+        tracked.close()
+
+@sock.route('/video_ingest')
+def video_ingest(ws):
+    """
+    Frame upload for headless deployments, ?session=<id>.
+
+    The client opens with a text message {"width", "height", "fps", "codec"} and gets the
+    accepted parameters back ({"type": "accept", ...} plus the keypoint wire format).
+    After that every binary message is one compressed frame; results come back as binary
+    keypoint frames (video/wire.py) and gesture results are published to the session's
+    event bus. Frames are dropped, not queued, when inference can't keep up; every dropped
+    frame is answered with {"type": "dropped", "reason": ...} (or an error if it didn't decode).
+
+    When the server is at capacity the hello is answered with {"type": "rejected",
+    "status": 503, ...} instead and the socket closed. The accept message carries the
+    current degradation level, later changes arrive as {"type": "degradation", ...}; both
+    carry the upload "fps" for that level, frames sent faster are dropped.
+    """
+    from video import wire
+    from video.ingest import negotiate, effective_fps
+    session_id = request.args.get('session', DEFAULT_SESSION)
+    try:
+        hello = ws.receive()
+        try:
+            admission = governor.admit(session_id, "video")
+        except CapacityError as e:
+            ws.send(json.dumps(e.status))
+            return
+        try:
+            try:
+                requested = json.loads(hello) if isinstance(hello, str) else None
+            except ValueError:
+                requested = None
+            params = negotiate(requested)
+            ws.send(json.dumps({**wire.describe(), "type": "accept", **params,
+                                "degradation": {**governor.policy().describe(), "fps": effective_fps(params)}}))
+            ingest_frames(ws, session_id, wire.KeypointEncoder(), admission, params)
+        finally:
+            admission.close()
+    except Exception as e:
+        print(f"Video ingest closed: {e}")
 
 @app.route('/transcript', methods=['POST'])
 def save_transcript():
+    """Script of ?session= (JSON string), shared with every worker through the session state"""
+    session_id = request.args.get('session', DEFAULT_SESSION)
     try:
         transcript = request.get_json()
         print("Received transcript:", transcript)
-        global presentation_analyzer
-        presentation_analyzer = PresentationAnalyzer(transcript)
+        if not isinstance(transcript, str):
+            raise ValueError("expected the script as a JSON string")
+        script = transcript
+        SessionState(session_id).set("script", {
+            "script": script,
+            "version": hashlib.sha256(script.encode()).hexdigest()[:16],
+            "updated_at": time.time()
+        })
+        presentation_analyzer = get_presentation_analyzer(session_id)
         
     except Exception as e:
         return jsonify({
             "status": "error",
             "message": f"Failed to receive transcription: {str(e)}"
         })
-    return jsonify({"status": "success", "received": ""})
+    index = presentation_analyzer.index
+    return jsonify({"status": "success", "received": "", "script_index": index.describe() if index else None})
 
 @app.route('/eeg/connect', methods=['POST'])
 def connect_muse():
-    global muse_state
+    """
+    Connect a headset for ?session=. Optional (query or JSON body): device (id chosen by the
+    client, default "muse"), board ("muse_s", "synthetic", or a BrainFlow id), serial_port,
+    mac_address, serial_number. Several devices can be connected, one per session.
+    """
+    options = {**(request.get_json(silent=True) or {}), **request.args.to_dict()}
+    session_id = options.get('session', DEFAULT_SESSION)
     try:
-        board = connectMuse()
+        detect = eeg.get()
+        board = detect.connectMuse(
+            device_id=options.get('device', detect.DEFAULT_DEVICE),
+            session_id=session_id,
+            board=options.get('board'),
+            serial_port=options.get('serial_port', detect.SERIAL_PORT),
+            mac_address=options.get('mac_address', ''),
+            serial_number=options.get('serial_number', '')
+        )
         if board is None:
             raise RuntimeError("Unable to connect to Muse device.")
-
-        sampling_rate = board.get_sampling_rate(BOARD_ID)
-        eeg_channels = board.get_eeg_names(BOARD_ID)
-
-        board_info = {
-            "board_id": BOARD_ID,
-            "sampling_rate": sampling_rate,
-            "eeg_channels": eeg_channels
-        }
-
-        muse_state["board"] = board
-        muse_state["board_info"] = board_info
+        SessionState(session_id).set("eeg", {"device_id": board.device_id, "board_id": board.board_id,
+                                             "worker": WORKER_ID, "baseline": None})
 
         return jsonify({
             "status": "connected",
-            "board": board_info,
+            "board": board.info(),
             "message": "Muse device connected."
         })
     except Exception as e:
-        muse_state["board"] = None
-        muse_state["board_info"] = None
         print(f"/eeg/connect error: {e}")
         return jsonify({
             "status": "error",
             "message": f"Failed to connect to Muse device: {str(e)}"
         }), 500
 
+@app.route('/eeg/disconnect', methods=['POST'])
+def disconnect_muse():
+    session_id = request.args.get('session', DEFAULT_SESSION)
+    board = muse_state(session_id)
+    if board is None:
+        return no_board(session_id, "No EEG device is connected for this session.")
+    eeg.get().manager.disconnect(board.device_id)
+    SessionState(session_id).delete("eeg")
+    return jsonify({"status": "disconnected", "device_id": board.device_id})
+
+@app.route('/eeg/boards')
+def list_boards():
+    """Connected EEG boards and the session each one is bound to"""
+    if eeg.state != "ready":
+        return jsonify({"boards": [], "sessions": {}})
+    return jsonify(eeg.get().manager.snapshot())
+
 @app.route('/eeg/baseline', methods=['POST'])
 def capture_baseline():
-    global muse_state
-    board = muse_state.get("board")
-    board_info = muse_state.get("board_info")
+    """
+    Calibrate the calm baseline on the session's device. Stops as soon as the estimate is
+    stable. With ?user= the baseline is stored, and the user's stored baseline for the device
+    is reused when it still matches: ?calibrate=skip reuses it without recording,
+    ?calibrate=full ignores it. Without a user nothing is stored or reused.
+    GET /eeg/baseline?session= reports progress while this runs, tagged with ?calibration=.
+    """
+    session_id = request.args.get('session', DEFAULT_SESSION)
+    board = muse_state(session_id)
 
-    if board is None or board_info is None:
-        return jsonify({
-            "status": "error",
-            "message": "Connect to the Muse device before capturing the baseline."
-        }), 400
+    if board is None:
+        return no_board(session_id, "Connect to the Muse device before capturing the baseline.")
 
+    # Pollers must not see the previous run's progress while this one starts
+    board.calibration = None
     try:
-        baseline = record_calm_state(
+        baseline = eeg.get().record_calm_state(
             board,
-            board_info["board_id"],
-            board_info["sampling_rate"]
+            user_id=request.args.get('user') or None,
+            calibrate=request.args.get('calibrate', 'auto'),
+            calibration_id=request.args.get('calibration')
         )
-        muse_state["baseline"] = baseline
+        board.baseline = baseline
+        SessionState(session_id).update("eeg", baseline=baseline)
 
         return jsonify({
             "status": "baseline_ready",
             "baseline": baseline,
+            "calibration": board.calibration.progress(),
             "message": "Baseline captured. Please remain calm for consistent readings.",
             "suggested_message": "Baseline captured. Take a deep breath and begin when you feel ready."
         })
@@ -208,19 +509,28 @@ def capture_baseline():
             "message": f"Unable to capture baseline: {str(e)}"
         }), 500
 
+@app.route('/eeg/baseline', methods=['GET'])
+def baseline_progress():
+    """Progress of the running (or last) baseline calibration of a session"""
+    session_id = request.args.get('session', DEFAULT_SESSION)
+    board = muse_state(session_id)
+    if board is None:
+        # Possibly open on another worker: the stored binding still knows the baseline
+        binding = SessionState(session_id).get("eeg") or {}
+        return jsonify({"status": "idle", "baseline": binding.get("baseline"), "worker": binding.get("worker")})
+    if board.calibration is None:
+        return jsonify({"status": "idle", "baseline": board.baseline})
+    return jsonify({"status": "ok", "baseline": board.baseline, "calibration": board.calibration.progress()})
+
 @app.route('/eeg/detect', methods=['POST'])
 def detect_emotion():
-    global muse_state
-    board = muse_state.get("board")
-    board_info = muse_state.get("board_info")
-    baseline = muse_state.get("baseline")
+    session_id = request.args.get('session', DEFAULT_SESSION)
+    board = muse_state(session_id)
 
-    if board is None or board_info is None:
-        return jsonify({
-            "status": "error",
-            "message": "Connect to the Muse device before running detection."
-        }), 400
+    if board is None:
+        return no_board(session_id, "Connect to the Muse device before running detection.")
 
+    baseline = board.baseline
     if baseline is None:
         return jsonify({
             "status": "error",
@@ -228,12 +538,13 @@ def detect_emotion():
         }), 400
 
     try:
-        current_ratio = record_current_state(
-            board,
-            board_info["board_id"],
-            board_info["sampling_rate"]
-        )
-        stressed = detect_stress(current_ratio, baseline)
+        detect = eeg.get()
+        current_ratio = detect.record_current_state(board)
+        stressed = detect.detect_stress(current_ratio, baseline)
+        bus.publish(session_id, events.STRESS, {
+            "stressed": stressed,
+            "current_ratio": current_ratio
+        })
 
         suggestion = (
             "We're detecting elevated stress—slow your pace and take a calming breath."
@@ -255,107 +566,206 @@ def detect_emotion():
             "message": f"Unable to run detection: {str(e)}"
         }), 500
 
+def save_progress(user_id, path):
+    """Summarize a finished recording and ingest it into the progress store"""
+    try:
+        report = report_for_path(path)
+        if report["minutes"]:
+            get_progress_store().ingest([summary_row(report, user_id)])
+    except Exception as e:
+        print(f"Error saving session progress: {e}")
+
 @sock.route('/stream_audio')
 def stream_audio(ws):
     """
     WebSocket endpoint for realtime audio streaming and transcription
     Uses proper streaming recognition to maintain context across chunks
-    Includes AI-powered presentation analysis every 3 seconds
+    Includes AI-powered presentation analysis, scheduled by audio/scheduler.py
+
+    Audio is 16 kHz LINEAR16 by default, either base64 in {"audio": ...} JSON messages or
+    as binary messages. ?codec=webm_opus|ogg_opus|opus (&rate=, &bitrate=) negotiates
+    compressed audio instead, see audio/codecs.py; the accepted configuration is sent
+    back as the first message ({"type": "audio_config", ...}).
+
+    Admission control (governor.py): at capacity the first message is {"type": "rejected",
+    "status": 503, ...} and the socket closes. Otherwise audio_config carries the current
+    degradation level and changes arrive as {"type": "degradation", ...}.
+
+    Interim transcripts are throttled (ORATOR_INTERIM_HZ); ?delta=1 sends them as suffix
+    deltas and ?framing=msgpack as MessagePack binary frames, see session/outbound.py.
     """
     print("WebSocket connection established")
+    session_id = request.args.get('session', DEFAULT_SESSION)
+    user_id = request.args.get('user', 'anonymous')
+    try:
+        check_id(session_id)  # names the recording directory
+    except ValueError as e:
+        ws.send(json.dumps({'type': 'rejected', 'status': 400, 'reason': str(e)}))
+        return
+
+    # Every message to the client goes through one throttled, serialized channel
+    channel = OutboundChannel(
+        ws.send,
+        framing=request.args.get('framing', 'json'),
+        delta=request.args.get('delta') == '1'
+    )
+
+    try:
+        audio_config = audio_codecs.negotiate(
+            request.args.get('codec'),
+            sample_rate=request.args.get('rate', type=int),
+            bitrate=request.args.get('bitrate', type=int)
+        )
+    except ValueError as e:
+        channel.send({'error': str(e), 'is_final': False})
+        return
+    try:
+        admission = governor.admit(session_id, "audio", on_level=channel.send)
+    except CapacityError as e:
+        print(f"Rejected audio session {session_id}: {e}")
+        channel.send(e.status)
+        channel.close()
+        return
+    channel.send({'type': 'audio_config', **audio_config, 'messages': channel.describe(),
+                  'degradation': governor.policy().describe()})
 
-    # Queue to hold audio chunks
-    audio_queue = queue.Queue()
+    def signal_backpressure(state):
+        # Clients pause uploading on "pause" and flush what they held back on "resume"
+        try:
+            channel.send({'type': 'backpressure', 'state': state, 'buffered_ms': audio_buffer.buffered_ms})
+        except Exception as e:
+            print(f"Error sending backpressure signal: {e}")
 
-    # Flag to control streaming
-    is_streaming = {'active': True}
+    # Bounded buffer coalescing client chunks into 100 ms recognizer frames
+    if audio_config['mode'] == 'forward':
+        # Cutting into a container chunk corrupts the stream, so only whole new chunks are dropped
+        audio_buffer = AudioIngestBuffer(on_backpressure=signal_backpressure, overflow='drop_chunk',
+                                         bytes_per_second=audio_config['bytes_per_second'])
+    else:
+        audio_buffer = AudioIngestBuffer(sample_rate=16000, on_backpressure=signal_backpressure)
+
+    # Opus decoded on the server feeds PCM into the buffer, everything else goes in as-is
+    decoder = None
+    if audio_config['mode'] == 'decode':
+        decoder = audio_codecs.StreamingOpusDecoder(audio_config['codec'], audio_buffer.push,
+                                                    input_rate=request.args.get('rate', 48000, type=int))
+    ingest_audio = decoder.feed if decoder else audio_buffer.push
+
+    def decoding_failed():
+        """Tell the client once the container can't be demuxed anymore (later audio is dropped)"""
+        if decoder is None or not decoder.failed:
+            return False
+        channel.send({'type': 'error', 'message': f"Could not decode {decoder.codec} audio: {decoder.error}",
+                      'is_final': False})
+        return True
+
+    # Latest final segments only, the recording keeps the whole transcript
+    full_transcript = deque(maxlen=TRANSCRIPT_WINDOW)
+    segment_start = {'ts': None}  # shared-clock time of the first interim of the current sentence
+
+    def run_analysis(reason, recent_transcript):
+        """One coaching call on the text that triggered it (on the scheduler's worker thread), returns success"""
+        analyzer = get_presentation_analyzer(session_id)
+        # Minimal context to avoid dwelling on past mistakes
+        context = ' '.join(list(full_transcript)[-3:])
+
+        print(f"Running AI analysis ({reason}) on: {recent_transcript[:100]}...")
+        analysis_result = analyzer.analyze_presentation(
+            live_transcript=recent_transcript,
+            context_window=context
+        )
+
+        if not analysis_result.get('success'):
+            print(f"AI analysis failed: {analysis_result.get('error')}")
+            return False
+        feedback_message = {
+            'type': 'ai_feedback',
+            'feedback': analysis_result['feedback'],
+            'stuttering_detected': analysis_result['stuttering_detected'],
+            'stuttering_details': analysis_result.get('stuttering_details'),
+            'semantic': analysis_result.get('semantic'),
+            'trigger': reason,
+            'timestamp': time.time()
+        }
+        channel.send(feedback_message) # sends the feedback message to the frontend with ai_feedback type
+        bus.publish(session_id, events.FEEDBACK, feedback_message)
+        print(f"AI Feedback sent: {analysis_result['feedback'][:100]}...")
+        return True
+
+    # Analysis on sentence/pause boundaries, anomalies and upcoming topics, within a call budget
+    analyzer = get_presentation_analyzer(session_id)
+    SessionState(session_id).touch()
+    # No coaching calls until a script is posted; a new script updates the topics mid-stream
+    scheduler = AnalysisScheduler(run_analysis, topics=analyzer.highlighted_topics, active=bool(analyzer.script.strip()))
+    current = {'analyzer': analyzer}
+
+    def refresh_script():
+        latest = get_presentation_analyzer(session_id)
+        if latest is not current['analyzer']:
+            current['analyzer'] = latest
+            scheduler.set_script(latest.highlighted_topics, active=bool(latest.script.strip()))
+        return latest
 
-    # Transcript accumulation and analysis timing
-    full_transcript = []
-    last_analysis_time = time.time()
-    analysis_interval = 4.0  # seconds (balanced for real-time with recovery time)
-    
-    # Timer-based analysis trigger
-    def check_and_run_analysis():
-        """Check if it's time to run analysis based on timer"""
-        nonlocal last_analysis_time
-        current_time = time.time()
-        
-        if presentation_analyzer and (current_time - last_analysis_time) >= analysis_interval:
-            if len(full_transcript) > 0:  # Only analyze if we have something
-                last_analysis_time = current_time
-                
-                # Run AI analysis
-                def run_analysis():
-                    try:
-                        # Only analyze the VERY LATEST transcript - focus on what they're saying right now
-                        recent_transcript = full_transcript[-1] if full_transcript else ""
-                        # Minimal context to avoid dwelling on past mistakes
-                        context = ' '.join(full_transcript[-3:])
-                        
-                        print(f"Running AI analysis on: {recent_transcript[:100]}...")
-                        analysis_result = presentation_analyzer.analyze_presentation(
-                            live_transcript=recent_transcript,
-                            context_window=context
-                        )
-                        
-                        if analysis_result.get('success'):
-                            feedback_message = {
-                                'type': 'ai_feedback',
-                                'feedback': analysis_result['feedback'],
-                                'stuttering_detected': analysis_result['stuttering_detected'],
-                                'stuttering_details': analysis_result.get('stuttering_details'),
-                                'timestamp': current_time
-                            }
-                            ws.send(json.dumps(feedback_message)) # sends the feedback message to the frontend as a JSON string with ai_feedback type
-                            print(f"AI Feedback sent: {analysis_result['feedback'][:100]}...")
-                        else:
-                            print(f"AI analysis failed: {analysis_result.get('error')}")
-                    except Exception as e:
-                        print(f"Error in AI analysis: {e}")
-                
-                threading.Thread(target=run_analysis, daemon=True).start()
-    
     def audio_generator():
-        """Generator that yields audio chunks from the queue"""
+        """Generator that yields fixed-size audio frames from the ingest buffer"""
         print("Audio generator started")
-        chunk_count = 0
-        while is_streaming['active']:
-            try:
-                chunk = audio_queue.get(timeout=0.5)  # Increased timeout
-                if chunk is None:  # Sentinel value to stop
-                    print("Audio generator received stop signal")
-                    break
-                chunk_count += 1
-                print(f"Generator yielding chunk #{chunk_count}")
-                yield chunk
-            except queue.Empty:
-                # Don't print on every empty - too noisy
-                pass
+        for frame in audio_buffer.frames():
+            metrics.debug("audio_generator", "Yielding frame: %d bytes", len(frame))
+            yield frame
+        print("Audio generator received stop signal")
     
     def transcription_callback(result):
         """Callback for transcription results"""
         nonlocal full_transcript
         
         try:
-            # Send transcription result to frontend
-            ws.send(json.dumps(result))
+            # Finals carry their local similarity to the script (score + nearest sentence)
+            if result.get('is_final') and result.get('transcript'):
+                result['semantic'] = refresh_script().score_segment(result['transcript'])
+
+            # Send transcription result to frontend (interims throttled / delta-encoded)
+            channel.transcript(result)
             
+            if segment_start['ts'] is None and result.get('transcript'):
+                segment_start['ts'] = events.now()
+
             # Accumulate transcript
             if result.get('is_final') and result.get('transcript'):
                 full_transcript.append(result['transcript'])
-                # Check if it's time for analysis
-                check_and_run_analysis()
+                end = events.now()
+                bus.publish(session_id, events.TRANSCRIPT, {
+                    'transcript': result['transcript'],
+                    'confidence': result.get('confidence'),
+                    'semantic': result['semantic'],
+                    'start': segment_start['ts'] or end,
+                    'end': end
+                }, ts=end)
+                segment_start['ts'] = None
+                scheduler.on_final(result['transcript'])
+            elif result.get('transcript'):
+                scheduler.on_interim(result['transcript'])
                     
         except Exception as e:
             print(f"Error sending result: {e}")
     
+    # Record the session timeline for the post-session report
+    recorder = SessionRecorder(
+        session_id,
+        topics=analyzer.highlighted_topics
+    ).start()
+
     # Create streaming recognizer
-    recognizer = StreamingSpeechRecognizer(
-        callback=transcription_callback,
-        sample_rate=16000,
-        language_code="en-US"
-    )
+    try:
+        recognizer = speech.get().StreamingSpeechRecognizer(
+            callback=transcription_callback,
+            sample_rate=audio_config['sample_rate'],
+            language_code="en-US",
+            encoding=audio_config['encoding'],
+            bytes_per_second=audio_config.get('bytes_per_second')
+        )
+    except Exception:
+        admission.close()
+        raise
     
     # Start streaming recognition in a separate thread
     def run_streaming():
@@ -367,6 +777,18 @@ def stream_audio(ws):
     
     streaming_thread = threading.Thread(target=run_streaming)
     streaming_thread.start()
+
+    # What this connection holds for the session, see /memory
+    tracked = [
+        ledger.track(session_id, "transcript", lambda: full_transcript),
+        ledger.track(session_id, "audio_buffer", lambda: audio_buffer),
+        # Whichever analyzer the session has now, a new script replaces it mid-stream
+        ledger.track(session_id, "analyzer_feedback",
+                     lambda: getattr(cached_analyzer(session_id), "previous_feedback", None)),
+        # Script and its embeddings, not the shared embedder
+        ledger.track(session_id, "script_index", lambda: script_index_arrays(cached_analyzer(session_id))),
+        ledger.track(session_id, "recorder_buffer", lambda: (recorder._buffer, recorder._text)),
+    ]
     
     try:
         while True:
@@ -375,34 +797,298 @@ def stream_audio(ws):
             
             if message is None:
                 break
+
+            if isinstance(message, (bytes, bytearray)):
+                # Binary audio message (no base64 / JSON overhead)
+                metrics.debug("audio_receive", "Received audio chunk: %d bytes", len(message))
+                ingest_audio(message)
+                if decoding_failed():
+                    break
+                continue
             
             try:
                 data = json.loads(message)
                 
+                if data.get('resync'):
+                    channel.resync()
+
                 if 'audio' in data:
                     # Decode base64 audio and add to queue
                     audio_base64 = data['audio']
                     audio_bytes = base64.b64decode(audio_base64)
-                    print(f"Received audio chunk: {len(audio_bytes)} bytes")
-                    audio_queue.put(audio_bytes)
-                        
+                    metrics.debug("audio_receive", "Received audio chunk: %d bytes", len(audio_bytes))
+                    ingest_audio(audio_bytes)
+                    if decoding_failed():
+                        break
+
             except json.JSONDecodeError:
-                ws.send(json.dumps({'error': 'Invalid JSON', 'is_final': False}))
+                channel.send({'error': 'Invalid JSON', 'is_final': False})
             except Exception as e:
                 print(f"Error processing message: {str(e)}")
-                ws.send(json.dumps({'error': str(e), 'is_final': False}))
+                channel.send({'error': str(e), 'is_final': False})
                 
     except Exception as e:
         print(f"WebSocket error: {str(e)}")
     finally:
         print("WebSocket connection closing...")
-        is_streaming['active'] = False
-        audio_queue.put(None)  # Stop the generator
+        if decoder:
+            decoder.close()
+            print(f"Opus decode: {decoder.snapshot()}")
+        audio_buffer.close()  # Stop the generator once the buffered audio is flushed
+        scheduler.close()
         recognizer.stop()
         streaming_thread.join(timeout=2)
+        recorder.close()
+        admission.close()
+        channel.close()
+        for handle in tracked:
+            handle.close()
+        print(f"Audio ingest: {audio_buffer.snapshot()}, outbound: {channel.stats}, analysis: {scheduler.snapshot()}")
+        threading.Thread(target=save_progress, args=(user_id, recorder.path), daemon=True).start()
         print("WebSocket connection closed")
 
 
+@sock.route('/events')
+def stream_events(ws):
+    """
+    Push stream of every event (gesture, transcript, stress, feedback) of a session.
+    Replaces polling /gesture_data and the EEG endpoints. Optional ?kinds=gesture,stress filter.
+    """
+    session_id = request.args.get('session', DEFAULT_SESSION)
+    kinds = request.args.get('kinds')
+    sub = bus.subscribe(session_id, kinds=kinds.split(',') if kinds else None)
+    try:
+        while getattr(ws, 'connected', True):
+            event = sub.get(timeout=1.0)
+            if event is not None:
+                ws.send(json.dumps(event.to_dict()))
+    except Exception as e:
+        print(f"Event stream closed: {e}")
+    finally:
+        sub.close()
+
+@app.route('/events/window')
+def events_window():
+    """
+    Query a time window of a session, e.g. gesture and stress during a sentence:
+    /events/window?session=...&start=<transcript start>&end=<transcript end>&kinds=gesture,stress
+    """
+    session_id = request.args.get('session', DEFAULT_SESSION)
+    kinds = request.args.get('kinds')
+    try:
+        start = float(request.args.get('start', 0))
+        end = float(request.args.get('end', events.now()))
+    except ValueError:
+        return jsonify({"status": "error", "message": "start and end must be numbers"}), 400
+
+    selected = bus.window(session_id, start, end, kinds.split(',') if kinds else None)
+    return jsonify({"session": session_id, "events": [e.to_dict() for e in selected]})
+
+
+@app.route('/report')
+def session_report():
+    """Per-minute performance report of the latest (or ?recording=) recording of a session"""
+    session_id = request.args.get('session', DEFAULT_SESSION)
+    try:
+        path = recording_path(session_id, request.args.get('recording'))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    if path is None:
+        return jsonify({"status": "error", "message": "No recording found for this session."}), 404
+    try:
+        return jsonify(report_for_path(path))
+    except Exception as e:
+        print(f"/report error: {e}")
+        return jsonify({"status": "error", "message": f"Unable to build report: {str(e)}"}), 500
+
+
+@app.route('/progress')
+def user_progress():
+    """Trend series across a user's sessions, e.g. /progress?user=...&metrics=filler_rate,stress_share"""
+    user_id = request.args.get('user', 'anonymous')
+    metrics = request.args.get('metrics')
+    try:
+        series = get_progress_store().trend(
+            user_id,
+            metrics=metrics.split(',') if metrics else None,
+            since=request.args.get('since', type=float),
+            until=request.args.get('until', type=float),
+            limit=request.args.get('limit', type=int)
+        )
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify({"user": user_id, "series": series})
+
+
+# Offline analysis jobs for uploaded recordings. The job document, and the report once
+# the job is done, live in the shared session state so any worker can answer the status
+# poll; the process and its files stay on the worker that ran it.
+UPLOADS_DIR = os.environ.get("ORATOR_UPLOADS_DIR", "uploads")
+# Each job runs a pose process pool, so this worker runs only a few at once and splits the cores
+MAX_OFFLINE_JOBS = int(os.environ.get("ORATOR_OFFLINE_JOBS", "1"))
+offline_slots = threading.BoundedSemaphore(MAX_OFFLINE_JOBS)
+offline_jobs = {}  # job_id -> subprocess.Popen started by this worker
+
+def watch_offline_job(job_id, process, output, user_id):
+    """Wait for an offline job, ingest its report into the progress store and publish the outcome"""
+    try:
+        returncode = process.wait()
+    finally:
+        offline_slots.release()
+    store = get_state_store()
+    job = store.get(job_key(job_id)) or {}
+    if returncode != 0 or not os.path.exists(output):
+        store.set(job_key(job_id), {**job, "status": "error", "returncode": returncode})
+        return
+    try:
+        with open(output) as f:
+            report = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error reading offline report {job_id}: {e}")
+        store.set(job_key(job_id), {**job, "status": "error", "returncode": returncode})
+        return
+    try:
+        if report.get("minutes"):
+            get_progress_store().ingest([summary_row(report, user_id)])
+    except Exception as e:
+        print(f"Error ingesting offline report {job_id}: {e}")
+    store.set(job_key(job_id), {**job, "status": "complete", "returncode": 0, "report": report})
+    offline_jobs.pop(job_id, None)
+
+def start_offline_job():
+    """
+    Save the uploaded recording and start `python -m offline` on it
+
+    Returns:
+        tuple: (job_id, subprocess.Popen, report path)
+
+    Raises:
+        ValueError: No file uploaded or an invalid session id
+    """
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        raise ValueError("Upload a recording in the 'file' field.")
+
+    job_id = uuid.uuid4().hex[:12]
+    session_id = check_id(request.form.get('session', job_id))
+    job_dir = os.path.join(UPLOADS_DIR, job_id)
+    os.makedirs(job_dir, exist_ok=True)
+    media_path = os.path.join(job_dir, "recording" + os.path.splitext(upload.filename)[1])
+    upload.save(media_path)
+    output = os.path.abspath(os.path.join(job_dir, "report.json"))
+
+    cmd = [sys.executable, "-m", "offline", media_path,
+           "--session", session_id,
+           "--workers", str(max(1, (os.cpu_count() or 1) // MAX_OFFLINE_JOBS)),
+           "--output", output]
+    if request.form.get('script'):
+        script_path = os.path.join(job_dir, "script.txt")
+        with open(script_path, "w") as f:
+            f.write(request.form['script'])
+        cmd += ["--script", script_path]
+
+    # Separate process so the pose process pool never shares the server's workers
+    with open(os.path.join(job_dir, "log.txt"), "w") as log:  # the child keeps its own copy
+        process = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+    return job_id, process, output
+
+@app.route('/analyze_recording', methods=['POST'])
+def analyze_recording_upload():
+    """
+    Upload a recorded video/audio file (multipart field 'file') for offline analysis.
+    Optional form fields: session, user, script. Poll /analyze_recording/<job_id> for the report.
+    """
+    # Checked before the body is parsed, so a busy worker doesn't receive the whole upload first
+    if not offline_slots.acquire(blocking=False):
+        return jsonify({"status": "error", "message": "Too many recordings are being analyzed, try again later.",
+                        "retry_after": 30}), 429, {"Retry-After": "30"}
+    try:
+        job_id, process, output = start_offline_job()
+    except ValueError as e:
+        offline_slots.release()
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except OSError as e:
+        offline_slots.release()
+        return jsonify({"status": "error", "message": f"Could not start the analysis: {e}"}), 500
+    except Exception:
+        offline_slots.release()  # e.g. 413 for an upload over MAX_CONTENT_LENGTH
+        raise
+    user_id = request.form.get('user', 'anonymous')
+    offline_jobs[job_id] = process
+    get_state_store().set(job_key(job_id), {"status": "processing", "output": output, "user": user_id,
+                                            "worker": WORKER_ID, "started_at": time.time()})
+    threading.Thread(target=watch_offline_job, args=(job_id, process, output, user_id), daemon=True).start()
+    return jsonify({"status": "processing", "job_id": job_id}), 202
+
+@app.route('/analyze_recording/<job_id>')
+def analyze_recording_status(job_id):
+    job = get_state_store().get(job_key(job_id))
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown job."}), 404
+
+    if job["status"] == "processing":
+        return jsonify({"status": "processing", "job_id": job_id})
+    if job["status"] == "error" or "report" not in job:
+        return jsonify({"status": "error", "job_id": job_id, "message": "Offline analysis failed."}), 500
+    return jsonify({"status": "complete", "job_id": job_id, "report": job["report"]})
+
+
+@app.route('/session_state')
+def session_state():
+    """Shared state of ?session= as every worker sees it, plus which worker answered"""
+    session_id = request.args.get('session', DEFAULT_SESSION)
+    state = SessionState(session_id)
+    script = state.get("script")
+    return jsonify({
+        "session": session_id,
+        "worker": WORKER_ID,
+        "store": state.store.describe(),
+        "owner": state.owner(),
+        "script_version": script["version"] if script else None,
+        "eeg": state.get("eeg"),
+        "gesture": state.get("gesture")
+    })
+
+@app.route('/memory')
+def session_memory():
+    """
+    Approximate memory held by the live state of ?session= (per component, plus the event
+    timeline) on this worker, or of every session and the process RSS without ?session=
+    """
+    session_id = request.args.get('session')
+    if session_id:
+        return jsonify(ledger.session(session_id))
+    return jsonify(ledger.snapshot())
+
+@app.route('/metrics')
+def get_metrics():
+    """Hot-path latency / depth histograms, Prometheus text format or ?format=json"""
+    if request.args.get('format') == 'json':
+        return jsonify(metrics.snapshot())
+    return Response(metrics.prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/governor')
+def get_governor():
+    """Degradation level, admitted sessions, CPU use per subsystem and SLO misses (governor.py)"""
+    return jsonify(governor.snapshot())
+
+@app.route('/startup_report')
+def get_startup_report():
+    """Import/initialization cost per subsystem and startup milestones"""
+    return jsonify(startup_report())
+
+
+mark("app_ready")
+# Warm heavy subsystems in the background once the server is listening.
+# ORATOR_PREWARM is a comma-separated list ("" disables). Pose, camera and eeg stay on-demand
+# by default: the pose model is hundreds of MB per worker and only video sessions need it.
+# Spawned helper processes (ORATOR_POSE_WORKERS) re-import this module and must not prewarm
+if multiprocessing.parent_process() is None:
+    prewarm(os.environ.get("ORATOR_PREWARM", "speech,coach").split(","))
+    governor.start()
+
+
 if __name__ == "__main__":
     # Use PORT from environment variable for Railway/production, default to 8000 for local
     port = int(os.environ.get("PORT", 8000))
@@ -0,0 +1,185 @@
+"""
+Low-overhead hot-path instrumentation.
+
+Histograms have fixed buckets and only count observations (no per-sample storage), so
+observing a value is a bisect plus two additions under a lock. They are exposed on
+/metrics in the Prometheus text format (or JSON with ?format=json).
+
+Per-chunk / per-frame logging goes through debug(), which is sampled and disabled by
+default. Set ORATOR_DEBUG_SAMPLE=N to print every Nth message of each kind
+(1 = everything). Arguments are only formatted for messages that are actually printed.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Optional, Sequence
+
+# Milliseconds, roughly x2 per bucket from sub-millisecond to a minute
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+# Queue depths / counts
+DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+DEBUG_SAMPLE = int(os.environ.get("ORATOR_DEBUG_SAMPLE", "0") or 0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a running sum and max"""
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    @contextmanager
+    def time(self):
+        """Observe the duration of the block in milliseconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe((time.perf_counter() - started) * 1000)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th quantile (None without observations)"""
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if total == 0:
+            return None
+        rank = q * total
+        seen = 0
+        for bound, n in zip(self.buckets + (self.max,), counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def bucket_counts(self) -> list:
+        """Copy of the per-bucket counts (diff two copies for a windowed view)"""
+        with self._lock:
+            return list(self.counts)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            count, total, peak = self.count, self.sum, self.max
+        return {
+            "count": count,
+            "mean": round(total / count, 3) if count else None,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": round(peak, 3) if count else None,
+        }
+
+    def prometheus(self) -> str:
+        with self._lock:
+            counts, count, total = list(self.counts), self.count, self.sum
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            lines.append(f'{self.name}_bucket{{le="{bound:g}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {count}')
+        lines.append(f"{self.name}_sum {total:.6g}")
+        lines.append(f"{self.name}_count {count}")
+        return "\n".join(lines)
+
+
+class Counter:
+    """Monotonic counter (drops, overflows, ...)"""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self) -> dict:
+        return {"value": self.value}
+
+    def prometheus(self) -> str:
+        return "\n".join([f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter",
+                          f"{self.name} {self.value:g}"])
+
+
+_registry: Dict[str, object] = {}
+_registry_lock = threading.Lock()
+
+
+def histogram(name: str, description: str = "", buckets: Sequence[float] = LATENCY_BUCKETS_MS) -> Histogram:
+    """Get or create the histogram `name` (modules call this once at import time)"""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = Histogram(name, description, buckets)
+        return _registry[name]
+
+
+def counter(name: str, description: str = "") -> Counter:
+    """Get or create the counter `name`"""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = Counter(name, description)
+        return _registry[name]
+
+
+def snapshot() -> dict:
+    """Summary of every histogram and counter, for /metrics?format=json"""
+    with _registry_lock:
+        items = sorted(_registry.items())
+    return {name: hist.snapshot() for name, hist in items}
+
+
+def prometheus() -> str:
+    with _registry_lock:
+        items = sorted(_registry.items())
+    return "\n".join(hist.prometheus() for _, hist in items) + "\n"
+
+
+# Hot-path histograms shared by the subsystems
+pose_frame_ms = histogram("orator_pose_frame_ms", "Pose inference + tracking per frame (ms)")
+jpeg_encode_ms = histogram("orator_jpeg_encode_ms", "JPEG encode per streamed frame (ms)")
+audio_queue_depth = histogram("orator_audio_queue_depth", "Recognizer frames waiting in the audio ingest buffer",
+                              DEPTH_BUCKETS)
+speech_result_latency_ms = histogram("orator_speech_result_latency_ms",
+                                     "Recognizer result arrival minus when the end of its audio was sent (ms)")
+llm_round_trip_ms = histogram("orator_llm_round_trip_ms", "Coaching LLM request round trip (ms)")
+eeg_processing_ms = histogram("orator_eeg_processing_ms", "EEG filtering and band power features (ms)")
+
+
+_debug_counts: Dict[str, int] = {}
+
+
+def debug(kind: str, message: str, *args) -> None:
+    """
+    Sampled debug print, a no-op unless ORATOR_DEBUG_SAMPLE is set
+
+    Args:
+        kind: Message kind, each kind is sampled separately
+        message: %-style format string, only formatted when printed
+    """
+    if not DEBUG_SAMPLE:
+        return
+    n = _debug_counts.get(kind, 0)
+    _debug_counts[kind] = n + 1
+    if n % DEBUG_SAMPLE == 0:
+        print(f"[{kind} #{n + 1}] " + (message % args if args else message))
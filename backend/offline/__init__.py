@@ -0,0 +1 @@
+# Offline (non-live) analysis of recorded presentations
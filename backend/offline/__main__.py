@@ -0,0 +1,65 @@
+"""
+Analyze a recorded presentation from the command line
+
+    python -m offline talk.mp4 --script script.txt --session coach-review-1 --output report.json
+"""
+
+import argparse
+import json
+import re
+
+from dotenv import load_dotenv
+
+from session.recorder import check_id
+
+from .analyze import SAMPLE_FPS, analyze_recording
+
+
+def session_for_path(path: str) -> str:
+    """Default session id: the file name without extension, reduced to a valid id ("my talk.final" -> "my-talk-final")"""
+    stem = path.replace("\\", "/").rsplit("/", 1)[-1].rsplit(".", 1)[0]
+    return re.sub(r"[^A-Za-z0-9_-]+", "-", stem).strip("-")[:64] or "recording"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Orator analysis of a video or audio recording")
+    parser.add_argument("path", help="Recorded video or audio file")
+    parser.add_argument("--session", default=None, help="Session id to store the recording under (default: file name)")
+    parser.add_argument("--script", default=None, help="Text file with the presentation script")
+    parser.add_argument("--workers", type=int, default=None, help="Pose worker processes (default: CPU count)")
+    parser.add_argument("--sample-fps", type=float, default=SAMPLE_FPS, help="Pose samples per second of video")
+    parser.add_argument("--no-feedback", action="store_true", help="Skip the AI coach feedback calls")
+    parser.add_argument("--output", default=None, help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    session_id = args.session or session_for_path(args.path)
+    try:
+        check_id(session_id)
+    except ValueError as e:
+        parser.error(str(e))
+
+    load_dotenv()
+
+    script = ""
+    if args.script:
+        with open(args.script) as f:
+            script = f.read()
+
+    report = analyze_recording(
+        args.path,
+        session_id,
+        script=script,
+        workers=args.workers,
+        sample_fps=args.sample_fps,
+        feedback=not args.no_feedback
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output} ({report['timing']['realtime_factor']}x realtime)")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+# Batch analysis of a recorded presentation (video or audio file)
+#
+# Pose runs in a process pool, one shard of the video per task, and each shard's keypoints
+# are scored in a single vectorized pass by video.features. Transcription and AI
+# feedback are network bound, so they run on threads alongside the pose workers.
+# Everything is merged into the same event timeline / recording format as a live session.
+
+import math
+import multiprocessing
+import os
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from audio.openai import PresentationAnalyzer
+from audio.streaming_speech_to_text import StreamingSpeechRecognizer
+from session import events
+from session.events import EventBus
+from session.recorder import SessionRecorder, check_id
+from session.report import report_for_path
+from video.features import GESTURE_KEYS, gesture_features
+
+SAMPLE_FPS = 10              # pose samples per second of video
+EVAL_INTERVAL = 2.0          # same cadence as process_frame
+HISTORY_SECONDS = 15         # history kept by record_keypoints, replayed as shard warm-up
+MIN_SHARD_SECONDS = 60
+BATCH_SIZE = 8               # frames per model.predict call
+AUDIO_SEGMENT_SECONDS = 240  # keeps each streaming recognition call under the API stream limit
+PCM_CHUNK_BYTES = 16000      # 0.5 s of 16 kHz LINEAR16
+FEEDBACK_THREADS = 4
+
+
+def probe_video(path: str) -> Tuple[float, int]:
+    """Return (fps, frame_count), (0, 0) when the file has no decodable video"""
+    cap = cv2.VideoCapture(path)  # pylint: disable=no-member
+    try:
+        if not cap.isOpened():
+            return 0.0, 0
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0  # pylint: disable=no-member
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)  # pylint: disable=no-member
+        return fps, frames
+    finally:
+        cap.release()
+
+
+def probe_duration(path: str) -> float:
+    """Container duration in seconds via ffprobe (0 if unknown)"""
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+            capture_output=True, text=True, timeout=30
+        )
+        return float(out.stdout.strip() or 0)
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return 0.0
+
+
+# ======== pose workers (separate processes) ========= #
+_worker = {}
+
+
+def _init_pose_worker(threads: int) -> None:
+    """Load the pose model once per worker, limiting torch threads so workers don't oversubscribe cores"""
+    import torch
+    torch.set_num_threads(threads)
+    cv2.setNumThreads(1)  # pylint: disable=no-member
+    os.environ["ORATOR_POSE_WORKERS"] = "0"  # already a worker process, batches go to the model directly
+    from video import gesture
+    gesture.load_model()
+    _worker["gesture"] = gesture
+
+
+def _analyze_video_shard(path: str, start_frame: int, end_frame: int, fps: float,
+                         sample_fps: float) -> List[Tuple[float, dict]]:
+    """
+    Run the process_frame gesture logic over frames [start_frame, end_frame)
+
+    The shard starts decoding HISTORY_SECONDS early so the history windows are full at
+    start_frame, and evaluates on a global EVAL_INTERVAL grid so shards line up.
+
+    Returns:
+        List of (media_time, gesture result) pairs
+    """
+    gesture = _worker["gesture"]
+    stride = max(1, round(fps / sample_fps))
+    first = max(0, start_frame - int(HISTORY_SECONDS * fps))
+
+    # Pose first, then score the whole shard in one vectorized pass
+    frame_index, keypoints = [], []
+    batch_frames, batch_index = [], []
+
+    def run_batch():
+        results = gesture.model.predict(batch_frames, conf=0.7, verbose=False)
+        for index, result in zip(batch_index, results):
+            if result.keypoints is not None and len(result.keypoints.xy) > 0:
+                frame_index.append(index)
+                keypoints.append(result.keypoints.xy[0].cpu().numpy())
+        batch_frames.clear()
+        batch_index.clear()
+
+    cap = cv2.VideoCapture(path)  # pylint: disable=no-member
+    cap.set(cv2.CAP_PROP_POS_FRAMES, first)  # pylint: disable=no-member
+    try:
+        for index in range(first, end_frame):
+            if index % stride:
+                # grab() skips the colour conversion of frames we don't analyze
+                if not cap.grab():
+                    break
+                continue
+            ok, frame = cap.read()
+            if not ok:
+                break
+            batch_frames.append(frame)
+            batch_index.append(index)
+            if len(batch_frames) >= BATCH_SIZE:
+                run_batch()
+        if batch_frames:
+            run_batch()
+    finally:
+        cap.release()
+
+    if not keypoints:
+        return []
+    frame_index = np.asarray(frame_index)
+    ts = frame_index / fps
+    flags = gesture_features(np.stack(keypoints)[:, None], ts, hip_duration=EVAL_INTERVAL)
+
+    # First detection at or after each EVAL_INTERVAL grid point, like process_frame's timer
+    output = []
+    next_eval = math.floor(ts[0] / EVAL_INTERVAL) * EVAL_INTERVAL + EVAL_INTERVAL
+    for i in range(len(ts)):
+        if ts[i] < next_eval:
+            continue
+        next_eval = math.floor(ts[i] / EVAL_INTERVAL) * EVAL_INTERVAL + EVAL_INTERVAL
+        if frame_index[i] >= start_frame:
+            output.append((float(ts[i]), {key: int(flags[key][i, 0]) for key in GESTURE_KEYS}))
+    return output
+
+
+# ======== audio (threads) ========= #
+def iter_pcm(path: str, start: float, duration: float, chunk_bytes: int = PCM_CHUNK_BYTES):
+    """Stream-decode a slice of the file's audio track to 16 kHz mono LINEAR16 with ffmpeg"""
+    cmd = [
+        "ffmpeg", "-nostdin", "-loglevel", "error",
+        "-ss", f"{start:.3f}", "-t", f"{duration:.3f}", "-i", path,
+        "-vn", "-ac", "1", "-ar", "16000", "-f", "s16le", "-"
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    try:
+        while True:
+            chunk = proc.stdout.read(chunk_bytes)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+
+def _transcribe_segment(path: str, start: float, duration: float) -> List[dict]:
+    """Final transcripts of one audio segment with start/end placed on the media clock"""
+    finals = []
+
+    def on_result(result):
+        if result.get("error"):
+            print(f"Offline transcription error at {start:.0f}s: {result['error']}")
+        elif result.get("is_final") and result.get("transcript"):
+            finals.append(result)
+
+    # Audio goes faster than real time, so result latency isn't measured
+    StreamingSpeechRecognizer(callback=on_result, measure_latency=False).start_streaming(
+        iter_pcm(path, start, duration))
+
+    segments = []
+    previous_end = start
+    for result in finals:
+        end = start + result["end_time"] if result.get("end_time") is not None else previous_end
+        segments.append({
+            "transcript": result["transcript"],
+            "confidence": result.get("confidence"),
+            "start": previous_end,
+            "end": end
+        })
+        previous_end = end
+    return segments
+
+
+def _feedback_for(analyzer: PresentationAnalyzer, segments: List[dict], i: int) -> Optional[dict]:
+    context = " ".join(s["transcript"] for s in segments[max(0, i - 2):i + 1])
+    result = analyzer.analyze_presentation(live_transcript=segments[i]["transcript"], context_window=context)
+    if not result.get("success"):
+        return None
+    return {
+        "type": "ai_feedback",
+        "feedback": result["feedback"],
+        "stuttering_detected": result["stuttering_detected"],
+        "stuttering_details": result.get("stuttering_details"),
+        "semantic": result.get("semantic"),
+    }
+
+
+# ======== orchestration ========= #
+def analyze_recording(path: str, session_id: str, script: str = "", workers: Optional[int] = None,
+                      sample_fps: float = SAMPLE_FPS, feedback: bool = True,
+                      on_progress: Optional[Callable[[str], None]] = None) -> Dict:
+    """
+    Analyze a recorded presentation and return its performance report
+
+    Args:
+        path: Video or audio file readable by OpenCV / ffmpeg
+        session_id: Session the recording is stored under (ValueError if not a plain name)
+        script: Presentation script (CAPITALIZED PHRASES are key topics)
+        workers: Pose worker processes (default: CPU count)
+        sample_fps: Pose samples per second of video
+        feedback: Also run the AI coach on each final transcript segment
+
+    Returns:
+        Report dict from session.report, plus 'recording_path' and 'timing'
+    """
+    check_id(session_id)  # before any work: the recording is stored under it at the end
+    progress = on_progress or print
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+
+    fps, frame_count = probe_video(path)
+    duration = probe_duration(path) or (frame_count / fps if fps else 0.0)
+    if duration <= 0:
+        raise ValueError(f"Could not read media duration of {path}")
+
+    # Shard the video evenly across workers, but not so thin that warm-up dominates
+    shards = []
+    if fps > 0 and frame_count > 0:
+        n_shards = max(1, min(workers, int(duration // MIN_SHARD_SECONDS) or 1))
+        bounds = [round(i * frame_count / n_shards) for i in range(n_shards + 1)]
+        shards = list(zip(bounds[:-1], bounds[1:]))
+
+    audio_starts = [i * AUDIO_SEGMENT_SECONDS for i in range(math.ceil(duration / AUDIO_SEGMENT_SECONDS))]
+    analyzer = PresentationAnalyzer(script)
+    progress(f"Analyzing {path}: {duration:.0f}s, {len(shards)} video shards, {len(audio_starts)} audio segments")
+
+    gestures: List[Tuple[float, dict]] = []
+    segments: List[dict] = []
+    feedback_results: List[Optional[dict]] = []
+
+    with ThreadPoolExecutor(max_workers=max(len(audio_starts), FEEDBACK_THREADS)) as io_pool:
+        audio_futures = [
+            io_pool.submit(_transcribe_segment, path, start, min(AUDIO_SEGMENT_SECONDS, duration - start))
+            for start in audio_starts
+        ]
+
+        pose_futures = []
+        pose_pool = None
+        if shards:
+            # spawn keeps the workers free of the parent's threads and camera/model state
+            pose_pool = ProcessPoolExecutor(
+                max_workers=len(shards),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_pose_worker,
+                initargs=(max(1, (os.cpu_count() or 1) // len(shards)),)
+            )
+            pose_futures = [pose_pool.submit(_analyze_video_shard, path, s, e, fps, sample_fps) for s, e in shards]
+
+        try:
+            for future in audio_futures:
+                segments.extend(future.result())
+            progress(f"Transcribed {len(segments)} segments")
+            for segment in segments:
+                segment["semantic"] = analyzer.score_segment(segment["transcript"])
+
+            if feedback and segments:
+                feedback_futures = [io_pool.submit(_feedback_for, analyzer, segments, i) for i in range(len(segments))]
+                feedback_results = [f.result() for f in feedback_futures]
+
+            for future in pose_futures:
+                gestures.extend(future.result())
+            progress(f"Scored {len(gestures)} gesture windows")
+        finally:
+            if pose_pool is not None:
+                pose_pool.shutdown()
+
+    # Merge everything into one timeline and record it like a live session
+    bus = EventBus()
+    recorder = SessionRecorder(session_id, topics=analyzer.highlighted_topics, event_bus=bus).start()
+    timeline = [(ts, events.GESTURE, result) for ts, result in gestures]
+    for segment, fb in zip(segments, feedback_results or [None] * len(segments)):
+        timeline.append((segment["end"], events.TRANSCRIPT, segment))
+        if fb is not None:
+            timeline.append((segment["end"], events.FEEDBACK, fb))
+    timeline.sort(key=lambda item: item[0])
+
+    for media_ts, kind, data in timeline:
+        if kind == events.TRANSCRIPT:
+            data = dict(data, start=recorder.t0 + data["start"], end=recorder.t0 + data["end"])
+        bus.publish(session_id, kind, data, ts=recorder.t0 + media_ts)
+    recorder.close()
+
+    report = report_for_path(recorder.path)
+    elapsed = time.perf_counter() - started
+    report["recording_path"] = recorder.path
+    report["timing"] = {
+        "media_seconds": round(duration, 1),
+        "elapsed_seconds": round(elapsed, 1),
+        "realtime_factor": round(duration / elapsed, 2) if elapsed else None,
+    }
+    return report
@@ -0,0 +1,279 @@
+"""
+Session-affinity router in front of several backend workers.
+
+Live session objects (the recognizer stream, an open EEG board, pose trackers) can't
+move between processes, so every request of a session has to reach the same worker.
+The router reads the session id of each request (?session=, the X-Orator-Session
+header, or "default" when there is none, like the endpoints themselves), picks a
+worker by rendezvous hashing and then just pipes bytes, so HTTP, Server-Sent Events,
+MJPEG and WebSocket upgrades all pass through unchanged. Plain HTTP requests are sent
+with Connection: close so every request is routed on its own session id.
+
+    python router.py --workers 4               # spawn 4 workers on PORT+1.. and route PORT
+    python router.py --backend 10.0.0.5:8000 --backend 10.0.0.6:8000   # existing nodes
+
+Rendezvous hashing only remaps the sessions of a worker that goes away. A worker that
+refuses connections is skipped for DOWN_SECONDS and its sessions fall through to their
+next choice. Spawned workers share a session.resp stand-in (or ORATOR_STATE_URL) for the
+state in session/state.py and are restarted when they exit.
+
+Equivalent nginx setup: `hash $arg_session consistent;` in the upstream block.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import importlib.util
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_SESSION = "default"  # same fallback as session.events
+SESSION_HEADER = "x-orator-session"
+MAX_HEAD_BYTES = 64 * 1024
+DOWN_SECONDS = 5.0
+CONNECT_TIMEOUT = 2.0
+PIPE_CHUNK = 64 * 1024
+# Spawned workers run like the Procfile's web process, bound to their own port
+GUNICORN_ARGS = ["--workers", "1", "--timeout", "120", "--worker-class", "gevent", "--worker-connections", "1000"]
+
+Backend = Tuple[str, int]
+
+
+def parse_backend(spec: str) -> Backend:
+    """'host:port' -> (host, port)"""
+    host, _, port = spec.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def session_of(target: str, headers: Dict[str, str]) -> str:
+    """Routing key of a request: ?session=, then the session header, then the default session"""
+    values = parse_qs(urlsplit(target).query).get("session")
+    if values and values[0]:
+        return values[0]
+    return headers.get(SESSION_HEADER) or DEFAULT_SESSION
+
+
+class Router:
+    """
+    Rendezvous-hashed choice of a backend per session
+
+    Args:
+        backends: (host, port) of every worker
+    """
+
+    def __init__(self, backends: List[Backend]):
+        self.backends = list(backends)
+        self.down_until: Dict[Backend, float] = {}
+        self.stats = {"requests": 0, "upgrades": 0, "failovers": 0, "unavailable": 0}
+
+    @staticmethod
+    def _weight(session_id: str, backend: Backend) -> int:
+        digest = hashlib.blake2b(f"{session_id}|{backend[0]}:{backend[1]}".encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+
+    def candidates(self, session_id: str) -> List[Backend]:
+        """Backends in preference order for a session, the ones marked down last"""
+        now = time.monotonic()
+        ranked = sorted(self.backends, key=lambda b: self._weight(session_id, b), reverse=True)
+        return [b for b in ranked if self.down_until.get(b, 0) <= now] + \
+               [b for b in ranked if self.down_until.get(b, 0) > now]
+
+    def mark_down(self, backend: Backend) -> None:
+        self.down_until[backend] = time.monotonic() + DOWN_SECONDS
+
+
+def rewrite_head(request_line: str, headers: List[Tuple[str, str]], upgrade: bool, peer: str) -> bytes:
+    """Request head for the backend: Connection: close unless upgrading, X-Forwarded-For added"""
+    lines = [request_line]
+    for name, value in headers:
+        lowered = name.lower()
+        if not upgrade and lowered in ("connection", "keep-alive"):
+            continue
+        if lowered == "x-forwarded-for":
+            value, peer = f"{value}, {peer}", ""
+        lines.append(f"{name}: {value}")
+    if not upgrade:
+        lines.append("Connection: close")
+    if peer:
+        lines.append(f"X-Forwarded-For: {peer}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            data = await reader.read(PIPE_CHUNK)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        try:
+            writer.close()
+        except Exception:
+            pass
+
+
+async def _error(writer: asyncio.StreamWriter, status: str, message: str) -> None:
+    body = message.encode()
+    writer.write(f"HTTP/1.1 {status}\r\nContent-Type: text/plain\r\nContent-Length: {len(body)}\r\n"
+                 f"Connection: close\r\n\r\n".encode() + body)
+    try:
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def handle(router: Router, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Route one client connection (one HTTP request, or one WebSocket for its lifetime)"""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        writer.close()
+        return
+
+    request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+    try:
+        _, target, _ = request_line.split(" ", 2)
+        headers = [tuple(part.strip() for part in line.split(":", 1)) for line in header_lines]
+        lookup = {name.lower(): value for name, value in headers}
+    except ValueError:
+        await _error(writer, "400 Bad Request", "Malformed request")
+        return
+
+    upgrade = "upgrade" in lookup.get("connection", "").lower()
+    session_id = session_of(target, lookup)
+    peer = (writer.get_extra_info("peername") or ("",))[0]
+    router.stats["requests"] += 1
+    router.stats["upgrades"] += upgrade
+
+    for backend in router.candidates(session_id):
+        try:
+            up_reader, up_writer = await asyncio.wait_for(asyncio.open_connection(*backend), CONNECT_TIMEOUT)
+            break
+        except (OSError, asyncio.TimeoutError):
+            router.mark_down(backend)
+            router.stats["failovers"] += 1
+    else:
+        router.stats["unavailable"] += 1
+        await _error(writer, "503 Service Unavailable", "No backend worker is available")
+        return
+
+    up_writer.write(rewrite_head(request_line, headers, upgrade, peer))
+    # Whatever came in after the head (request body, first WebSocket frames) is still in `reader`
+    tasks = [asyncio.ensure_future(pipe(reader, up_writer)), asyncio.ensure_future(pipe(up_reader, writer))]
+    # Either side closing ends the exchange (the backend closes after each plain HTTP response)
+    await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class WorkerSet:
+    """
+    Local backend processes, each on its own port and restarted on exit. Each runs the
+    Procfile's gunicorn command (GUNICORN_ARGS); without gunicorn installed they fall back
+    to `python main.py`, Flask's development server, which is only fit for local testing.
+
+    Args:
+        count: Worker processes
+        base_port: First worker port
+        state_url: ORATOR_STATE_URL handed to every worker
+    """
+
+    def __init__(self, count: int, base_port: int, state_url: str):
+        self.ports = [base_port + i for i in range(count)]
+        self.state_url = state_url
+        self.processes: Dict[int, subprocess.Popen] = {}
+        self.restarts = 0
+
+    def _spawn(self, port: int) -> None:
+        env = {**os.environ, "PORT": str(port), "ORATOR_STATE_URL": self.state_url,
+               "ORATOR_WORKER_ID": f"worker-{port}"}
+        self.processes[port] = subprocess.Popen(self.command(port), env=env,
+                                                cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    @staticmethod
+    def command(port: int) -> List[str]:
+        if importlib.util.find_spec("gunicorn") is None:
+            return [sys.executable, "main.py"]
+        return [sys.executable, "-m", "gunicorn", "main:app", "--bind", f"127.0.0.1:{port}", *GUNICORN_ARGS]
+
+    def start(self) -> List[Backend]:
+        if importlib.util.find_spec("gunicorn") is None:
+            print("gunicorn is not installed, workers run Flask's development server (python main.py)")
+        for port in self.ports:
+            self._spawn(port)
+        return [("127.0.0.1", port) for port in self.ports]
+
+    async def supervise(self) -> None:
+        while True:
+            await asyncio.sleep(1.0)
+            for port, process in list(self.processes.items()):
+                if process.poll() is not None:
+                    print(f"Worker on port {port} exited ({process.returncode}), restarting")
+                    self._spawn(port)
+                    self.restarts += 1
+
+    def stop(self) -> None:
+        for process in self.processes.values():
+            process.terminate()
+        for process in self.processes.values():
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+async def serve(router: Router, host: str, port: int, workers: Optional[WorkerSet] = None) -> None:
+    server = await asyncio.start_server(lambda r, w: handle(router, r, w), host, port, limit=MAX_HEAD_BYTES)
+    print(f"Routing {host}:{port} by session to {len(router.backends)} workers: "
+          f"{', '.join(f'{h}:{p}' for h, p in router.backends)}")
+    async with server:
+        if workers is not None:
+            asyncio.ensure_future(workers.supervise())
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Local worker processes to spawn (ignored with --backend)")
+    parser.add_argument("--backend", action="append", default=[], help="host:port of an existing worker")
+    parser.add_argument("--state-url", default=os.environ.get("ORATOR_STATE_URL", ""),
+                        help="Shared state store for spawned workers (default: a local session.resp)")
+    args = parser.parse_args()
+
+    workers = None
+    if args.backend:
+        backends = [parse_backend(spec) for spec in args.backend]
+    else:
+        state_url = args.state_url
+        if not state_url:
+            from session.resp import RespServer
+            state_url = RespServer(port=0).start().url
+            print(f"Session state stand-in on {state_url}")
+        workers = WorkerSet(args.workers, args.port + 1, state_url)
+        backends = workers.start()
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        asyncio.run(serve(Router(backends), args.host, args.port, workers))
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        if workers is not None:
+            workers.stop()
+
+
+if __name__ == "__main__":
+    main()
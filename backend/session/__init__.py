@@ -0,0 +1 @@
+# Session-level state shared across the audio, video and EEG subsystems
@@ -0,0 +1,229 @@
+# In-process event bus shared by the speech, gesture and EEG pipelines
+
+import bisect
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+# Event kinds published by the producers in main.py
+GESTURE = "gesture"
+TRANSCRIPT = "transcript"
+STRESS = "stress"
+FEEDBACK = "feedback"
+
+DEFAULT_SESSION = "default"
+
+# Seconds of events a timeline keeps in memory (the session recording has all of them)
+TIMELINE_SECONDS = float(os.environ.get("ORATOR_TIMELINE_SECONDS", "900"))
+
+
+def now() -> float:
+    """Shared clock for every event. Monotonic so ordering survives wall-clock jumps."""
+    return time.monotonic()
+
+
+class Event(NamedTuple):
+    ts: float
+    session_id: str
+    kind: str
+    data: dict
+
+    def to_dict(self) -> dict:
+        return {"ts": self.ts, "session": self.session_id, "kind": self.kind, "data": self.data}
+
+
+class Subscription:
+    """
+    Handle returned by EventBus.subscribe
+
+    Queue subscribers pull events with get(); callback subscribers are invoked inline
+    from publish() and should stay cheap.
+    """
+
+    def __init__(self, bus: "EventBus", session_id: str, kinds: Optional[Iterable[str]],
+                 callback: Optional[Callable[[Event], None]], maxsize: int):
+        self.bus = bus
+        self.session_id = session_id
+        self.kinds = frozenset(kinds) if kinds else None
+        self.callback = callback
+        self.queue = None if callback else queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def wants(self, event: Event) -> bool:
+        return self.kinds is None or event.kind in self.kinds
+
+    def deliver(self, event: Event) -> None:
+        if self.callback is not None:
+            self.callback(event)
+            return
+        # Slow consumers lose the oldest event instead of stalling the producer
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """Block for the next event, returns None on timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        self.bus.unsubscribe(self)
+
+
+class SessionTimeline:
+    """
+    Bounded, time-ordered index of the events of one session: at most max_events,
+    none older than max_age seconds before the newest one
+    """
+
+    def __init__(self, max_events: int, max_age: Optional[float] = None):
+        self.max_events = max_events
+        self.max_age = max_age
+        self.times: List[float] = []
+        self.events: List[Event] = []
+
+    def append(self, event: Event) -> None:
+        if not self.times or event.ts >= self.times[-1]:
+            self.times.append(event.ts)
+            self.events.append(event)
+        else:
+            # Late producer (e.g. a sentence stamped with its start time)
+            i = bisect.bisect_right(self.times, event.ts)
+            self.times.insert(i, event.ts)
+            self.events.insert(i, event)
+
+        # Trim in chunks so the cost of dropping old events is amortized
+        overflow = len(self.times) - self.max_events
+        if self.max_age is not None and self.times[0] < self.times[-1] - self.max_age * 1.25:
+            overflow = max(overflow, bisect.bisect_left(self.times, self.times[-1] - self.max_age))
+        elif overflow <= self.max_events // 4:
+            return
+        if overflow > 0:
+            del self.times[:overflow]
+            del self.events[:overflow]
+
+    def window(self, start: float, end: float, kinds: Optional[Iterable[str]] = None) -> List[Event]:
+        lo = bisect.bisect_left(self.times, start)
+        hi = bisect.bisect_right(self.times, end)
+        selected = self.events[lo:hi]
+        if kinds:
+            kinds = set(kinds)
+            selected = [e for e in selected if e.kind in kinds]
+        return selected
+
+    def latest(self, kind: str) -> Optional[Event]:
+        for event in reversed(self.events):
+            if event.kind == kind:
+                return event
+        return None
+
+
+class EventBus:
+    """
+    Every producer publishes monotonic-timestamped events here. Consumers either
+    subscribe to a live push stream or query a time window of a session.
+    """
+
+    def __init__(self, max_events_per_session: int = 20000, max_age: Optional[float] = TIMELINE_SECONDS):
+        self.max_events_per_session = max_events_per_session
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._timelines: Dict[str, SessionTimeline] = {}
+        self._subscribers: Dict[str, List[Subscription]] = {}
+        self._published = 0
+
+    def publish(self, session_id: str, kind: str, data: dict, ts: Optional[float] = None) -> Event:
+        """
+        Record an event in the session timeline and push it to subscribers
+
+        Args:
+            session_id: Session the event belongs to
+            kind: One of GESTURE, TRANSCRIPT, STRESS, FEEDBACK (or any custom kind)
+            data: JSON-serializable payload
+            ts: Timestamp on the shared clock, defaults to now()
+
+        Returns:
+            The published Event
+        """
+        event = Event(now() if ts is None else ts, session_id, kind, data)
+        with self._lock:
+            timeline = self._timelines.get(session_id)
+            if timeline is None:
+                timeline = self._timelines[session_id] = SessionTimeline(self.max_events_per_session, self.max_age)
+            timeline.append(event)
+            subscribers = list(self._subscribers.get(session_id, ()))
+            self._published += 1
+            if self._published % 1024 == 0:
+                self._drop_idle_locked(event.ts)
+
+        for sub in subscribers:
+            if sub.wants(event):
+                try:
+                    sub.deliver(event)
+                except Exception as e:
+                    print(f"Event subscriber error: {e}")
+        return event
+
+    def subscribe(self, session_id: str, kinds: Optional[Iterable[str]] = None,
+                  callback: Optional[Callable[[Event], None]] = None, maxsize: int = 256) -> Subscription:
+        sub = Subscription(self, session_id, kinds, callback, maxsize)
+        with self._lock:
+            self._subscribers.setdefault(session_id, []).append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subscribers.get(sub.session_id)
+            if subs and sub in subs:
+                subs.remove(sub)
+                if not subs:
+                    del self._subscribers[sub.session_id]
+
+    def window(self, session_id: str, start: float, end: float,
+               kinds: Optional[Iterable[str]] = None) -> List[Event]:
+        """Events of a session with start <= ts <= end, optionally filtered by kind"""
+        with self._lock:
+            timeline = self._timelines.get(session_id)
+            return timeline.window(start, end, kinds) if timeline else []
+
+    def latest(self, session_id: str, kind: str) -> Optional[Event]:
+        with self._lock:
+            timeline = self._timelines.get(session_id)
+            return timeline.latest(kind) if timeline else None
+
+    def events(self, session_id: str) -> List[Event]:
+        """Every event of a session still in memory, oldest first"""
+        with self._lock:
+            timeline = self._timelines.get(session_id)
+            return list(timeline.events) if timeline else []
+
+    def sessions(self) -> List[str]:
+        with self._lock:
+            return list(self._timelines)
+
+    def _drop_idle_locked(self, now_ts: float) -> None:
+        # Timelines of sessions that ended (nothing published for max_age, nobody subscribed)
+        if self.max_age is None:
+            return
+        for session_id, timeline in list(self._timelines.items()):
+            if timeline.times and timeline.times[-1] < now_ts - self.max_age and session_id not in self._subscribers:
+                del self._timelines[session_id]
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            self._timelines.pop(session_id, None)
+
+
+# Process-wide bus used by main.py
+bus = EventBus()
@@ -0,0 +1,158 @@
+# Per-session memory accounting for the live state each connection keeps
+
+import os
+import sys
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from .events import bus as default_bus, EventBus
+
+# Rolling windows of live session state. Everything older is in the session recording
+# (SessionRecorder writes every transcript, gesture, stress and feedback event to disk).
+TRANSCRIPT_WINDOW = int(os.environ.get("ORATOR_TRANSCRIPT_WINDOW", "8"))  # final segments kept per stream
+FEEDBACK_WINDOW = int(os.environ.get("ORATOR_FEEDBACK_WINDOW", "16"))     # coaching results kept per analyzer
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process, None where /proc isn't available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # Peak rather than current outside Linux, kilobytes on Linux / bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """
+    Approximate bytes held by obj and everything it references (containers, numpy arrays,
+    plain objects' __dict__). Objects reachable twice are counted once.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    # numpy arrays report their own buffer (views don't), like every scalar / string
+    if hasattr(obj, "dtype") or isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+    # Snapshot containers first (one C call) so producers appending meanwhile don't break iteration
+    if isinstance(obj, dict):
+        for key, value in list(obj.items()):
+            size += deep_sizeof(key, seen) + deep_sizeof(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        for item in tuple(obj):
+            size += deep_sizeof(item, seen)
+    elif hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+class Tracked:
+    """One registered component, close() when the connection holding it ends"""
+
+    def __init__(self, ledger: "MemoryLedger", session_id: str, name: str, source: Callable[[], object]):
+        self.ledger = ledger
+        self.session_id = session_id
+        self.name = name
+        self.source = source
+        self.closed = False
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.ledger._release(self)
+
+
+class MemoryLedger:
+    """
+    Live state of each session, measured on demand
+
+    Connections register what they hold (ledger.track(session_id, "transcript", lambda:
+    window)) and close the handle when they end. session() walks the registered objects,
+    plus the session's event timeline, and reports approximate bytes per component.
+
+    Args:
+        event_bus: Bus whose timelines are counted as the "event_timeline" component
+    """
+
+    def __init__(self, event_bus: Optional[EventBus] = None):
+        self.bus = event_bus or default_bus
+        self._lock = threading.Lock()
+        self._tracked: Dict[str, List[Tracked]] = {}
+
+    def track(self, session_id: str, name: str, source: Callable[[], object]) -> Tracked:
+        """
+        Register a component of a session
+
+        Args:
+            session_id: Session the component belongs to
+            name: Component name, components of the same name add up (two uploads, ...)
+            source: Returns the object(s) to measure, called on every measurement
+        """
+        handle = Tracked(self, session_id, name, source)
+        with self._lock:
+            self._tracked.setdefault(session_id, []).append(handle)
+        return handle
+
+    def _release(self, handle: Tracked) -> None:
+        with self._lock:
+            handles = self._tracked.get(handle.session_id)
+            if handles and handle in handles:
+                handles.remove(handle)
+                if not handles:
+                    del self._tracked[handle.session_id]
+
+    def sessions(self) -> List[str]:
+        """Sessions with registered components or an event timeline"""
+        with self._lock:
+            tracked = set(self._tracked)
+        return sorted(tracked | set(self.bus.sessions()))
+
+    def session(self, session_id: str) -> dict:
+        """
+        Approximate memory of one session
+
+        Returns:
+            dict with bytes per component, total_bytes and the number of tracked components
+        """
+        with self._lock:
+            handles = list(self._tracked.get(session_id, ()))
+        components: Dict[str, int] = {}
+        seen = set()
+        for handle in handles:
+            try:
+                size = deep_sizeof(handle.source(), seen)
+            except Exception as e:
+                print(f"Memory accounting of {session_id}/{handle.name} failed: {e}")
+                continue
+            components[handle.name] = components.get(handle.name, 0) + size
+        timeline = self.bus.events(session_id)
+        components["event_timeline"] = deep_sizeof(timeline, seen)
+        return {
+            "session": session_id,
+            "components": components,
+            "total_bytes": sum(components.values()),
+            "timeline_events": len(timeline),
+            "tracked": len(handles),
+        }
+
+    def snapshot(self) -> dict:
+        """Process RSS and the accounting of every session"""
+        sessions = [self.session(session_id) for session_id in self.sessions()]
+        return {
+            "rss_bytes": rss_bytes(),
+            "sessions_bytes": sum(s["total_bytes"] for s in sessions),
+            "sessions": sessions,
+        }
+
+
+# Process-wide ledger used by main.py
+ledger = MemoryLedger()
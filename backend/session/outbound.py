@@ -0,0 +1,171 @@
+"""
+Outbound WebSocket messages of a /stream_audio session.
+
+The recognizer produces many interim results per second and each one repeats the whole
+sentence so far. OutboundChannel:
+  - serializes with orjson when installed (json otherwise), or MessagePack binary
+    frames when the client asks for ?framing=msgpack and msgpack is installed
+  - serializes concurrent senders (recognizer thread, coaching thread, receive loop)
+  - throttles interim transcripts to ORATOR_INTERIM_HZ with a trailing send, so the last
+    interim of a burst is never lost, and finals always go out immediately
+  - with ?delta=1, sends interims as the changed suffix against the text the client
+    already has instead of the whole transcript
+
+Delta interims look like {"type": "interim", "seq": 7, "base": 6, "keep": 31, "append": "..."}:
+text = (text of seq `base`)[:keep] + append. A WebSocket is ordered and reliable, so the
+last text sent is the client's text; a client that lost track replies {"resync": true}
+and the next interim is sent whole (base 0).
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+try:
+    import orjson
+except ImportError:  # optional, ~3x faster than json for these small dicts
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional, only for clients requesting ?framing=msgpack
+    msgpack = None
+
+import metrics
+
+INTERIM_HZ = float(os.environ.get("ORATOR_INTERIM_HZ", "5"))
+
+messages_sent = metrics.counter("orator_ws_messages_sent", "Messages sent to /stream_audio clients")
+bytes_sent = metrics.counter("orator_ws_bytes_sent", "Payload bytes sent to /stream_audio clients")
+interims_coalesced = metrics.counter("orator_interims_coalesced", "Interim transcripts replaced before sending")
+
+
+def dumps(message: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(message).decode()
+    return json.dumps(message, separators=(",", ":"))
+
+
+def common_prefix(a: str, b: str) -> int:
+    """Length of the shared prefix of a and b"""
+    n = min(len(a), len(b))
+    if a[:n] == b[:n]:
+        return n
+    lo, hi = 0, n
+    # Binary search on slice equality is C-speed per probe
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+class OutboundChannel:
+    """
+    Args:
+        send: ws.send
+        framing: "json" or "msgpack" (falls back to json when msgpack isn't installed)
+        delta: Send interim transcripts as suffix deltas
+        interim_hz: Max interim transcripts per second (0 = unthrottled)
+    """
+
+    def __init__(self, send: Callable, framing: str = "json", delta: bool = False,
+                 interim_hz: float = INTERIM_HZ):
+        self._send = send
+        self.framing = "msgpack" if framing == "msgpack" and msgpack is not None else "json"
+        self.delta = delta
+        self.min_interval = 1.0 / interim_hz if interim_hz > 0 else 0.0
+        # Re-entrant: transcript state changes and their sends happen under one lock, so a
+        # trailing interim can never overtake the final that replaced it
+        self.lock = threading.RLock()
+        self.closed = False
+        # Interim state
+        self.seq = 0
+        self.base_seq = 0
+        self.base_text = ""
+        self.pending: Optional[dict] = None
+        self.last_interim = 0.0
+        self.timer: Optional[threading.Timer] = None
+        self.stats = {"messages": 0, "bytes": 0, "interims_in": 0, "interims_out": 0}
+
+    def describe(self) -> dict:
+        return {"framing": self.framing, "delta": self.delta,
+                "interim_hz": round(1.0 / self.min_interval, 2) if self.min_interval else None}
+
+    def _write(self, message: dict) -> None:
+        payload = msgpack.packb(message, use_bin_type=True) if self.framing == "msgpack" else dumps(message)
+        with self.lock:
+            if self.closed:
+                return
+            self._send(payload)
+            self.stats["messages"] += 1
+            self.stats["bytes"] += len(payload)
+        messages_sent.inc()
+        bytes_sent.inc(len(payload))
+
+    def send(self, message: dict) -> None:
+        """Send any message right away (feedback, errors, control messages)"""
+        self._write(message)
+
+    def transcript(self, result: dict) -> None:
+        """Deliver a recognizer result: finals immediately, interims throttled"""
+        if result.get("error") or result.get("is_final"):
+            with self.lock:
+                self._cancel_timer()
+                self.pending = None
+                self.base_text, self.base_seq = "", 0
+                self._write(result)
+            return
+
+        self.stats["interims_in"] += 1
+        with self.lock:
+            if self.pending is not None:
+                interims_coalesced.inc()
+            self.pending = result
+            wait = self.last_interim + self.min_interval - time.monotonic()
+            if wait > 0:
+                # Trailing send so the newest interim always arrives within one interval
+                if self.timer is None:
+                    self.timer = threading.Timer(wait, self._flush)
+                    self.timer.daemon = True
+                    self.timer.start()
+                return
+        self._flush()
+
+    def _cancel_timer(self) -> None:
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def _flush(self) -> None:
+        with self.lock:
+            self.timer = None
+            result, self.pending = self.pending, None
+            if result is None or self.closed:
+                return
+            self.last_interim = time.monotonic()
+            message = result
+            if self.delta:
+                text = result.get("transcript") or ""
+                keep = common_prefix(self.base_text, text)
+                self.seq += 1
+                message = {"type": "interim", "seq": self.seq, "base": self.base_seq,
+                           "keep": keep, "append": text[keep:], "stability": result.get("stability"),
+                           "end_time": result.get("end_time")}
+                self.base_text, self.base_seq = text, self.seq
+            self.stats["interims_out"] += 1
+            self._write(message)
+
+    def resync(self) -> None:
+        """Client lost the delta base: send the next interim whole"""
+        with self.lock:
+            self.base_text, self.base_seq = "", 0
+
+    def close(self) -> None:
+        with self.lock:
+            self._cancel_timer()
+            self.closed = True
@@ -0,0 +1,184 @@
+# Embedded SQLite store of per-session summary metrics for tracking progress over time,
+# and of each user's calm EEG baseline per device
+
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+PROGRESS_DB = os.environ.get("ORATOR_PROGRESS_DB", "progress.db")
+
+# Summary metrics persisted per session (all REAL, NULL when not measured)
+METRICS = (
+    "duration_minutes",
+    "words_per_minute",
+    "filler_rate",
+    "stress_share",
+    "topic_coverage",
+    "stillness",
+    "pacing",
+    "hip_sway",
+    "head_tilt",
+    "hand_to_mouth",
+    "clarity",
+    "confidence",
+    "presence",
+)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS sessions (
+    user_id TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    session_id TEXT NOT NULL,
+    recording_id TEXT NOT NULL,
+    {", ".join(f"{name} REAL" for name in METRICS)},
+    PRIMARY KEY (user_id, started_at, recording_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sessions_by_time ON sessions (started_at);
+CREATE TABLE IF NOT EXISTS eeg_baselines (
+    user_id TEXT NOT NULL,
+    device_id TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    alpha_beta REAL NOT NULL,
+    theta_beta REAL NOT NULL,
+    epochs INTEGER NOT NULL,
+    ci REAL,
+    PRIMARY KEY (user_id, device_id)
+) WITHOUT ROWID;
+"""
+
+
+def summary_row(report: Dict, user_id: str) -> Dict:
+    """Flatten a report from session.report.build_report into a store row"""
+    summary = report.get("summary", {})
+    row = {
+        "user_id": user_id,
+        "started_at": report.get("started_at") or 0.0,
+        "session_id": report["session_id"],
+        "recording_id": report["recording_id"],
+    }
+    for name in METRICS:
+        row[name] = summary.get(name)
+    return row
+
+
+class ProgressStore:
+    """
+    Per-session summary metrics keyed by user and start time.
+
+    The primary key (user_id, started_at) doubles as the index used by trend(),
+    so a user's history is one contiguous range scan.
+    """
+
+    def __init__(self, path: str = PROGRESS_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def ingest(self, rows: Iterable[Dict]) -> int:
+        """
+        Insert (or replace) a batch of session rows in a single transaction
+
+        Returns:
+            Number of rows written
+        """
+        columns = ("user_id", "started_at", "session_id", "recording_id") + METRICS
+        values = [tuple(row.get(c) for c in columns) for row in rows]
+        if not values:
+            return 0
+        sql = (f"INSERT OR REPLACE INTO sessions ({', '.join(columns)}) "
+               f"VALUES ({', '.join('?' for _ in columns)})")
+        with self._lock, self._conn:
+            self._conn.executemany(sql, values)
+        return len(values)
+
+    def trend(self, user_id: str, metrics: Optional[List[str]] = None, since: Optional[float] = None,
+              until: Optional[float] = None, limit: Optional[int] = None) -> Dict[str, list]:
+        """
+        Time series of metrics across a user's sessions, oldest first
+
+        Args:
+            user_id: User to query
+            metrics: Subset of METRICS (default: all)
+            since/until: Optional unix time bounds on session start
+            limit: Only return the most recent N sessions
+
+        Returns:
+            Column-oriented dict: {"started_at": [...], "session_id": [...], <metric>: [...]}
+        """
+        metrics = list(metrics or METRICS)
+        unknown = [m for m in metrics if m not in METRICS]
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(unknown)}")
+
+        where = ["user_id = ?"]
+        params: list = [user_id]
+        if since is not None:
+            where.append("started_at >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("started_at <= ?")
+            params.append(until)
+
+        sql = (f"SELECT started_at, session_id, {', '.join(metrics)} FROM sessions "
+               f"WHERE {' AND '.join(where)} ORDER BY started_at DESC")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        rows.reverse()
+
+        names = ["started_at", "session_id"] + metrics
+        series = {name: [] for name in names}
+        for row in rows:
+            for name, value in zip(names, row):
+                series[name].append(value)
+        return series
+
+    def save_baseline(self, user_id: str, device_id: str, baseline: Dict[str, float], recorded_at: float,
+                      epochs: int, ci: Optional[float] = None) -> None:
+        """Remember a user's calm EEG baseline on a device (replacing the previous one)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO eeg_baselines VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (user_id, device_id, recorded_at, baseline["alpha_beta"], baseline["theta_beta"], epochs, ci)
+            )
+
+    def baseline(self, user_id: str, device_id: str) -> Optional[Dict]:
+        """
+        Last stored baseline of a user on a device
+
+        Returns:
+            dict with alpha_beta, theta_beta, recorded_at, epochs and ci, or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT recorded_at, alpha_beta, theta_beta, epochs, ci FROM eeg_baselines "
+                "WHERE user_id = ? AND device_id = ?", (user_id, device_id)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("recorded_at", "alpha_beta", "theta_beta", "epochs", "ci"), row))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# Opened on first use so importing main.py doesn't touch the disk
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_progress_store() -> ProgressStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ProgressStore()
+        return _store
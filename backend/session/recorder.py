@@ -0,0 +1,200 @@
+# Records the event timeline of a session to a compact columnar file on disk
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from . import events
+from .events import Event, EventBus, bus as default_bus
+
+RECORDINGS_DIR = os.environ.get("ORATOR_RECORDINGS_DIR", "recordings")
+
+# Single-word fillers plus multi-word ones matched on the raw text
+FILLER_WORDS = {"um", "uh", "uhm", "umm", "er", "erm", "ah", "like", "basically", "literally"}
+FILLER_PHRASES = ("you know", "i mean", "kind of", "sort of")
+
+# Session and recording ids become directory names under RECORDINGS_DIR
+SAFE_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+GESTURE_KEYS = ("hipsway", "pacing", "headtilt", "handtomouth", "toostill")
+
+# Event kind <-> compact code stored in the 'kind' column
+KIND_CODES = {events.TRANSCRIPT: 1, events.GESTURE: 2, events.STRESS: 3, events.FEEDBACK: 4}
+
+# Column name -> dtype. Every event writes one row to every column.
+COLUMNS = {
+    "ts": np.float64,
+    "kind": np.uint8,
+    "words": np.uint16,
+    "fillers": np.uint16,
+    "duration": np.float32,
+    "topics": np.uint64,  # bitmask of highlighted topics mentioned (first 64)
+    "hipsway": np.uint8,
+    "pacing": np.uint8,
+    "headtilt": np.uint8,
+    "handtomouth": np.uint8,
+    "toostill": np.uint8,
+    "stressed": np.uint8,
+    "stuttering": np.uint8,
+}
+
+
+def count_fillers(text: str) -> int:
+    lowered = text.lower()
+    words = re.findall(r"[a-z']+", lowered)
+    count = sum(1 for w in words if w in FILLER_WORDS)
+    for phrase in FILLER_PHRASES:
+        count += lowered.count(phrase)
+    return count
+
+
+def check_id(value: str, what: str = "session id") -> str:
+    """value if it is safe to use as a directory name, ValueError otherwise"""
+    if not isinstance(value, str) or not SAFE_ID.fullmatch(value):
+        raise ValueError(f"Invalid {what}: use 1-64 letters, digits, '_' or '-'")
+    return value
+
+
+def recording_path(session_id: str, recording_id: Optional[str] = None) -> Optional[str]:
+    """
+    Directory of a recording, the most recent one for the session if recording_id is None.
+    Raises ValueError for ids that aren't plain names (see check_id).
+    """
+    check_id(session_id)
+    if recording_id is not None:
+        check_id(recording_id, "recording id")
+    session_dir = os.path.join(RECORDINGS_DIR, session_id)
+    if recording_id is not None:
+        path = os.path.join(session_dir, recording_id)
+        return path if os.path.isdir(path) else None
+    if not os.path.isdir(session_dir):
+        return None
+    recordings = sorted(os.listdir(session_dir))
+    return os.path.join(session_dir, recordings[-1]) if recordings else None
+
+
+class SessionRecorder:
+    """
+    Appends transcript, gesture, EEG and feedback events of one session to disk.
+
+    Layout of a recording directory:
+        meta.json    - session id, highlighted topics, clock origin
+        <column>.bin - one raw little-endian array per entry in COLUMNS
+        text.jsonl   - transcript and feedback text, keyed by row number
+    """
+
+    def __init__(self, session_id: str, topics: Optional[List[str]] = None,
+                 event_bus: Optional[EventBus] = None, flush_every: int = 256):
+        self.session_id = check_id(session_id)
+        self.topics = list(topics or [])[:64]
+        self._topic_needles = [t.lower() for t in self.topics]
+        self.bus = event_bus or default_bus
+        self.flush_every = flush_every
+
+        # Time-ordered, and unique when two connections of a session start in the same second
+        self.recording_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.path = os.path.join(RECORDINGS_DIR, session_id, self.recording_id)
+        self.rows = 0
+        self.t0 = None
+        self._buffer: Dict[str, list] = {name: [] for name in COLUMNS}
+        self._text: List[str] = []
+        self._lock = threading.Lock()
+        self._subscription = None
+
+    def start(self) -> "SessionRecorder":
+        os.makedirs(self.path, exist_ok=True)
+        self.t0 = events.now()
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump({
+                "session_id": self.session_id,
+                "recording_id": self.recording_id,
+                "topics": self.topics,
+                "started_at": time.time(),
+                "t0": self.t0,
+                "columns": {name: np.dtype(dtype).str for name, dtype in COLUMNS.items()},
+            }, f)
+        self._subscription = self.bus.subscribe(self.session_id, kinds=KIND_CODES, callback=self.record)
+        return self
+
+    def record(self, event: Event) -> None:
+        row = dict.fromkeys(COLUMNS, 0)
+        row["ts"] = event.ts
+        row["kind"] = KIND_CODES[event.kind]
+        data = event.data
+        text = None
+
+        if event.kind == events.TRANSCRIPT:
+            text = data.get("transcript", "")
+            lowered = text.lower()
+            row["words"] = len(text.split())
+            row["fillers"] = count_fillers(text)
+            row["duration"] = max(0.0, data.get("end", event.ts) - data.get("start", event.ts))
+            mask = 0
+            for bit, needle in enumerate(self._topic_needles):
+                if needle in lowered:
+                    mask |= 1 << bit
+            row["topics"] = mask
+        elif event.kind == events.GESTURE:
+            for key in GESTURE_KEYS:
+                row[key] = 1 if data.get(key) else 0
+        elif event.kind == events.STRESS:
+            row["stressed"] = 1 if data.get("stressed") else 0
+        elif event.kind == events.FEEDBACK:
+            row["stuttering"] = 1 if data.get("stuttering_detected") else 0
+            text = data.get("feedback")
+
+        with self._lock:
+            for name in COLUMNS:
+                self._buffer[name].append(row[name])
+            if text:
+                self._text.append(json.dumps({"row": self.rows, "kind": event.kind, "text": text}))
+            self.rows += 1
+            if len(self._buffer["ts"]) >= self.flush_every:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._buffer["ts"]:
+            return
+        for name, dtype in COLUMNS.items():
+            with open(os.path.join(self.path, f"{name}.bin"), "ab") as f:
+                np.asarray(self._buffer[name], dtype=dtype).tofile(f)
+            self._buffer[name] = []
+        if self._text:
+            with open(os.path.join(self.path, "text.jsonl"), "a") as f:
+                f.write("\n".join(self._text) + "\n")
+            self._text = []
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        if self._subscription is not None:
+            self._subscription.close()
+            self._subscription = None
+        self.flush()
+
+
+def load_recording(path: str) -> Dict:
+    """
+    Load a recording directory written by SessionRecorder
+
+    Returns:
+        Dictionary with 'meta' and 'columns' (name -> numpy array)
+    """
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    columns = {}
+    for name, dtype in meta["columns"].items():
+        column_file = os.path.join(path, f"{name}.bin")
+        if os.path.exists(column_file):
+            columns[name] = np.fromfile(column_file, dtype=np.dtype(dtype))
+        else:
+            columns[name] = np.zeros(0, dtype=np.dtype(dtype))
+    return {"meta": meta, "columns": columns}
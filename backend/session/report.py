@@ -0,0 +1,140 @@
+# Post-session performance report built from a recorded event timeline
+
+from typing import Dict
+
+import numpy as np
+
+from .recorder import GESTURE_KEYS, KIND_CODES, load_recording
+from . import events
+
+
+def _share(hits: np.ndarray, totals: np.ndarray) -> np.ndarray:
+    """hits / totals per bucket, NaN where a bucket has no samples"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(totals > 0, hits / np.maximum(totals, 1), np.nan)
+
+
+def _popcount(masks: np.ndarray) -> np.ndarray:
+    bits = np.unpackbits(masks.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1)
+    return bits.sum(axis=1)
+
+
+def _nan_to_none(values: np.ndarray) -> list:
+    return [None if np.isnan(v) else round(float(v), 3) for v in values]
+
+
+def build_report(recording: Dict, bucket_seconds: float = 60.0) -> Dict:
+    """
+    Aggregate a recording into per-minute metrics and an overall summary
+
+    Args:
+        recording: Output of load_recording()
+        bucket_seconds: Width of a report bucket (default: one minute)
+
+    Returns:
+        Dictionary with 'minutes' (list of per-bucket metrics) and 'summary'
+    """
+    meta = recording["meta"]
+    cols = recording["columns"]
+    n_topics = len(meta.get("topics", []))
+
+    ts = cols["ts"]
+    if len(ts) == 0:
+        return {"session_id": meta["session_id"], "recording_id": meta["recording_id"],
+                "minutes": [], "summary": {}}
+
+    kind = cols["kind"]
+    bucket = ((ts - meta["t0"]) // bucket_seconds).astype(np.int64)
+    bucket -= min(bucket.min(), 0)
+    n = int(bucket.max()) + 1
+
+    def per_bucket(weights=None):
+        return np.bincount(bucket, weights=weights, minlength=n)
+
+    is_transcript = kind == KIND_CODES[events.TRANSCRIPT]
+    is_gesture = kind == KIND_CODES[events.GESTURE]
+    is_stress = kind == KIND_CODES[events.STRESS]
+    is_feedback = kind == KIND_CODES[events.FEEDBACK]
+
+    words = per_bucket(cols["words"] * is_transcript)
+    fillers = per_bucket(cols["fillers"] * is_transcript)
+    speaking = per_bucket(cols["duration"] * is_transcript)
+
+    gesture_samples = per_bucket(is_gesture.astype(np.float64))
+    gesture_share = {key: _share(per_bucket(cols[key] * is_gesture), gesture_samples) for key in GESTURE_KEYS}
+
+    stress_share = _share(per_bucket(cols["stressed"] * is_stress), per_bucket(is_stress.astype(np.float64)))
+    stutter_share = _share(per_bucket(cols["stuttering"] * is_feedback), per_bucket(is_feedback.astype(np.float64)))
+
+    # Topic coverage: OR the mention bitmasks per bucket, then carry forward across buckets
+    order = np.argsort(bucket, kind="stable")
+    sorted_bucket = bucket[order]
+    starts = np.searchsorted(sorted_bucket, np.arange(n))
+    masks = np.where(is_transcript, cols["topics"], 0).astype(np.uint64)[order]
+    bucket_masks = np.zeros(n, dtype=np.uint64)
+    present = np.bincount(bucket, minlength=n) > 0
+    bucket_masks[present] = np.bitwise_or.reduceat(masks, starts[present])
+    covered = _popcount(np.bitwise_or.accumulate(bucket_masks))
+    coverage = covered / n_topics if n_topics else np.full(n, np.nan)
+
+    bucket_minutes = bucket_seconds / 60.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        filler_share_per_bucket = np.where(words > 0, fillers / np.maximum(words, 1), np.nan)
+    series = {
+        "words_per_minute": np.round(words / bucket_minutes, 1),
+        "filler_rate": np.round(fillers / bucket_minutes, 2),
+        "filler_share": filler_share_per_bucket,
+        "speaking_seconds": np.round(speaking, 1),
+        "stillness": gesture_share["toostill"],
+        "pacing": gesture_share["pacing"],
+        "hip_sway": gesture_share["hipsway"],
+        "head_tilt": gesture_share["headtilt"],
+        "hand_to_mouth": gesture_share["handtomouth"],
+        "stress_share": stress_share,
+        "stutter_share": stutter_share,
+        "topic_coverage": coverage,
+    }
+    columns = {name: _nan_to_none(values) for name, values in series.items()}
+    minutes = [dict(minute=i, **{name: values[i] for name, values in columns.items()}) for i in range(n)]
+
+    total_words = float(words.sum())
+    total_minutes = n * bucket_minutes
+    gesture_total = float(gesture_samples.sum())
+    flags_total = sum(float((cols[key] * is_gesture).sum()) for key in GESTURE_KEYS)
+    stress_total = float(is_stress.sum())
+
+    mentioned = int(np.bitwise_or.reduce(bucket_masks))
+    filler_share = float(fillers.sum()) / total_words if total_words else 0.0
+    stress_overall = float((cols["stressed"] * is_stress).sum()) / stress_total if stress_total else None
+    flag_share = flags_total / (gesture_total * len(GESTURE_KEYS)) if gesture_total else None
+
+    summary = {
+        "duration_minutes": round(total_minutes, 2),
+        "words": int(total_words),
+        "words_per_minute": round(total_words / total_minutes, 1),
+        "fillers": int(fillers.sum()),
+        "filler_rate": round(float(fillers.sum()) / total_minutes, 2),
+        "stress_share": None if stress_overall is None else round(stress_overall, 3),
+        **{name: None if not gesture_total else round(float((cols[key] * is_gesture).sum()) / gesture_total, 3)
+           for name, key in (("stillness", "toostill"), ("pacing", "pacing"), ("hip_sway", "hipsway"),
+                             ("head_tilt", "headtilt"), ("hand_to_mouth", "handtomouth"))},
+        "topic_coverage": None if not n_topics else round(float(coverage[-1]), 3),
+        "topics_missed": [t for bit, t in enumerate(meta.get("topics", [])) if not mentioned >> bit & 1],
+        # 0-100 headline scores promised by the README
+        "clarity": round(100 * max(0.0, 1.0 - 5 * filler_share), 1),
+        "confidence": None if stress_overall is None else round(100 * (1.0 - stress_overall), 1),
+        "presence": None if flag_share is None else round(100 * (1.0 - flag_share), 1),
+    }
+
+    return {
+        "session_id": meta["session_id"],
+        "recording_id": meta["recording_id"],
+        "started_at": meta.get("started_at"),
+        "topics": meta.get("topics", []),
+        "minutes": minutes,
+        "summary": summary,
+    }
+
+
+def report_for_path(path: str, bucket_seconds: float = 60.0) -> Dict:
+    return build_report(load_recording(path), bucket_seconds)
@@ -0,0 +1,180 @@
+"""
+Local Redis-compatible stand-in for the shared session state.
+
+Speaks the subset of RESP2 that session.state.RedisStore uses (PING, GET, SET with
+EX/PX/NX, DEL, EXISTS, EXPIRE, TTL, KEYS, SCAN, SELECT, AUTH, FLUSHDB, DBSIZE), keeping
+everything in memory. router.py starts one for its workers when ORATOR_STATE_URL isn't
+set, and it's enough to run several workers on one machine without installing Redis:
+
+    python -m session.resp --port 6380
+    ORATOR_STATE_URL=redis://127.0.0.1:6380/0 python main.py
+
+Not a database: no persistence, no replication, one keyspace for every db number.
+"""
+
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+DEFAULT_PORT = 6380
+
+
+class Keyspace:
+    """Bytes values with optional absolute expiry (monotonic seconds)"""
+
+    def __init__(self):
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.lock = threading.Lock()
+
+    def live(self, key: bytes) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return item[0]
+
+    def live_keys(self, pattern: bytes):
+        pattern = pattern.decode()
+        return [k for k in list(self.data) if self.live(k) is not None and fnmatch.fnmatchcase(k.decode(), pattern)]
+
+
+def _bulk(value: Optional[bytes]) -> bytes:
+    return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def _array(items) -> bytes:
+    return b"*%d\r\n" % len(items) + b"".join(_bulk(item) for item in items)
+
+
+def _int(value: int) -> bytes:
+    return b":%d\r\n" % value
+
+
+OK = b"+OK\r\n"
+
+
+def execute(keyspace: Keyspace, args) -> bytes:
+    """Reply to one command"""
+    name, args = args[0].upper(), args[1:]
+    with keyspace.lock:
+        if name == b"PING":
+            return b"+PONG\r\n" if not args else _bulk(args[0])
+        if name in (b"SELECT", b"AUTH", b"CLIENT"):
+            return OK
+        if name == b"GET":
+            return _bulk(keyspace.live(args[0]))
+        if name == b"SET":
+            key, value, expires, options = args[0], args[1], None, [a.upper() for a in args[2:]]
+            if b"EX" in options:
+                expires = time.monotonic() + float(args[2 + options.index(b"EX") + 1])
+            elif b"PX" in options:
+                expires = time.monotonic() + float(args[2 + options.index(b"PX") + 1]) / 1000
+            if b"NX" in options and keyspace.live(key) is not None:
+                return b"$-1\r\n"
+            keyspace.data[key] = (value, expires)
+            return OK
+        if name == b"DEL":
+            return _int(sum(keyspace.data.pop(k, None) is not None for k in args))
+        if name == b"EXISTS":
+            return _int(sum(keyspace.live(k) is not None for k in args))
+        if name == b"EXPIRE":
+            value = keyspace.live(args[0])
+            if value is None:
+                return _int(0)
+            keyspace.data[args[0]] = (value, time.monotonic() + float(args[1]))
+            return _int(1)
+        if name == b"TTL":
+            if keyspace.live(args[0]) is None:
+                return _int(-2)
+            expires = keyspace.data[args[0]][1]
+            return _int(-1 if expires is None else int(expires - time.monotonic()))
+        if name == b"KEYS":
+            return _array(keyspace.live_keys(args[0]))
+        if name == b"SCAN":
+            # One pass over everything: cursor 0 in, cursor 0 out
+            options = [a.upper() for a in args[1:]]
+            pattern = args[1 + options.index(b"MATCH") + 1] if b"MATCH" in options else b"*"
+            return b"*2\r\n" + _bulk(b"0") + _array(keyspace.live_keys(pattern))
+        if name == b"DBSIZE":
+            return _int(len(keyspace.live_keys(b"*")))
+        if name == b"FLUSHDB" or name == b"FLUSHALL":
+            keyspace.data.clear()
+            return OK
+    return b"-ERR unknown command '%s'\r\n" % name
+
+
+def read_command(stream):
+    """One client command (RESP array or inline), or None at EOF"""
+    line = stream.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.split() or [b"PING"]
+    args = []
+    for _ in range(int(line[1:-2])):
+        size = int(stream.readline()[1:-2])
+        args.append(stream.read(size + 2)[:-2])
+    return args
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                args = read_command(self.rfile)
+            except (OSError, ValueError):
+                return
+            if args is None:
+                return
+            try:
+                reply = execute(self.server.keyspace, args)
+            except (IndexError, ValueError) as e:
+                reply = b"-ERR %s\r\n" % str(e).encode()
+            self.wfile.write(reply)
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    """
+    In-memory RESP server
+
+    Args:
+        host: Bind address
+        port: TCP port (0 picks a free one, see .port)
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        super().__init__((host, port), _Handler)
+        self.keyspace = Keyspace()
+        self.port = self.server_address[1]
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"redis://{self.server_address[0]}:{self.port}/0"
+
+    def start(self) -> "RespServer":
+        """Serve on a daemon thread"""
+        self.thread = threading.Thread(target=self.serve_forever, name="resp-server", daemon=True)
+        self.thread.start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    server = RespServer(args.host, args.port)
+    print(f"Session state server on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
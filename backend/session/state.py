@@ -0,0 +1,277 @@
+"""
+Session state shared by every worker process and node.
+
+The script posted to /transcript, the latest gesture result, the EEG binding and
+baseline of a session and offline analysis jobs used to live in one process's globals,
+so a /transcript POST and the /stream_audio socket of the same session had to hit the
+same process. They now go through a StateStore picked by ORATOR_STATE_URL:
+
+    (unset) / memory://      MemoryStore, this process only (single-worker deployments)
+    redis://host:port/db     RedisStore, any Redis-compatible server (Redis, Valkey,
+                             KeyDB, or session/resp.py as a local stand-in)
+
+Values are small JSON documents with a TTL. Live objects that can't be shared (the
+recognizer stream, an open BrainFlow board, pose trackers) stay in the process the
+session is routed to; router.py keeps a session on one worker, and the store lets any
+other worker answer for it.
+"""
+
+import abc
+import json
+import os
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+STATE_URL = os.environ.get("ORATOR_STATE_URL", "")
+SESSION_TTL = int(os.environ.get("ORATOR_SESSION_TTL", str(12 * 3600)))
+KEY_PREFIX = "orator:"
+WORKER_ID = os.environ.get("ORATOR_WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+
+
+class StateStore(abc.ABC):
+    """JSON documents by key, with optional expiry"""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[dict]:
+        ...
+
+    @abc.abstractmethod
+    def set(self, key: str, value: dict, ttl: Optional[float] = SESSION_TTL) -> None:
+        ...
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    def keys(self, prefix: str) -> List[str]:
+        ...
+
+    def describe(self) -> dict:
+        return {"backend": type(self).__name__}
+
+
+class MemoryStore(StateStore):
+    """Process-local store (one worker, or tests)"""
+
+    def __init__(self):
+        self.data: Dict[str, Tuple[str, Optional[float]]] = {}
+        self.lock = threading.Lock()
+        self.writes = 0
+
+    def _live(self, key: str, now: float) -> Optional[str]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= now:
+            del self.data[key]
+            return None
+        return item[0]
+
+    def get(self, key: str) -> Optional[dict]:
+        with self.lock:
+            raw = self._live(key, time.monotonic())
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: dict, ttl: Optional[float] = SESSION_TTL) -> None:
+        # Serialized like the shared stores, so callers can't keep mutating what they stored
+        raw = json.dumps(value)
+        now = time.monotonic()
+        with self.lock:
+            self.data[key] = (raw, now + ttl if ttl else None)
+            self.writes += 1
+            if self.writes % 1024 == 0:
+                # Expired keys of sessions nobody reads anymore would otherwise stay forever
+                for k in list(self.data):
+                    self._live(k, now)
+
+    def delete(self, key: str) -> None:
+        with self.lock:
+            self.data.pop(key, None)
+
+    def keys(self, prefix: str) -> List[str]:
+        now = time.monotonic()
+        with self.lock:
+            return sorted(k for k in list(self.data) if k.startswith(prefix) and self._live(k, now) is not None)
+
+
+class RespError(Exception):
+    """Error reply from a Redis-compatible server"""
+
+
+def encode_command(*args) -> bytes:
+    """RESP array of bulk strings"""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def read_reply(stream):
+    """One RESP2 reply from a buffered binary stream"""
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("Connection closed by the state server")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        raise RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        size = int(rest)
+        if size < 0:
+            return None
+        data = stream.read(size + 2)
+        return data[:-2]
+    if kind == b"*":
+        size = int(rest)
+        return None if size < 0 else [read_reply(stream) for _ in range(size)]
+    raise ConnectionError(f"Malformed reply from the state server: {line[:40]!r}")
+
+
+class RedisStore(StateStore):
+    """
+    Minimal RESP client (GET / SET EX / DEL / SCAN), one connection per thread
+
+    Args:
+        url: redis://[:password@]host:port/db
+        timeout: Socket timeout in seconds
+    """
+
+    def __init__(self, url: str, timeout: float = 2.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.strip("/") or 0)
+        self.password = parsed.password
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = (sock, sock.makefile("rb"))
+        self.local.conn = conn
+        if self.password:
+            self._roundtrip(conn, "AUTH", self.password)
+        if self.db:
+            self._roundtrip(conn, "SELECT", self.db)
+        return conn
+
+    @staticmethod
+    def _roundtrip(conn, *args):
+        sock, stream = conn
+        sock.sendall(encode_command(*args))
+        return read_reply(stream)
+
+    def command(self, *args):
+        """Send one command, reconnecting once if the connection went away"""
+        for attempt in (0, 1):
+            conn = getattr(self.local, "conn", None)
+            try:
+                if conn is None:
+                    conn = self._connect()
+                return self._roundtrip(conn, *args)
+            except (OSError, ConnectionError):
+                self.local.conn = None
+                if conn is not None:
+                    conn[0].close()
+                if attempt:
+                    raise
+
+    def get(self, key: str) -> Optional[dict]:
+        raw = self.command("GET", key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: dict, ttl: Optional[float] = SESSION_TTL) -> None:
+        if ttl:
+            self.command("SET", key, json.dumps(value), "EX", max(1, int(ttl)))
+        else:
+            self.command("SET", key, json.dumps(value))
+
+    def delete(self, key: str) -> None:
+        self.command("DEL", key)
+
+    def keys(self, prefix: str) -> List[str]:
+        found, cursor = set(), "0"
+        while True:
+            cursor, batch = self.command("SCAN", cursor, "MATCH", prefix + "*", "COUNT", 500)
+            found.update(k.decode() for k in batch)
+            if cursor in (b"0", "0"):
+                return sorted(found)
+
+    def describe(self) -> dict:
+        return {"backend": type(self).__name__, "url": f"redis://{self.host}:{self.port}/{self.db}"}
+
+
+def open_store(url: str = STATE_URL) -> StateStore:
+    """StateStore for an ORATOR_STATE_URL"""
+    scheme = urlparse(url).scheme if url else "memory"
+    if scheme == "memory":
+        return MemoryStore()
+    if scheme in ("redis", "resp"):
+        return RedisStore(url)
+    raise ValueError(f"Unsupported ORATOR_STATE_URL '{url}', expected memory:// or redis://")
+
+
+class SessionState:
+    """
+    Shared state of one coaching session
+
+    Args:
+        session_id: Session id (also the routing key, see router.py)
+        store: Backing store (default: this process's get_state_store())
+    """
+
+    def __init__(self, session_id: str, store: Optional[StateStore] = None):
+        self.session_id = session_id
+        self.store = store or get_state_store()
+
+    def _key(self, name: str) -> str:
+        return f"{KEY_PREFIX}session:{self.session_id}:{name}"
+
+    def get(self, name: str) -> Optional[dict]:
+        return self.store.get(self._key(name))
+
+    def set(self, name: str, value: dict) -> None:
+        self.store.set(self._key(name), value)
+
+    def delete(self, name: str) -> None:
+        self.store.delete(self._key(name))
+
+    def update(self, name: str, **fields) -> dict:
+        """Merge fields into a document (last writer wins, sessions are routed to one worker)"""
+        value = {**(self.get(name) or {}), **fields}
+        self.set(name, value)
+        return value
+
+    def touch(self) -> None:
+        """Record that this worker serves the session right now"""
+        self.set("owner", {"worker": WORKER_ID, "seen_at": time.time()})
+
+    def owner(self) -> Optional[str]:
+        owner = self.get("owner")
+        return owner["worker"] if owner else None
+
+
+def job_key(job_id: str) -> str:
+    return f"{KEY_PREFIX}job:{job_id}"
+
+
+# Opened on first use so importing main.py doesn't connect anywhere
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_state_store() -> StateStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = open_store()
+        return _store
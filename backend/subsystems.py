@@ -0,0 +1,121 @@
+"""
+Lazily initialized backend subsystems.
+
+Heavy imports (Ultralytics + YOLO weights, BrainFlow/scipy/pandas, the Google Speech and
+OpenAI SDKs) and the camera are loaded on first use instead of when main.py is imported,
+so audio-only sessions don't pay for video and the server starts listening right away.
+Subsystems can also be pre-warmed in the background once the server is up.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional
+
+process_started = time.perf_counter()
+
+
+class Subsystem:
+    """
+    A named, thread-safe, initialize-once resource
+
+    The loader receives a `stage` context manager so it can break its cost down, e.g.
+        with stage("import"): import ultralytics
+        with stage("init"): model = ...
+    """
+
+    def __init__(self, name: str, loader: Callable):
+        self.name = name
+        self.loader = loader
+        self.state = "idle"
+        self.value = None
+        self.error: Optional[str] = None
+        self.stages: Dict[str, float] = {}
+        self.total_seconds: Optional[float] = None
+        self.loaded_by: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _stage(self, label: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[label] = self.stages.get(label, 0.0) + time.perf_counter() - started
+
+    def get(self, reason: str = "request"):
+        """Return the loaded value, initializing it on the first call"""
+        if self.state == "ready":
+            return self.value
+        with self._lock:
+            if self.state == "ready":
+                return self.value
+            self.state = "loading"
+            started = time.perf_counter()
+            try:
+                self.value = self.loader(self._stage)
+            except Exception as e:
+                self.state = "failed"
+                self.error = str(e)
+                self.total_seconds = time.perf_counter() - started
+                raise
+            self.total_seconds = time.perf_counter() - started
+            self.loaded_by = reason
+            self.loaded_at = time.perf_counter() - process_started
+            self.error = None
+            self.state = "ready"
+            print(f"✓ {self.name} initialized in {self.total_seconds:.2f}s ({reason})")
+            return self.value
+
+    def report(self) -> dict:
+        return {
+            "state": self.state,
+            "stages": {k: round(v, 3) for k, v in self.stages.items()},
+            "total_seconds": None if self.total_seconds is None else round(self.total_seconds, 3),
+            "loaded_by": self.loaded_by,
+            "loaded_at_seconds": None if self.loaded_at is None else round(self.loaded_at, 3),
+            "error": self.error,
+        }
+
+
+registry: Dict[str, Subsystem] = {}
+marks: Dict[str, float] = {}
+
+
+def subsystem(name: str):
+    """Decorator registering a loader function as a lazy subsystem"""
+    def register(loader):
+        registry[name] = Subsystem(name, loader)
+        return registry[name]
+    return register
+
+
+def mark(label: str) -> None:
+    """Record a startup milestone (seconds since this module was imported)"""
+    marks[label] = round(time.perf_counter() - process_started, 3)
+
+
+def prewarm(names: Iterable[str], delay: float = 1.0) -> None:
+    """Initialize subsystems in a background thread after `delay` seconds"""
+    names = [n for n in names if n in registry]
+    if not names:
+        return
+
+    def run():
+        time.sleep(delay)
+        for name in names:
+            try:
+                registry[name].get(reason="prewarm")
+            except Exception as e:
+                print(f"✗ Pre-warming {name} failed: {e}")
+
+    threading.Thread(target=run, name="subsystem-prewarm", daemon=True).start()
+
+
+def startup_report() -> dict:
+    return {
+        "marks": dict(marks),
+        "uptime_seconds": round(time.perf_counter() - process_started, 3),
+        "subsystems": {name: s.report() for name, s in registry.items()},
+    }
@@ -0,0 +1,181 @@
+"""
+Pose model inference backends.
+
+The default is PyTorch eager on the .pt weights. On CPU-only hosts the model can instead
+be exported once to ONNX Runtime or OpenVINO (optionally int8-quantized), cached on disk,
+and loaded through Ultralytics' AutoBackend so model.predict keeps the same API.
+
+Environment:
+    ORATOR_POSE_BACKEND   torch | onnx | openvino      (default: torch)
+    ORATOR_POSE_INT8      1 to quantize                (default: 0)
+    ORATOR_POSE_IMGSZ     export/inference size        (default: 640; ROI inference has its
+                          own ORATOR_POSE_ROI_SIZE, see video/roi.py, which onnx and
+                          openvino can't use: their exports have a fixed input size)
+    ORATOR_POSE_THREADS   intra-op threads for inference
+    ORATOR_POSE_CPUS      CPU list for the inference pools, e.g. "2-5" or "2,3"
+    ORATOR_MODEL_CACHE    export cache directory       (default: ~/.cache/orator/models)
+"""
+
+import os
+import shutil
+import threading
+import time
+from typing import Optional, Set
+
+import numpy as np
+
+POSE_WEIGHTS = "yolo11n-pose.pt"
+BACKENDS = ("torch", "onnx", "openvino")
+STATIC_BACKENDS = ("onnx", "openvino")  # exported with a fixed input size (ORATOR_POSE_IMGSZ)
+DEFAULT_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "orator", "models")
+
+
+def parse_cpus(spec: Optional[str]) -> Optional[Set[int]]:
+    """'0-3,6' -> {0, 1, 2, 3, 6}"""
+    if not spec:
+        return None
+    cpus = set()
+    for part in spec.split(","):
+        if "-" in part:
+            lo, hi = part.split("-")
+            cpus.update(range(int(lo), int(hi) + 1))
+        elif part.strip():
+            cpus.add(int(part))
+    return cpus
+
+
+def configure_threads(threads: Optional[int]) -> None:
+    """Cap the intra-op thread pools so inference doesn't starve audio/HTTP threads"""
+    if not threads:
+        return
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+    os.environ.setdefault("OPENBLAS_NUM_THREADS", str(threads))
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    try:
+        import cv2
+        cv2.setNumThreads(threads)  # pylint: disable=no-member
+    except ImportError:
+        pass
+
+
+def cached_export_path(weights: str, backend: str, imgsz: int, int8: bool, cache_dir: str) -> str:
+    stem = os.path.splitext(os.path.basename(weights))[0]
+    name = f"{stem}-{imgsz}{'-int8' if int8 else ''}"
+    return os.path.join(cache_dir, name + (".onnx" if backend == "onnx" else "_openvino_model"))
+
+
+def export_model(weights: str, backend: str, imgsz: int = 640, int8: bool = False,
+                 cache_dir: Optional[str] = None, data: Optional[str] = None) -> str:
+    """
+    Export weights for backend once and return the cached artifact path
+
+    Args:
+        weights: Source .pt weights
+        backend: "onnx" or "openvino"
+        imgsz: Static input size baked into the export
+        int8: Quantize (OpenVINO via NNCF calibration, ONNX via dynamic quantization)
+        cache_dir: Where exports are kept between runs
+        data: Calibration dataset yaml for OpenVINO int8 (Ultralytics default if None)
+    """
+    from ultralytics import YOLO
+
+    cache_dir = cache_dir or os.environ.get("ORATOR_MODEL_CACHE", DEFAULT_CACHE)
+    target = cached_export_path(weights, backend, imgsz, int8, cache_dir)
+    if os.path.exists(target):
+        return target
+
+    os.makedirs(cache_dir, exist_ok=True)
+    print(f"Exporting {weights} to {backend}{' int8' if int8 else ''} at {imgsz}px (first run only)...")
+    started = time.perf_counter()
+
+    if backend == "onnx":
+        exported = YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=False, simplify=True)
+        if int8:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(exported, target, weight_type=QuantType.QUInt8)
+        else:
+            shutil.move(exported, target)
+    elif backend == "openvino":
+        kwargs = {"format": "openvino", "imgsz": imgsz, "int8": int8}
+        if int8 and data:
+            kwargs["data"] = data
+        exported = YOLO(weights).export(**kwargs)
+        shutil.move(exported, target)
+    else:
+        raise ValueError(f"Nothing to export for backend '{backend}'")
+
+    print(f"Export cached at {target} ({time.perf_counter() - started:.1f}s)")
+    return target
+
+
+def static_input_size() -> Optional[int]:
+    """Input size the configured backend is fixed to, None for torch (any size per predict)"""
+    if os.environ.get("ORATOR_POSE_BACKEND", "torch") not in STATIC_BACKENDS:
+        return None
+    return int(os.environ.get("ORATOR_POSE_IMGSZ", 640))
+
+
+def warm_up(model, imgsz: int = 640, runs: int = 2) -> float:
+    """Run a few dummy predictions so the first real frame doesn't pay for lazy init. Returns seconds."""
+    started = time.perf_counter()
+    dummy = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+    for _ in range(runs):
+        model.predict(dummy, imgsz=imgsz, verbose=False)
+    return time.perf_counter() - started
+
+
+def _load(backend: str, weights: str, imgsz: int, int8: bool, cache_dir: Optional[str]):
+    from ultralytics import YOLO
+
+    if backend == "torch":
+        return YOLO(weights)
+    return YOLO(export_model(weights, backend, imgsz, int8, cache_dir), task="pose")
+
+
+def load_pose_model(backend: Optional[str] = None, weights: str = POSE_WEIGHTS, imgsz: Optional[int] = None,
+                    int8: Optional[bool] = None, threads: Optional[int] = None, cpus: Optional[Set[int]] = None,
+                    cache_dir: Optional[str] = None, warmup_runs: int = 2):
+    """
+    Load the pose model on the configured backend, warmed up and ready for predict()
+
+    Arguments default to the ORATOR_POSE_* environment variables described above.
+    """
+    backend = backend or os.environ.get("ORATOR_POSE_BACKEND", "torch")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown pose backend '{backend}', expected one of {', '.join(BACKENDS)}")
+    imgsz = imgsz or int(os.environ.get("ORATOR_POSE_IMGSZ", 640))
+    int8 = os.environ.get("ORATOR_POSE_INT8", "0") == "1" if int8 is None else int8
+    threads = threads or (int(os.environ["ORATOR_POSE_THREADS"]) if os.environ.get("ORATOR_POSE_THREADS") else None)
+    cpus = cpus or parse_cpus(os.environ.get("ORATOR_POSE_CPUS"))
+
+    configure_threads(threads)
+
+    loaded = {}
+
+    def load_and_warm():
+        try:
+            if cpus and hasattr(os, "sched_setaffinity"):
+                # Affinity is per thread on Linux; runtime pools created here inherit it
+                # without pinning the server's own threads
+                os.sched_setaffinity(0, cpus)
+            model = _load(backend, weights, imgsz, int8, cache_dir)
+            loaded["warmup"] = warm_up(model, imgsz, warmup_runs) if warmup_runs else 0.0
+            loaded["model"] = model
+        except Exception as e:
+            loaded["error"] = e
+
+    thread = threading.Thread(target=load_and_warm, name="pose-model-loader")
+    thread.start()
+    thread.join()
+    if "error" in loaded:
+        if backend != "torch":
+            print(f"✗ Pose backend '{backend}' failed ({loaded['error']}), falling back to torch")
+            return load_pose_model("torch", weights, imgsz, False, threads, cpus, cache_dir, warmup_runs)
+        raise loaded["error"]
+
+    print(f"✓ Pose model ready: {backend}{' int8' if int8 else ''} {imgsz}px, warm-up {loaded['warmup']:.2f}s")
+    return loaded["model"]
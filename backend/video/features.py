@@ -0,0 +1,207 @@
+"""
+Vectorized gesture feature engine.
+
+Computes the same five heuristics as video/gesture.py (head_tilt, hand_to_mouth,
+too_still, hip_sway, pacing) for every tracked person and every time step of a
+(T, people, 17, 2) keypoint array in one pass, instead of one person per call.
+
+The result at [t, p] is what process_frame would report if it evaluated person p
+at timestamps[t] with the history it had accumulated up to then.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+GESTURE_KEYS = ("hipsway", "pacing", "headtilt", "handtomouth", "toostill")
+HISTORY_SECONDS = 15  # same retention as record_keypoints
+ROW_CHUNK = 4096      # bounds the (rows, window) scratch matrices
+
+
+# ======== per-frame heuristics (fully vectorized over T and people) ========= #
+def head_tilt_flags(keypoints: np.ndarray, sensitivity: float = 1) -> np.ndarray:
+    """head_tilt over (..., 17, 2) keypoints"""
+    avg_eye_y = (keypoints[..., 1, 1] + keypoints[..., 2, 1]) / 2
+    avg_ear_y = (keypoints[..., 3, 1] + keypoints[..., 4, 1]) / 2
+    threshold = np.abs(avg_ear_y - avg_eye_y) * sensitivity
+    return (avg_eye_y > (avg_ear_y - threshold)).astype(np.uint8)
+
+
+def hand_to_mouth_flags(keypoints: np.ndarray, scale_factor: float = 0.8) -> np.ndarray:
+    """hand_to_mouth over (..., 17, 2) keypoints"""
+    threshold = np.linalg.norm(keypoints[..., 5, :] - keypoints[..., 6, :], axis=-1) * scale_factor
+    head_center = keypoints[..., 0:5, :].mean(axis=-2)
+    left = np.linalg.norm(keypoints[..., 9, :] - head_center, axis=-1)
+    right = np.linalg.norm(keypoints[..., 10, :] - head_center, axis=-1)
+    return ((left < threshold) | (right < threshold)).astype(np.uint8)
+
+
+def body_points(keypoints: np.ndarray):
+    """Mid-hip and body-center points, shape (..., 2) each, as in record_keypoints"""
+    hips_mid = (keypoints[..., 11, :] + keypoints[..., 12, :]) / 2
+    shoulders_mid = (keypoints[..., 5, :] + keypoints[..., 6, :]) / 2
+    return hips_mid, (hips_mid + shoulders_mid) / 2
+
+
+# ======== window helpers (one person's dense sample sequence) ========= #
+def _window_start(ts: np.ndarray, duration: float, strict: bool = True) -> np.ndarray:
+    """
+    For each sample j, the first index i with ts[j] - ts[i] < duration (strict) or <= duration.
+    Evaluated with the same subtraction as the reference code so boundary samples agree.
+    """
+    j = np.arange(len(ts))
+    start = np.searchsorted(ts, ts - duration, side="right" if strict else "left")
+    start = np.minimum(start, j)
+
+    def inside(i):
+        d = ts - ts[np.clip(i, 0, len(ts) - 1)]
+        return (d < duration) if strict else (d <= duration)
+
+    # searchsorted works on ts - duration, so fix the rare off-by-one from rounding
+    step_back = (start > 0) & inside(start - 1)
+    start = start - step_back
+    step_forward = (start < j) & ~inside(start)
+    return start + step_forward
+
+
+class _RangeTable:
+    """Sparse table for O(1) range max/min queries over a 1-D array"""
+
+    def __init__(self, values: np.ndarray, op):
+        self.op = op
+        self.levels = [values]
+        k = 1
+        while 2 * k <= len(values):
+            prev = self.levels[-1]
+            self.levels.append(op(prev[:-k], prev[k:]))
+            k *= 2
+
+    def query(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """Inclusive ranges [lo, hi], requires lo <= hi"""
+        length = hi - lo + 1
+        level = np.floor(np.log2(length)).astype(np.int64)
+        out = np.empty(len(lo), dtype=self.levels[0].dtype)
+        for k in np.unique(level):
+            sel = level == k
+            table = self.levels[k]
+            out[sel] = self.op(table[lo[sel]], table[hi[sel] - (1 << k) + 1])
+        return out
+
+
+def _padded_windows(values: np.ndarray, start: np.ndarray, end: np.ndarray, width: int):
+    """
+    Rows of values[start:end+1] left-aligned into a (len(start), width) matrix plus a validity mask
+    """
+    offsets = np.arange(width)
+    index = start[:, None] + offsets
+    mask = index <= end[:, None]
+    return values[np.minimum(index, len(values) - 1)], mask
+
+
+# ======== windowed heuristics ========= #
+def _hip_sway(hip_x, ts, duration, threshold):
+    n = len(ts)
+    start = _window_start(ts, duration)
+    count = np.arange(n) - start + 1
+    width = int(count.max())
+    out = np.zeros(n, dtype=np.uint8)
+    for lo in range(0, n, ROW_CHUNK):
+        rows = slice(lo, min(n, lo + ROW_CHUNK))
+        win, mask = _padded_windows(hip_x, start[rows], np.arange(n)[rows], width)
+        cnt = count[rows]
+        mean = np.where(mask, win, 0).sum(axis=1) / cnt
+        var = np.where(mask, (win - mean[:, None]) ** 2, 0).sum(axis=1) / cnt
+        out[rows] = (cnt >= 2) & (np.sqrt(var) > threshold)
+    return out
+
+
+def _too_still(cx, cy, ts, duration, still_threshold):
+    n = len(ts)
+    j = np.arange(n)
+    start = _window_start(ts, duration)
+    earliest = ts[_window_start(ts, HISTORY_SECONDS, strict=False)]
+
+    dx = _RangeTable(cx, np.maximum).query(start, j) - _RangeTable(cx, np.minimum).query(start, j)
+    dy = _RangeTable(cy, np.maximum).query(start, j) - _RangeTable(cy, np.minimum).query(start, j)
+    still = np.sqrt(dx ** 2 + dy ** 2) < still_threshold
+    return ((j - start + 1 >= 2) & (ts - earliest >= duration) & still).astype(np.uint8)
+
+
+def _pacing(cx, ts, duration, min_shift, smooth_window=5):
+    n = len(ts)
+    j = np.arange(n)
+    out = np.zeros(n, dtype=np.uint8)
+    if n < smooth_window + 2:
+        return out
+
+    start = _window_start(ts, duration)
+    count = j - start + 1
+    # Moving average over consecutive samples; a window [a, j] owns smooth[a .. j-4]
+    smooth = np.convolve(cx, np.ones(smooth_window) / smooth_window, mode="valid")
+    n_smooth = count - (smooth_window - 1)
+    eligible = (count >= 5) & (n_smooth >= 3)
+    if not eligible.any():
+        return out
+
+    rows = np.nonzero(eligible)[0]
+    s_lo, s_hi = start[rows], j[rows] - (smooth_window - 1)
+    total_range = _RangeTable(smooth, np.maximum).query(s_lo, s_hi) - _RangeTable(smooth, np.minimum).query(s_lo, s_hi)
+
+    diffs = np.diff(smooth)
+    width = int((s_hi - s_lo).max())
+    for lo in range(0, len(rows), ROW_CHUNK):
+        part = slice(lo, lo + ROW_CHUNK)
+        win, mask = _padded_windows(diffs, s_lo[part], s_hi[part] - 1, width)
+        thr = (min_shift / n_smooth[rows[part]] * 2)[:, None]
+        significant = mask & (np.abs(win) > thr)
+        sign = np.sign(win)
+
+        # Sign of the previous significant movement in the row (forward fill)
+        positions = np.where(significant, np.arange(width), -1)
+        last = np.maximum.accumulate(positions, axis=1)
+        prev = np.concatenate([np.full((len(last), 1), -1), last[:, :-1]], axis=1)
+        prev_sign = np.take_along_axis(sign, np.maximum(prev, 0), axis=1)
+        changes = (significant & (prev >= 0) & (sign != prev_sign)).sum(axis=1)
+
+        out[rows[part]] = (changes >= 2) & (total_range[part] > min_shift)
+    return out
+
+
+def gesture_features(keypoints: np.ndarray, timestamps: np.ndarray, valid: Optional[np.ndarray] = None,
+                     hip_duration: float = 2.0) -> Dict[str, np.ndarray]:
+    """
+    Compute all five gesture metrics for every person and time step
+
+    Args:
+        keypoints: (T, people, 17, 2) COCO keypoints in pixels
+        timestamps: (T,) increasing timestamps in seconds
+        valid: (T, people) bool, whether the person was detected in that frame
+               (default: any non-zero keypoint)
+        hip_duration: hip sway window, process_frame passes its evaluation interval
+
+    Returns:
+        Dict of metric name -> (T, people) uint8 flags, 0 where the person is not valid
+    """
+    keypoints = np.asarray(keypoints, dtype=np.float64)
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    if keypoints.ndim != 4 or keypoints.shape[2:] != (17, 2):
+        raise ValueError(f"Expected keypoints of shape (T, people, 17, 2), got {keypoints.shape}")
+    T, P = keypoints.shape[:2]
+    if valid is None:
+        valid = np.any(keypoints != 0, axis=(2, 3))
+
+    features = {key: np.zeros((T, P), dtype=np.uint8) for key in GESTURE_KEYS}
+    features["headtilt"][:] = head_tilt_flags(keypoints) * valid
+    features["handtomouth"][:] = hand_to_mouth_flags(keypoints) * valid
+
+    hips, center = body_points(keypoints)
+    # Windows depend on which frames each person was seen in, so walk people (not frames)
+    for p in range(P):
+        frames = np.nonzero(valid[:, p])[0]
+        if len(frames) == 0:
+            continue
+        ts = timestamps[frames]
+        features["hipsway"][frames, p] = _hip_sway(hips[frames, p, 0], ts, hip_duration, 20)
+        features["toostill"][frames, p] = _too_still(center[frames, p, 0], center[frames, p, 1], ts, 8, 50)
+        features["pacing"][frames, p] = _pacing(center[frames, p, 0], ts, 6, 30)
+    return features
@@ -1,25 +1,54 @@
+import atexit
+import threading
 import time
 import numpy as np
-from ultralytics import YOLO
 
-# Initialize the YOLO model
-model = YOLO("yolo11n-pose.pt")
-
-# Global variables for tracking state
-history = {
-    "hips": [],
-    "center": [],
-}
-last_eval = time.time()
+import metrics
+from governor import governor
+
+from .backend import load_pose_model
+from .render import FrameRenderer
+from .roi import RoiPredictor
+from .tracker import PoseTracker
+from .workers import POSE_WORKERS, InferencePool
+
+# Loaded by load_model() (the pose subsystem's init step), not on import: starting the
+# ORATOR_POSE_WORKERS pool can take minutes
+model = None
+inference_lock = None
+pipeline = None  # the server camera's GesturePipeline
+_load_lock = threading.RLock()
+
+
+def load_model():
+    """Load the pose model (or start the inference pool) and the server camera pipeline, once"""
+    global model, inference_lock, pipeline
+    with _load_lock:
+        if model is not None:
+            return model
+        if POSE_WORKERS > 0:
+            # Inference in worker processes fed through shared memory, off the server's GIL
+            loaded = InferencePool(POSE_WORKERS)
+            atexit.register(loaded.close)
+            inference_lock = None  # the pool serializes per worker
+        else:
+            # YOLO model (torch by default, ORATOR_POSE_BACKEND=onnx|openvino for exported CPU runtimes)
+            loaded = load_pose_model()
+            # Ultralytics predictors aren't thread-safe; sessions share the model one call at a time
+            inference_lock = threading.Lock()
+        model = loaded
+        pipeline = GesturePipeline()
+        return model
 
 # ======== helper functions ========= #
-def too_still(center_positions, duration=8, still_threshold=50):
+def too_still(center_positions, duration=8, still_threshold=50, now=None):
     """
     Return 1 if the user's body center has stayed nearly still for the past 8 seconds.
     Only triggers after 8s of data have accumulated.
     Triggers more frequently - allows up to 50 pixels of minor movement but still flags stillness.
+    - now: evaluation time (defaults to time.time(), recorded media passes its own timestamps)
     """
-    now = time.time()
+    now = time.time() if now is None else now
     # Only keep data within the last 'duration' seconds
     recent = [(x, y) for (x, y, t) in center_positions if now - t < duration]
 
@@ -42,18 +71,19 @@ def too_still(center_positions, duration=8, still_threshold=50):
     return int(total_move < still_threshold)
 
 
-def hip_sway(hip_positions, duration=2, threshold=20):
+def hip_sway(hip_positions, duration=2, threshold=20, now=None):
     """Return 1 if hips move a lot horizontally within duration."""
     if len(hip_positions) < 2:
         return 0
-    xs = [x for (x, y, t) in hip_positions if time.time() - t < duration]
+    now = time.time() if now is None else now
+    xs = [x for (x, y, t) in hip_positions if now - t < duration]
     if len(xs) < 2:
         return 0
     std_x = np.std(xs)
     return int(std_x > threshold)
 
 
-def pacing(center_positions, duration=6, min_shift=30):
+def pacing(center_positions, duration=6, min_shift=30, now=None):
     """
     Return 1 if the user paces back and forth excessively (2+ direction changes).
     Detects repetitive side-to-side movement which is distracting during presentations.
@@ -61,8 +91,9 @@ def pacing(center_positions, duration=6, min_shift=30):
     - duration: time window in seconds (default 6s to catch multiple pacing cycles)
     - min_shift: minimum horizontal distance (in pixels) per movement to count as real pacing
     """
+    now = time.time() if now is None else now
     # Get recent center positions
-    recent = [(x, y) for (x, y, t) in center_positions if time.time() - t < duration]
+    recent = [(x, y) for (x, y, t) in center_positions if now - t < duration]
     if len(recent) < 5:
         return 0
 
@@ -171,6 +202,71 @@ def hand_to_mouth(keypoints, scale_factor=0.8):
     return 0
 
 
+class GesturePipeline:
+    """
+    Per-session pose state: ROI predictor, tracker and evaluation timer.
+    Every session (the server camera, each client uploading frames) gets its own.
+    """
+
+    def __init__(self):
+        load_model()
+        # Full frame by default, ORATOR_POSE_ROI=downscale|crop enables ROI inference
+        self.predictor = RoiPredictor.from_env(model, lock=inference_lock)
+        # Each tracked person keeps their own history
+        self.tracker = PoseTracker()
+        self.last_eval = time.time()
+
+    def analyze(self, frame, duration=2.0):
+        """
+        Inference, tracking and gesture evaluation without any drawing.
+
+        Returns:
+            tuple: (visible_tracks, analysis_results)
+        """
+        started = time.perf_counter()
+        with governor.cpu("video"):
+            detections = self.predictor.predict(frame)
+            output = None
+            tracks = []
+
+            # Track every detected person so each keeps a stable id and history. Empty
+            # frames go through too, so unmatched tracks age out while nobody is detected
+            current_time = time.time()
+            tracks = self.tracker.update(detections.boxes, detections.keypoints, current_time, detections.confidences)
+            for track in tracks:
+                record_keypoints(track.history, track.keypoints, current_time)
+
+            if tracks:
+                # every 'duration' seconds evaluate
+                if current_time - self.last_eval >= duration:
+                    output = self.evaluate_tracks(current_time, duration)
+                    self.last_eval = current_time
+
+        metrics.pose_frame_ms.observe((time.perf_counter() - started) * 1000)
+        return tracks, output
+
+    def evaluate_tracks(self, current_time, duration=2.0):
+        """Gesture results for every visible track, with the presenter's metrics at the top level"""
+        people = []
+        for track in self.tracker.tracks:
+            if track.misses:
+                continue
+            track.last_output = evaluate_gestures(track.history, track.keypoints, current_time, duration)
+            people.append({"id": track.id, **track.last_output})
+
+        primary = self.tracker.primary()
+        if primary is None:
+            return None
+        output = dict(primary.last_output)
+        output["person_id"] = primary.id
+        output["people"] = people
+        return output
+
+
+# Renderer of the server camera (its pipeline is created by load_model)
+renderer = FrameRenderer()
+
+
 def process_frame(frame, duration=2.0):
     """
     Process a single frame for gesture analysis.
@@ -181,43 +277,54 @@ def process_frame(frame, duration=2.0):
         
     Returns:
         tuple: (annotated_frame, analysis_results)
-            - annotated_frame: Frame with YOLO keypoints and boxes drawn
-            - analysis_results: Dict with gesture metrics or None
+            - annotated_frame: Frame with skeletons and active gesture flags drawn
+              (a reused buffer, valid until the next call)
+            - analysis_results: Dict with gesture metrics or None. Top-level metrics are the
+              presenter's (largest visible person), "people" holds every tracked person.
     """
-    global last_eval, history
-    
-    results = model.predict(frame, conf=0.7, verbose=False)
-    annotated_frame = results[0].plot()
-    output = None
-
-    # Extract first detected person keypoints
-    if results[0].keypoints is not None and len(results[0].keypoints.xy) > 0:
-        kpts = results[0].keypoints.xy[0].cpu().numpy()
-
-        # mid hip and body center
-        left_hip, right_hip = kpts[11], kpts[12]
-        hips_mid = ((left_hip[0] + right_hip[0]) / 2, (left_hip[1] + right_hip[1]) / 2)
-        shoulders_mid = ((kpts[5][0] + kpts[6][0]) / 2, (kpts[5][1] + kpts[6][1]) / 2)
-        center = ((hips_mid[0] + shoulders_mid[0]) / 2, (hips_mid[1] + shoulders_mid[1]) / 2)
-
-        # record with timestamps
-        current_time = time.time()
-        history["hips"].append((*hips_mid, current_time))
-        history["center"].append((*center, current_time))
-
-        # Clean up old history entries (keep last 15 seconds)
-        for key in history:
-            history[key] = [p for p in history[key] if current_time - p[2] <= 15]
-
-        # every 'duration' seconds evaluate
-        if current_time - last_eval >= duration:
-            output = {
-                "hipsway": hip_sway(history["hips"], duration),
-                "pacing": pacing(history["center"]),  # Uses default 6s window to detect multiple direction changes
-                "headtilt": head_tilt(kpts),
-                "handtomouth": hand_to_mouth(kpts),
-                "toostill": too_still(history["center"])  # Uses default 15s window, 30px threshold - more lenient
-            }
-            last_eval = current_time
-    
-    return annotated_frame, output
+    load_model()
+    tracks, output = pipeline.analyze(frame, duration)
+    return renderer.annotate(frame, tracks), output
+
+
+def analyze_frame(frame, duration=2.0):
+    """Server camera analysis without drawing, returns (visible_tracks, analysis_results)"""
+    load_model()
+    return pipeline.analyze(frame, duration)
+
+
+def record_keypoints(history, kpts, current_time, keep=15):
+    """
+    Append the mid-hip and body-center points of one person to their history.
+
+    Args:
+        history: Dict with "hips" and "center" deques of (x, y, t), oldest first
+        kpts: (17, 2) COCO keypoints
+        current_time: Timestamp of the frame
+        keep: Seconds of history to retain
+    """
+    # mid hip and body center
+    left_hip, right_hip = kpts[11], kpts[12]
+    hips_mid = ((left_hip[0] + right_hip[0]) / 2, (left_hip[1] + right_hip[1]) / 2)
+    shoulders_mid = ((kpts[5][0] + kpts[6][0]) / 2, (kpts[5][1] + kpts[6][1]) / 2)
+    center = ((hips_mid[0] + shoulders_mid[0]) / 2, (hips_mid[1] + shoulders_mid[1]) / 2)
+
+    # record with timestamps
+    history["hips"].append((*hips_mid, current_time))
+    history["center"].append((*center, current_time))
+
+    # Drop entries older than `keep` seconds from the front instead of rebuilding the lists
+    for points in history.values():
+        while points and current_time - points[0][2] > keep:
+            points.popleft()
+
+
+def evaluate_gestures(history, kpts, current_time, duration=2.0):
+    """Run every gesture heuristic for one person at current_time"""
+    return {
+        "hipsway": hip_sway(history["hips"], duration, now=current_time),
+        "pacing": pacing(history["center"], now=current_time),  # Uses default 6s window to detect multiple direction changes
+        "headtilt": head_tilt(kpts),
+        "handtomouth": hand_to_mouth(kpts),
+        "toostill": too_still(history["center"], now=current_time)  # Uses default 15s window, 30px threshold - more lenient
+    }
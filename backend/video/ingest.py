@@ -0,0 +1,218 @@
+"""
+Client-uploaded frames for server-side pose analysis (headless deployments without a camera).
+
+The client negotiates a resolution and frame rate, then sends compressed (JPEG/WebP/PNG)
+frames as binary messages. Each session owns its own GesturePipeline (tracker, ROI state)
+and an inference worker that only ever looks at the newest frame: when inference falls
+behind, frames waiting in the slot are replaced instead of queued, so latency stays at
+about one inference regardless of how fast the client sends.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+
+from governor import governor
+
+MAX_WIDTH = int(os.environ.get("ORATOR_INGEST_MAX_WIDTH", "640"))
+MAX_HEIGHT = int(os.environ.get("ORATOR_INGEST_MAX_HEIGHT", "480"))
+MAX_FPS = float(os.environ.get("ORATOR_INGEST_MAX_FPS", "10"))
+# Largest compressed frame accepted, bigger messages are dropped without decoding
+MAX_FRAME_BYTES = int(os.environ.get("ORATOR_INGEST_MAX_BYTES", str(512 * 1024)))
+CODECS = ("jpeg", "webp", "png")
+
+
+def negotiate(hello: Optional[dict]) -> dict:
+    """
+    Clamp the client's requested stream parameters to what the server accepts
+
+    Args:
+        hello: {"width", "height", "fps", "codec"} as sent by the client (all optional)
+
+    Returns:
+        dict: The accepted parameters, sent back to the client
+    """
+    hello = hello or {}
+    width = int(hello.get("width") or MAX_WIDTH)
+    height = int(hello.get("height") or MAX_HEIGHT)
+    # Keep the aspect ratio when scaling down to the limits
+    scale = min(1.0, MAX_WIDTH / max(width, 1), MAX_HEIGHT / max(height, 1))
+    width, height = max(16, int(width * scale)) & ~1, max(16, int(height * scale)) & ~1
+    fps = min(float(hello.get("fps") or MAX_FPS), MAX_FPS)
+    codec = str(hello.get("codec") or "jpeg").lower()
+    if codec not in CODECS:
+        codec = "jpeg"
+    return {"width": width, "height": height, "fps": fps, "codec": codec,
+            "max_bytes": MAX_FRAME_BYTES}
+
+
+def effective_fps(params: dict, policy=None) -> float:
+    """Upload rate the client should use now: the negotiated fps at the current degradation level"""
+    policy = policy or governor.policy()
+    return params["fps"] * policy.video_fps_scale
+
+
+class FrameDecoder:
+    """
+    Decodes compressed frames into a reused BGR buffer of the negotiated size.
+
+    Frames at least twice as large as negotiated are decoded at reduced resolution by
+    libjpeg directly (IMREAD_REDUCED_COLOR_2/4), which is much cheaper than a full decode
+    followed by a resize.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.frame = np.zeros((height, width, 3), dtype=np.uint8)
+        self.reduce_flag = cv2.IMREAD_COLOR  # pylint: disable=no-member
+
+    def _pick_reduction(self, shape):
+        ratio = min(shape[1] / self.width, shape[0] / self.height)
+        if ratio >= 4:
+            self.reduce_flag = cv2.IMREAD_REDUCED_COLOR_4  # pylint: disable=no-member
+        elif ratio >= 2:
+            self.reduce_flag = cv2.IMREAD_REDUCED_COLOR_2  # pylint: disable=no-member
+
+    def decode(self, payload) -> Optional[np.ndarray]:
+        """Returns the reused frame buffer, or None if the payload isn't an image"""
+        data = np.frombuffer(payload, dtype=np.uint8)
+        image = cv2.imdecode(data, self.reduce_flag)  # pylint: disable=no-member
+        if image is None:
+            return None
+        if self.reduce_flag == cv2.IMREAD_COLOR and image.shape[:2] != (self.height, self.width):  # pylint: disable=no-member
+            # Oversized stream: decode the following frames at reduced resolution
+            self._pick_reduction(image.shape)
+        if image.shape[:2] == (self.height, self.width):
+            np.copyto(self.frame, image)
+        else:
+            cv2.resize(image, (self.width, self.height), dst=self.frame,  # pylint: disable=no-member
+                       interpolation=cv2.INTER_AREA)  # pylint: disable=no-member
+        return self.frame
+
+
+class FrameIngest:
+    """
+    One uploading client: decode, rate-limit and analyze on a worker thread.
+
+    Args:
+        pipeline: GesturePipeline owned by this session
+        params: Negotiated parameters (see negotiate)
+        on_result: Called from the worker as on_result(frame, tracks, result)
+        on_dropped: Called as on_dropped(reason) for every frame that won't get a result
+            ("rate", "too_large", "invalid", or "replaced" for a waiting frame superseded
+            by a newer one), so clients waiting for a reply per frame can send the next
+    """
+
+    def __init__(self, pipeline, params: dict, on_result: Callable,
+                 on_dropped: Optional[Callable[[str], None]] = None):
+        self.pipeline = pipeline
+        self.params = params
+        self.on_result = on_result
+        self.on_dropped = on_dropped
+        self.decoder = FrameDecoder(params["width"], params["height"])
+        # Two buffers: the worker analyzes one while the receiver fills the other
+        self.buffers = [np.zeros_like(self.decoder.frame) for _ in range(2)]
+        self.pending: Optional[int] = None
+        self.busy: Optional[int] = None
+        self.min_interval = 1.0 / params["fps"] if params["fps"] > 0 else 0.0
+        self.last_accepted = 0.0
+        self.cond = threading.Condition()
+        self.running = True
+        self.stats = {
+            "received": 0,
+            "analyzed": 0,
+            "dropped_rate": 0,
+            "dropped_busy": 0,
+            "dropped_invalid": 0,
+            "decode_ms": 0.0,
+            "inference_ms": 0.0,
+        }
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, payload) -> bool:
+        """
+        Accept one compressed frame from the client
+
+        Returns:
+            bool: False if the frame was dropped before analysis
+        """
+        self.stats["received"] += 1
+        now = time.monotonic()
+        # Clients that ignore the negotiated rate (or the degraded one) are throttled here, before decoding
+        min_interval = self.min_interval / governor.policy().video_fps_scale
+        if now - self.last_accepted < min_interval * 0.8:
+            self.stats["dropped_rate"] += 1
+            return self._dropped("rate")
+        if len(payload) > MAX_FRAME_BYTES:
+            self.stats["dropped_invalid"] += 1
+            return self._dropped("too_large")
+
+        started = time.perf_counter()
+        frame = self.decoder.decode(payload)
+        if frame is None:
+            self.stats["dropped_invalid"] += 1
+            return self._dropped("invalid")
+        self.stats["decode_ms"] = (time.perf_counter() - started) * 1000
+        self.last_accepted = now
+
+        replaced = False
+        with self.cond:
+            slot = 1 - self.busy if self.busy is not None else 0
+            if self.pending is not None:
+                # Inference is behind: the newer frame replaces the one still waiting
+                self.stats["dropped_busy"] += 1
+                replaced = True
+            np.copyto(self.buffers[slot], frame)
+            self.pending = slot
+            self.cond.notify()
+        if replaced:
+            self._dropped("replaced")
+        return True
+
+    def _dropped(self, reason: str) -> bool:
+        if self.on_dropped is not None:
+            try:
+                self.on_dropped(reason)
+            except Exception as e:
+                print(f"Error reporting dropped frame: {e}")
+        return False
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while self.running and self.pending is None:
+                    self.cond.wait()
+                if not self.running:
+                    return
+                self.busy, self.pending = self.pending, None
+            frame = self.buffers[self.busy]
+            try:
+                started = time.perf_counter()
+                tracks, result = self.pipeline.analyze(frame)
+                self.stats["inference_ms"] = (time.perf_counter() - started) * 1000
+                self.stats["analyzed"] += 1
+                self.on_result(frame, tracks, result)
+            except Exception as e:
+                print(f"Error analyzing uploaded frame: {e}")
+            finally:
+                with self.cond:
+                    self.busy = None
+
+    def snapshot(self) -> dict:
+        """Counters for the client (sent as periodic "stats" messages)"""
+        stats = dict(self.stats)
+        stats["decode_ms"] = round(stats["decode_ms"], 2)
+        stats["inference_ms"] = round(stats["inference_ms"], 2)
+        return {"type": "stats", **stats}
+
+    def close(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        self.worker.join(timeout=2.0)
@@ -0,0 +1,52 @@
+"""
+Pose detections in original frame coordinates, independent of how inference was run
+"""
+
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+# COCO-17 skeleton edges (keypoint index pairs)
+SKELETON = (
+    (5, 7), (7, 9), (6, 8), (8, 10), (5, 6), (5, 11), (6, 12), (11, 12),
+    (11, 13), (13, 15), (12, 14), (14, 16), (0, 1), (0, 2), (1, 3), (2, 4),
+)
+
+
+class PoseDetections(NamedTuple):
+    boxes: np.ndarray        # (N, 4) xyxy pixels
+    keypoints: np.ndarray    # (N, 17, 2) pixels
+    confidences: np.ndarray  # (N,)
+
+    def __len__(self):
+        return len(self.boxes)
+
+
+EMPTY = PoseDetections(np.zeros((0, 4)), np.zeros((0, 17, 2)), np.zeros(0))
+
+
+def from_ultralytics(result, offset: Tuple[float, float] = (0.0, 0.0), scale: float = 1.0) -> PoseDetections:
+    """
+    Convert an Ultralytics pose result, mapping coordinates back to the original frame
+
+    Args:
+        result: results[i] from model.predict (or PoseDetections from an InferencePool)
+        offset: (x, y) of the crop origin in the original frame
+        scale: factor the predicted image was resized by (original = predicted / scale + offset)
+    """
+    ox, oy = offset
+    if isinstance(result, PoseDetections):
+        # Already converted (out-of-process inference, see video/workers.py)
+        if len(result) == 0:
+            return EMPTY
+        keypoints = result.keypoints / scale + np.array([ox, oy])
+        keypoints[(result.keypoints == 0).all(axis=-1)] = 0
+        return PoseDetections(result.boxes / scale + np.array([ox, oy, ox, oy]), keypoints, result.confidences)
+    if result.keypoints is None or len(result.keypoints.xy) == 0:
+        return EMPTY
+    boxes = result.boxes.xyxy.cpu().numpy() / scale + np.array([ox, oy, ox, oy])
+    keypoints = result.keypoints.xy.cpu().numpy() / scale + np.array([ox, oy])
+    # Ultralytics reports undetected keypoints as (0, 0); keep them at 0 after the shift
+    keypoints[(result.keypoints.xy.cpu().numpy() == 0).all(axis=-1)] = 0
+    return PoseDetections(boxes, keypoints, result.boxes.conf.cpu().numpy())
+
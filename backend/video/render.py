@@ -0,0 +1,129 @@
+"""
+Overlay rendering and encoding for the video feed, decoupled from inference.
+
+Instead of results[0].plot() (copy of the frame + every box/keypoint/label drawn by
+Ultralytics) and a default-quality JPEG per frame, the renderer:
+  - copies/downscales the frame into a buffer it reuses across frames
+  - draws only the skeletons (one polylines call per frame) and the active gesture flags
+  - encodes at a configurable JPEG quality and width
+  - or skips pixels entirely and emits keypoints as JSON for client-side drawing
+
+Under CPU pressure the governor lowers the width and caps the quality further.
+
+Environment:
+    ORATOR_JPEG_QUALITY   JPEG quality 1-100  (default: 75)
+    ORATOR_STREAM_WIDTH   max streamed width in pixels, 0 = original (default: 0)
+"""
+
+import os
+from typing import Iterable, Optional
+
+import cv2
+import numpy as np
+
+import metrics
+from governor import governor
+
+from .pose import SKELETON
+
+_EDGES = np.array(SKELETON)
+
+FLAG_LABELS = {
+    "hipsway": "Hip sway",
+    "pacing": "Pacing",
+    "headtilt": "Head tilt",
+    "handtomouth": "Hand to face",
+    "toostill": "Too still",
+}
+
+
+class FrameRenderer:
+    """
+    One renderer per viewer, so each owns its reusable canvas
+
+    Args:
+        quality: JPEG quality (default ORATOR_JPEG_QUALITY or 75)
+        max_width: Downscale frames wider than this before drawing/encoding (0 = off)
+    """
+
+    def __init__(self, quality: Optional[int] = None, max_width: Optional[int] = None):
+        self.quality = int(quality or os.environ.get("ORATOR_JPEG_QUALITY", 75))
+        self.max_width = int(max_width if max_width is not None else os.environ.get("ORATOR_STREAM_WIDTH", 0))
+        self._canvas: Optional[np.ndarray] = None
+        self._encode_params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]  # pylint: disable=no-member
+
+    def scale_for(self, shape) -> float:
+        width = shape[1]
+        max_width = self.max_width
+        width_scale = governor.policy().jpeg_width_scale
+        if width_scale < 1.0:
+            max_width = int((max_width or width) * width_scale)
+        return max_width / width if max_width and width > max_width else 1.0
+
+    def canvas(self, frame: np.ndarray) -> np.ndarray:
+        """Copy (or downscale) frame into the reused buffer"""
+        scale = self.scale_for(frame.shape)
+        h, w = int(round(frame.shape[0] * scale)), int(round(frame.shape[1] * scale))
+        if self._canvas is None or self._canvas.shape != (h, w, frame.shape[2]):
+            self._canvas = np.empty((h, w, frame.shape[2]), dtype=frame.dtype)
+        if scale == 1.0:
+            np.copyto(self._canvas, frame)
+        else:
+            cv2.resize(frame, (w, h), dst=self._canvas, interpolation=cv2.INTER_AREA)  # pylint: disable=no-member
+        return self._canvas
+
+    def annotate(self, frame: np.ndarray, tracks: Iterable) -> np.ndarray:
+        """
+        Draw skeletons and active gesture flags of the visible tracks
+
+        Returns:
+            The reused canvas (valid until the next call)
+        """
+        canvas = self.canvas(frame)
+        scale = canvas.shape[1] / frame.shape[1]
+
+        segments = []
+        for track in tracks:
+            kpts = track.keypoints * scale
+            visible = kpts.any(axis=1)
+            edges = _EDGES[visible[_EDGES[:, 0]] & visible[_EDGES[:, 1]]]
+            segments.extend(kpts[edges].astype(np.int32))
+
+            flags = [FLAG_LABELS[k] for k, v in (track.last_output or {}).items() if v and k in FLAG_LABELS]
+            if flags:
+                x, y = (track.box[:2] * scale).astype(int)
+                cv2.putText(canvas, ", ".join(flags), (x, max(15, y - 8)),  # pylint: disable=no-member
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1, cv2.LINE_AA)  # pylint: disable=no-member
+
+        if segments:
+            cv2.polylines(canvas, segments, False, (0, 255, 0), 2, cv2.LINE_AA)  # pylint: disable=no-member
+        return canvas
+
+    def encode(self, image: np.ndarray) -> bytes:
+        params = self._encode_params
+        cap = governor.policy().jpeg_quality_cap
+        if cap < self.quality:
+            params = [cv2.IMWRITE_JPEG_QUALITY, cap]  # pylint: disable=no-member
+        with metrics.jpeg_encode_ms.time(), governor.cpu("jpeg"):
+            ok, buffer = cv2.imencode(".jpg", image, params)  # pylint: disable=no-member
+        if not ok:
+            raise RuntimeError("JPEG encoding failed")
+        return buffer.tobytes()
+
+
+def keypoints_payload(frame_shape, tracks: Iterable, output: Optional[dict] = None) -> dict:
+    """JSON-ready coordinates of every visible track for client-side drawing"""
+    return {
+        "width": int(frame_shape[1]),
+        "height": int(frame_shape[0]),
+        "people": [
+            {
+                "id": track.id,
+                "box": [round(float(v), 1) for v in track.box],
+                "keypoints": np.round(track.keypoints, 1).tolist(),
+                "flags": track.last_output,
+            }
+            for track in tracks
+        ],
+        "gestures": output,
+    }
@@ -0,0 +1,124 @@
+"""
+Region-of-interest pose inference.
+
+The presenter usually fills only part of the frame and barely moves between frames,
+so instead of running the model on every full frame we can:
+  - "downscale": predict at a smaller inference size (imgsz, ORATOR_POSE_ROI_SIZE)
+  - "crop": predict on a crop around the last known person boxes, re-acquiring on the
+    full frame every `reacquire_every` frames or whenever the crop loses everyone
+Keypoints are always mapped back to original frame pixels, so the pixel thresholds in
+hip_sway, pacing and too_still keep their meaning.
+"""
+
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .backend import static_input_size
+from .pose import EMPTY, PoseDetections, from_ultralytics
+
+MODES = ("full", "downscale", "crop")
+
+
+class RoiPredictor:
+    """
+    Args:
+        model: Ultralytics pose model (anything with .predict)
+        mode: One of MODES
+        imgsz: Inference size for "downscale" (required) and for crops (None = model default)
+        margin: Crop padding as a fraction of the person box size
+        reacquire_every: Full-frame prediction interval in crop mode, in frames
+        max_crop_fraction: Fall back to a full frame when the crop would be larger than this
+        lock: Optional lock held around model.predict when the model is shared between threads
+    """
+
+    def __init__(self, model, mode: str = "full", imgsz: Optional[int] = None, margin: float = 0.35,
+                 reacquire_every: int = 30, max_crop_fraction: float = 0.7, conf: float = 0.7,
+                 lock=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown ROI mode '{mode}', expected one of {', '.join(MODES)}")
+        if mode == "downscale" and not imgsz:
+            raise ValueError("ROI mode 'downscale' needs an inference size (imgsz)")
+        self.model = model
+        self.mode = mode
+        self.imgsz = imgsz
+        self.margin = margin
+        self.reacquire_every = reacquire_every
+        self.max_crop_fraction = max_crop_fraction
+        self.conf = conf
+        self.lock = lock
+        self.last_boxes: Optional[np.ndarray] = None
+        self.frames_since_full = 0
+        self.last_result = None
+        self.last_crop: Optional[Tuple[int, int, int, int]] = None
+
+    @classmethod
+    def from_env(cls, model, lock=None) -> "RoiPredictor":
+        """
+        Configure from ORATOR_POSE_ROI / ORATOR_POSE_ROI_SIZE. The ROI size is separate from
+        ORATOR_POSE_IMGSZ, the size the model is exported and warmed up at (video/backend.py).
+        Static exports (onnx, openvino) only take their export size, so the ROI size is
+        ignored for them: crops still work, downscale falls back to full frames.
+        """
+        mode = os.environ.get("ORATOR_POSE_ROI", "full")
+        size = os.environ.get("ORATOR_POSE_ROI_SIZE")
+        static = static_input_size()
+        if size and static is not None and int(size) != static:
+            print(f"ORATOR_POSE_ROI_SIZE={size} ignored: the {os.environ['ORATOR_POSE_BACKEND']} model has a "
+                  f"fixed {static}px input (set ORATOR_POSE_IMGSZ instead)")
+            size = None
+        if mode == "downscale" and not size:
+            print("ORATOR_POSE_ROI=downscale needs ORATOR_POSE_ROI_SIZE (e.g. 320), using full frames")
+            mode = "full"
+        return cls(model, mode=mode, imgsz=int(size) if size else None, lock=lock)
+
+    def _predict(self, image):
+        kwargs = {"conf": self.conf, "verbose": False}
+        if self.imgsz and self.mode != "full":
+            kwargs["imgsz"] = self.imgsz
+        if self.lock is None:
+            self.last_result = self.model.predict(image, **kwargs)[0]
+        else:
+            with self.lock:
+                self.last_result = self.model.predict(image, **kwargs)[0]
+        return self.last_result
+
+    def _crop_window(self, shape) -> Optional[Tuple[int, int, int, int]]:
+        if self.last_boxes is None or len(self.last_boxes) == 0:
+            return None
+        h, w = shape[:2]
+        x1, y1 = self.last_boxes[:, 0].min(), self.last_boxes[:, 1].min()
+        x2, y2 = self.last_boxes[:, 2].max(), self.last_boxes[:, 3].max()
+        pad_x, pad_y = (x2 - x1) * self.margin, (y2 - y1) * self.margin
+        x1, y1 = int(max(0, x1 - pad_x)), int(max(0, y1 - pad_y))
+        x2, y2 = int(min(w, x2 + pad_x)), int(min(h, y2 + pad_y))
+        if x2 <= x1 or y2 <= y1 or (x2 - x1) * (y2 - y1) > self.max_crop_fraction * w * h:
+            return None
+        return x1, y1, x2, y2
+
+    def predict(self, frame: np.ndarray) -> PoseDetections:
+        """Run pose inference and return detections in original frame coordinates"""
+        self.last_crop = None
+        if self.mode != "crop":
+            return from_ultralytics(self._predict(frame))
+
+        window = None
+        if self.frames_since_full < self.reacquire_every:
+            window = self._crop_window(frame.shape)
+
+        detections = EMPTY
+        if window is not None:
+            x1, y1, x2, y2 = window
+            detections = from_ultralytics(self._predict(frame[y1:y2, x1:x2]), offset=(x1, y1))
+            self.last_crop = window
+            self.frames_since_full += 1
+
+        if len(detections) == 0:
+            # Periodic or forced re-acquisition on the whole frame
+            detections = from_ultralytics(self._predict(frame))
+            self.last_crop = None
+            self.frames_since_full = 0
+
+        self.last_boxes = detections.boxes if len(detections) else None
+        return detections
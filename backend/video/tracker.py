@@ -0,0 +1,135 @@
+"""
+Lightweight multi-person tracker for the pose pipeline.
+
+Detections are matched to existing tracks greedily by box IoU, so every person keeps
+a stable id (and their own gesture history) while others walk through the frame.
+"""
+
+import itertools
+from collections import deque
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+MAX_PEOPLE = 8  # detections considered per frame, keeps per-frame cost bounded
+HISTORY_POINTS = 1024  # per-person gesture history cap (15 s at ~68 FPS), on top of its time window
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of (N, 4) and (M, 4) xyxy boxes"""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)))
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def greedy_match(iou: np.ndarray, min_iou: float) -> List[Tuple[int, int]]:
+    """Pairs (row, col) taken in order of decreasing IoU, each row/col used once"""
+    pairs = []
+    if iou.size == 0:
+        return pairs
+    rows, cols = np.unravel_index(np.argsort(-iou, axis=None), iou.shape)
+    used_rows, used_cols = set(), set()
+    for r, c in zip(rows, cols):
+        if iou[r, c] < min_iou:
+            break
+        if r in used_rows or c in used_cols:
+            continue
+        pairs.append((int(r), int(c)))
+        used_rows.add(r)
+        used_cols.add(c)
+    return pairs
+
+
+class Track:
+    """One tracked person with their own gesture history"""
+
+    def __init__(self, track_id: int, box: np.ndarray, keypoints: np.ndarray, timestamp: float):
+        self.id = track_id
+        self.box = box
+        self.keypoints = keypoints
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.misses = 0
+        self.history = {"hips": deque(maxlen=HISTORY_POINTS), "center": deque(maxlen=HISTORY_POINTS)}
+        self.last_output: Optional[dict] = None
+
+    @property
+    def area(self) -> float:
+        return float((self.box[2] - self.box[0]) * (self.box[3] - self.box[1]))
+
+
+class PoseTracker:
+    """
+    Assigns stable ids to pose detections across frames
+
+    Args:
+        min_iou: Minimum box IoU to continue a track
+        max_misses: Frames a track survives without a matching detection
+        max_people: Detections considered per frame (highest confidence first)
+    """
+
+    def __init__(self, min_iou: float = 0.3, max_misses: int = 15, max_people: int = MAX_PEOPLE):
+        self.min_iou = min_iou
+        self.max_misses = max_misses
+        self.max_people = max_people
+        self.tracks: List[Track] = []
+        self._ids = itertools.count(1)
+
+    def update(self, boxes: np.ndarray, keypoints: np.ndarray, timestamp: float,
+               confidences: Optional[np.ndarray] = None) -> List[Track]:
+        """
+        Match this frame's detections to tracks
+
+        Args:
+            boxes: (N, 4) xyxy person boxes
+            keypoints: (N, 17, 2) keypoints of the same detections
+            timestamp: Frame time
+            confidences: Optional (N,) scores, used to keep the best max_people detections
+
+        Returns:
+            Tracks seen in this frame (their box/keypoints updated)
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        keypoints = np.asarray(keypoints).reshape(-1, 17, 2)
+        if len(boxes) > self.max_people:
+            order = np.argsort(-confidences) if confidences is not None else np.arange(len(boxes))
+            keep = order[:self.max_people]
+            boxes, keypoints = boxes[keep], keypoints[keep]
+
+        track_boxes = np.array([t.box for t in self.tracks]).reshape(-1, 4)
+        matches = greedy_match(iou_matrix(track_boxes, boxes), self.min_iou)
+
+        seen = []
+        matched_tracks, matched_dets = set(), set()
+        for ti, di in matches:
+            track = self.tracks[ti]
+            track.box, track.keypoints = boxes[di], keypoints[di]
+            track.last_seen = timestamp
+            track.misses = 0
+            matched_tracks.add(ti)
+            matched_dets.add(di)
+            seen.append(track)
+
+        for ti, track in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                track.misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        for di in range(len(boxes)):
+            if di not in matched_dets:
+                track = Track(next(self._ids), boxes[di], keypoints[di], timestamp)
+                self.tracks.append(track)
+                seen.append(track)
+        return seen
+
+    def primary(self) -> Optional[Track]:
+        """The presenter: the largest currently visible person"""
+        visible = [t for t in self.tracks if t.misses == 0]
+        return max(visible, key=lambda t: t.area) if visible else None
@@ -0,0 +1,99 @@
+"""
+Compact binary keypoint frames for the /keypoints_stream WebSocket.
+
+The browser keeps its own local camera preview and only receives poses, so a frame is
+16 + 72 * people bytes instead of a full JPEG. All fields are little-endian:
+
+    header (16 bytes)
+        u8  version
+        u8  gesture flags of the presenter (bit i = GESTURE_KEYS[i])
+        u8  number of people
+        u8  reserved
+        u32 sequence number
+        u32 milliseconds since the stream started
+        u16 frame width
+        u16 frame height
+    per person (72 bytes)
+        u16 track id
+        u8  gesture flags of this person
+        u8  reserved
+        17 x (u16 x, u16 y) keypoints in frame pixels, (0, 0) = not detected
+"""
+
+import struct
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+
+from .features import GESTURE_KEYS
+
+VERSION = 1
+FORMAT = "orator-kp1"
+HEADER = struct.Struct("<BBBBIIHH")
+PERSON = struct.Struct("<HBB")
+PERSON_BYTES = PERSON.size + 17 * 2 * 2
+MAX_PEOPLE = 255
+
+
+def flag_bits(result: Optional[dict]) -> int:
+    if not result:
+        return 0
+    bits = 0
+    for i, key in enumerate(GESTURE_KEYS):
+        if result.get(key):
+            bits |= 1 << i
+    return bits
+
+
+def describe() -> dict:
+    """Format description sent to the client as the first (text) message"""
+    return {
+        "type": "hello",
+        "format": FORMAT,
+        "version": VERSION,
+        "header_bytes": HEADER.size,
+        "person_bytes": PERSON_BYTES,
+        "gestures": list(GESTURE_KEYS),
+    }
+
+
+class KeypointEncoder:
+    """Packs frames for one stream (owns its sequence counter and clock)"""
+
+    def __init__(self):
+        self.seq = 0
+        self.started = time.monotonic()
+
+    def encode(self, frame_shape, tracks: Iterable, presenter: Optional[dict] = None) -> bytes:
+        """
+        Args:
+            frame_shape: (height, width, ...) of the analyzed frame
+            tracks: Visible tracks (id, keypoints, last_output)
+            presenter: Latest presenter gesture result (top-level flags)
+        """
+        tracks = list(tracks)[:MAX_PEOPLE]
+        height, width = frame_shape[:2]
+        elapsed_ms = int((time.monotonic() - self.started) * 1000) & 0xFFFFFFFF
+
+        parts = [HEADER.pack(VERSION, flag_bits(presenter), len(tracks), 0, self.seq & 0xFFFFFFFF,
+                             elapsed_ms, min(width, 0xFFFF), min(height, 0xFFFF))]
+        for track in tracks:
+            parts.append(PERSON.pack(track.id & 0xFFFF, flag_bits(track.last_output), 0))
+            parts.append(np.clip(np.rint(track.keypoints), 0, 0xFFFF).astype("<u2").tobytes())
+        self.seq += 1
+        return b"".join(parts)
+
+
+def decode(payload: bytes) -> dict:
+    """Inverse of KeypointEncoder.encode (used by benchmarks and tests of clients)"""
+    version, flags, count, _, seq, ms, width, height = HEADER.unpack_from(payload, 0)
+    people = []
+    offset = HEADER.size
+    for _ in range(count):
+        track_id, person_flags, _ = PERSON.unpack_from(payload, offset)
+        kpts = np.frombuffer(payload, dtype="<u2", count=34, offset=offset + PERSON.size).reshape(17, 2)
+        people.append({"id": track_id, "flags": person_flags, "keypoints": kpts})
+        offset += PERSON_BYTES
+    return {"version": version, "flags": flags, "seq": seq, "ms": ms,
+            "width": width, "height": height, "people": people}
@@ -0,0 +1,307 @@
+"""
+Out-of-process pose inference.
+
+model.predict holds the GIL for long stretches, which adds jitter to the audio, HTTP and
+WebSocket threads sharing the server process. With ORATOR_POSE_WORKERS=N, inference runs
+in N worker processes instead:
+
+  - frames are written into a ring of multiprocessing.shared_memory slots (one memcpy,
+    no pickling) and only (slot, shape, request id) goes through the request queue
+  - each worker runs the model on a numpy view of its slot and sends back the detections
+    (boxes, keypoints, confidences: a few hundred bytes) on a result queue
+  - a listener thread in the server resolves the waiting request
+
+InferencePool.predict has the model.predict signature and returns [PoseDetections], so
+RoiPredictor and GesturePipeline use it like the in-process model. Frames larger than a
+slot (ORATOR_POSE_SHM_MAX, default 1920x1080) are downscaled to fit and the detections
+scaled back.
+
+Deployment: the pool is meant for a threaded server (gunicorn --worker-class gthread, or
+the plain threaded dev server). Under gevent (the Procfile's worker class) threads are
+greenlets, and a blocking read of the result queue would stall the whole event loop, so
+the listener polls the queue and yields in between (up to POLL_SECONDS of extra latency
+per result). Inference itself still leaves the server process either way.
+"""
+
+import importlib
+import itertools
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import metrics
+from .pose import PoseDetections, from_ultralytics
+
+POSE_WORKERS = int(os.environ.get("ORATOR_POSE_WORKERS", "0") or 0)
+SHM_MAX = os.environ.get("ORATOR_POSE_SHM_MAX", "1920x1080")
+DEFAULT_LOADER = "video.backend:load_pose_model"
+PREDICT_TIMEOUT = 10.0
+POLL_SECONDS = 0.002  # result queue polling interval under gevent
+
+handoff_ms = metrics.histogram("orator_pose_handoff_ms", "Shared-memory frame copy + worker queueing per frame (ms)")
+slot_wait_ms = metrics.histogram("orator_pose_slot_wait_ms", "Wait for a free shared-memory frame slot (ms)")
+
+
+def parse_size(spec: str) -> Tuple[int, int]:
+    """'1920x1080' -> (1920, 1080)"""
+    width, height = spec.lower().split("x")
+    return int(width), int(height)
+
+
+def _gevent_patched() -> bool:
+    """True under gevent monkey patching, where threading.Thread starts a greenlet"""
+    if "gevent" not in sys.modules:
+        return False
+    from gevent import monkey
+    return monkey.is_module_patched("threading")
+
+
+def _load(loader: str):
+    module, name = loader.split(":")
+    return getattr(importlib.import_module(module), name)()
+
+
+def _worker_main(loader: str, slot_names: List[str], slot_bytes: int, requests, results, threads: Optional[int],
+                 busy):
+    """
+    Worker process: load the model, then predict on shared-memory frames until told to stop.
+    busy[slot] holds this worker's pid while it reads the slot.
+    """
+    if threads:
+        os.environ["ORATOR_POSE_THREADS"] = str(threads)
+    # Spawned children share the server's resource tracker, so attaching doesn't take ownership
+    slots = [shared_memory.SharedMemory(name=name) for name in slot_names]
+
+    try:
+        model = _load(loader)
+        results.put(("ready", os.getpid()))
+    except Exception as e:
+        results.put(("failed", str(e)))
+        return
+
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        request_id, slot, shape, kwargs = request
+        busy[slot] = os.getpid()
+        frame = np.ndarray(shape, dtype=np.uint8, buffer=slots[slot].buf)
+        try:
+            payload = tuple(from_ultralytics(model.predict(frame, **kwargs)[0]))
+        except Exception as e:
+            payload = e
+        del frame
+        busy[slot] = 0  # before the result: the server may hand the slot out as soon as it arrives
+        results.put((request_id, payload))
+
+    for shm in slots:
+        shm.close()
+
+
+class InferencePool:
+    """
+    Pose inference in worker processes fed through shared memory
+
+    Args:
+        workers: Worker processes
+        slots: Shared-memory frame slots (frames in flight), default 2 per worker
+        max_size: (width, height) of the largest frame a slot holds
+        loader: "module:function" returning the model, imported in each worker
+        threads: Intra-op threads per worker (ORATOR_POSE_THREADS in the worker)
+    """
+
+    def __init__(self, workers: int = POSE_WORKERS, slots: Optional[int] = None,
+                 max_size: Tuple[int, int] = parse_size(SHM_MAX), loader: str = DEFAULT_LOADER,
+                 threads: Optional[int] = None):
+        self.workers = max(1, workers)
+        self.max_width, self.max_height = max_size
+        self.slot_bytes = self.max_width * self.max_height * 3
+        self.loader = loader
+        self.threads = threads or max(1, (os.cpu_count() or 1) // self.workers)
+        self.shm = [shared_memory.SharedMemory(create=True, size=self.slot_bytes)
+                    for _ in range(slots or 2 * self.workers)]
+        self.free = queue.Queue()
+        for slot in range(len(self.shm)):
+            self.free.put(slot)
+
+        context = multiprocessing.get_context("spawn")  # workers don't inherit the server's threads
+        self.requests = context.Queue()
+        self.results = context.Queue()
+        self.context = context
+        self.processes: List = []
+        self.pending: Dict[int, Future] = {}
+        # Slots of timed-out requests (request id -> slot): a worker may still read them, so they
+        # return to `free` only when their result arrives or the worker reading them dies
+        self.abandoned: Dict[int, int] = {}
+        self.busy = context.RawArray("q", len(self.shm))  # slot -> pid of the worker reading it
+        self.ids = itertools.count()
+        self.lock = threading.Lock()
+        self.closed = False
+        self.stats = {"frames": 0, "downscaled": 0, "errors": 0, "restarts": 0}
+        self.ready = 0
+        self.ready_event = threading.Event()
+        self.startup_error: Optional[str] = None
+
+        for _ in range(self.workers):
+            self._spawn()
+        self.listener = threading.Thread(target=self._listen, name="pose-results", daemon=True)
+        self.listener.start()
+        self._wait_ready()
+
+    def _spawn(self) -> None:
+        process = self.context.Process(
+            target=_worker_main, daemon=True,
+            args=(self.loader, [s.name for s in self.shm], self.slot_bytes, self.requests, self.results, self.threads,
+                  self.busy)
+        )
+        process.start()
+        self.processes.append(process)
+
+    def _wait_ready(self, timeout: float = 300.0) -> None:
+        """Block until every worker loaded its model"""
+        deadline = time.monotonic() + timeout
+        while not self.ready_event.wait(0.5):
+            if any(not p.is_alive() for p in self.processes):
+                self.close()
+                raise RuntimeError("Pose worker exited during startup")
+            if time.monotonic() > deadline:
+                self.close()
+                raise RuntimeError("Pose workers did not start in time")
+        if self.ready < self.workers:
+            self.close()
+            raise RuntimeError(f"Pose worker failed to load the model: {self.startup_error}")
+        print(f"✓ Pose inference pool ready: {self.workers} workers, {len(self.shm)} frame slots")
+
+    def _listen(self) -> None:
+        cooperative = _gevent_patched()
+        while True:
+            try:
+                if cooperative:
+                    # Never block in the queue's lock / pipe read: that would stall every greenlet
+                    try:
+                        message = self.results.get_nowait()
+                    except queue.Empty:
+                        time.sleep(POLL_SECONDS)  # patched, yields to the hub
+                        continue
+                else:
+                    message = self.results.get()
+            except Exception:
+                if self.closed:
+                    return  # queue torn down by close()
+                raise
+            if message is None:
+                return
+            if message[0] in ("ready", "failed"):
+                if message[0] == "ready":
+                    self.ready += 1
+                else:
+                    self.startup_error = message[1]
+                if message[0] == "failed" or self.ready >= self.workers:
+                    self.ready_event.set()
+                continue
+            request_id, payload = message
+            with self.lock:
+                future = self.pending.pop(request_id, None)
+                slot = self.abandoned.pop(request_id, None) if future is None else None
+            if future is None:
+                if slot is not None:
+                    self.free.put(slot)  # timed out, but no worker reads the slot anymore
+                continue
+            if isinstance(payload, Exception):
+                future.set_exception(payload)
+            else:
+                future.set_result(PoseDetections(*payload))
+
+    def _restart_dead(self) -> None:
+        for process in list(self.processes):
+            if not process.is_alive():
+                print(f"Pose worker {process.pid} exited ({process.exitcode}), restarting")
+                self.processes.remove(process)
+                self._spawn()
+                self.stats["restarts"] += 1
+        self._reclaim_lost()
+
+    def _reclaim_lost(self) -> None:
+        """Free abandoned slots whose worker died: their result will never arrive"""
+        live = {p.pid for p in self.processes if p.is_alive()}
+        with self.lock:
+            for request_id, slot in list(self.abandoned.items()):
+                owner = self.busy[slot]
+                if owner and owner not in live:
+                    del self.abandoned[request_id]
+                    self.busy[slot] = 0
+                    self.free.put(slot)
+
+    def predict(self, frame: np.ndarray, **kwargs) -> List[PoseDetections]:
+        """model.predict for one BGR frame, returns [PoseDetections] in frame coordinates"""
+        if self.closed:
+            raise RuntimeError("Inference pool is closed")
+        started = time.perf_counter()
+        slot = self.free.get()
+        slot_wait_ms.observe((time.perf_counter() - started) * 1000)
+        try:
+            image, scale = frame, 1.0
+            h, w = frame.shape[:2]
+            if w > self.max_width or h > self.max_height:
+                import cv2
+                scale = min(self.max_width / w, self.max_height / h)
+                image = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+                self.stats["downscaled"] += 1
+            image = np.ascontiguousarray(image, dtype=np.uint8)
+            view = np.ndarray(image.shape, dtype=np.uint8, buffer=self.shm[slot].buf)
+            view[...] = image
+
+            request_id = next(self.ids)
+            future = Future()
+            with self.lock:
+                self.pending[request_id] = future
+            self.requests.put((request_id, slot, image.shape, kwargs))
+            handoff_ms.observe((time.perf_counter() - started) * 1000)
+            try:
+                detections = future.result(timeout=PREDICT_TIMEOUT)
+            except FutureTimeout:
+                with self.lock:
+                    if self.pending.pop(request_id, None) is not None:
+                        # Still queued or being processed: keep the slot until the result arrives
+                        self.abandoned[request_id], slot = slot, None
+                self.stats["errors"] += 1
+                self._restart_dead()
+                raise
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+        finally:
+            if slot is not None:
+                self.free.put(slot)
+        self.stats["frames"] += 1
+        if scale != 1.0:
+            detections = PoseDetections(detections.boxes / scale, detections.keypoints / scale,
+                                        detections.confidences)
+        return [detections]
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "workers": [p.pid for p in self.processes if p.is_alive()],
+                "slots": len(self.shm), "slots_free": self.free.qsize(), "slots_abandoned": len(self.abandoned)}
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        for _ in self.processes:
+            self.requests.put(None)
+        for process in self.processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        self.results.put(None)
+        for shm in self.shm:
+            shm.close()
+            shm.unlink()
@@ -1,16 +1,89 @@
 import { useEffect, useRef, useState } from 'react';
+import { KeypointStream, drawKeypointFrame } from '../utils/keypointStream';
+import { withSession } from '../utils/identity';
 
 // Define the API URL based on the environment
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+const WS_URL = API_URL.replace(/^http/, 'ws');
+// 'keypoints' = local camera preview + binary keypoint overlay instead of the MJPEG feed
+const VIDEO_MODE = import.meta.env.VITE_VIDEO_MODE || 'mjpeg';
+// Upload downscaled frames for server-side inference (hosted servers have no camera)
+const UPLOAD_FRAMES = import.meta.env.VITE_KEYPOINT_UPLOAD === 'true';
+
+function KeypointCamera() {
+    const videoRef = useRef<HTMLVideoElement>(null);
+    const canvasRef = useRef<HTMLCanvasElement>(null);
+    const [hasError, setHasError] = useState(false);
+
+    useEffect(() => {
+        let mediaStream: MediaStream | null = null;
+        let stream: KeypointStream | null = null;
+        let cancelled = false;
+
+        const start = async () => {
+            try {
+                mediaStream = await navigator.mediaDevices.getUserMedia({ video: true });
+                if (cancelled || !videoRef.current) return;
+                videoRef.current.srcObject = mediaStream;
+                await videoRef.current.play();
+
+                stream = new KeypointStream({
+                    url: withSession(UPLOAD_FRAMES ? `${WS_URL}/video_ingest` : `${WS_URL}/keypoints_stream`),
+                    uploadSource: UPLOAD_FRAMES ? videoRef.current : undefined,
+                    onFrame: (frame) => {
+                        const canvas = canvasRef.current;
+                        const video = videoRef.current;
+                        if (!canvas || !video) return;
+                        if (canvas.width !== video.videoWidth) {
+                            canvas.width = video.videoWidth;
+                            canvas.height = video.videoHeight;
+                        }
+                        const ctx = canvas.getContext('2d');
+                        if (ctx) drawKeypointFrame(ctx, frame);
+                    },
+                    onError: (error) => console.error('Keypoint stream error:', error)
+                });
+                stream.start();
+            } catch (err) {
+                console.log('Local camera not available:', err);
+                setHasError(true);
+            }
+        };
+
+        start();
+        return () => {
+            cancelled = true;
+            stream?.stop();
+            mediaStream?.getTracks().forEach((track) => track.stop());
+        };
+    }, []);
+
+    if (hasError) {
+        return (
+            <div className="text-gray-400 text-center p-4">
+                <p className="text-lg mb-2">📹 Camera Not Available</p>
+                <p className="text-sm">Allow camera access to see the live pose overlay.</p>
+            </div>
+        );
+    }
+
+    return (
+        <div className="relative w-full h-full">
+            <video ref={videoRef} muted playsInline className="w-full h-full object-cover" />
+            <canvas ref={canvasRef} className="absolute inset-0 w-full h-full object-cover pointer-events-none" />
+        </div>
+    );
+}
 
 export default function Camera() {
     const videoRef = useRef<HTMLImageElement>(null);
     const [hasError, setHasError] = useState(false);
 
     useEffect(() => {
+        if (VIDEO_MODE === 'keypoints') return;
         // Set the video feed source
         if (videoRef.current) {
-            videoRef.current.src = `${API_URL}/video_feed`;
+            videoRef.current.src = withSession(`${API_URL}/video_feed`);
         }
 
         // Cleanup function to handle component unmount
@@ -21,6 +94,14 @@ export default function Camera() {
         };
     }, []);
 
+    if (VIDEO_MODE === 'keypoints') {
+        return (
+            <div className='w-full h-full bg-gray-800 flex justify-center items-center overflow-hidden'>
+                <KeypointCamera />
+            </div>
+        );
+    }
+
     return (
         <div className='w-full h-full bg-gray-800 flex justify-center items-center overflow-hidden'>
             {hasError ? (
@@ -29,7 +110,7 @@ export default function Camera() {
                     <p className="text-sm">Video feed is only available when running locally with a camera.</p>
                 </div>
             ) : (
-                <img 
+                <img
                     ref={videoRef}
                     alt="Video feed"
                     className="w-full h-full object-cover"
@@ -44,4 +125,4 @@ export default function Camera() {
             )}
         </div>
     );
-}
\ No newline at end of file
+}
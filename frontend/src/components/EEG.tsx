@@ -1,4 +1,5 @@
 import { useRef, useState, useEffect } from 'react';
+import { userId, withSession } from '../utils/identity';
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 // const API_URL = 'http://localhost:8000';
@@ -134,7 +135,7 @@ export default function EEG({ onStatusDigest, onConnectionChange, shouldDetect }
   const detectionActiveRef = useRef(false);
 
   const callEndpoint = async (path: string): Promise<ApiResponse> => {
-    const response = await fetch(`${API_URL}${path}`, {
+    const response = await fetch(withSession(`${API_URL}${path}`), {
       method: 'POST'
     });
 
@@ -193,7 +194,7 @@ export default function EEG({ onStatusDigest, onConnectionChange, shouldDetect }
 
       updateModal('baseline');
 
-      const baselinePayload = await callEndpoint('/eeg/baseline');
+      const baselinePayload = await callEndpoint(`/eeg/baseline?user=${userId()}`);
       setBaselineRatios((baselinePayload.baseline as BaselineRatios) ?? null);
       setRawResponse(baselinePayload);
 
@@ -5,6 +5,7 @@ interface GestureTextboxProps {
 }
 
 import { useEffect, useState } from 'react';
+import { withSession } from '../utils/identity';
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
@@ -25,7 +26,7 @@ const GestureTextbox: React.FC<GestureTextboxProps> = ({ className = '' }) => {
   useEffect(() => {
     const fetchGestureData = async () => {
       try {
-        const response = await fetch(`${API_URL}/gesture_data`);
+        const response = await fetch(withSession(`${API_URL}/gesture_data`));
         if (!response.ok) {
           throw new Error('Failed to fetch gesture data');
         }
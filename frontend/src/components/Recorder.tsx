@@ -1,8 +1,18 @@
 import { forwardRef, useCallback, useEffect, useImperativeHandle, useRef, useState } from 'react';
 import { RealtimeAudioCapture } from '../utils/realtimeAudioCapture';
+import { OpusAudioCapture, supportedOpusCodec } from '../utils/opusAudioCapture';
+import { userId, withSession } from '../utils/identity';
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 const WS_URL = API_URL.replace('https://', 'wss://').replace('http://', 'ws://');
+// 'opus' sends MediaRecorder Opus (~32 kbit/s) instead of 16 kHz PCM (~256 kbit/s)
+const AUDIO_CODEC = import.meta.env.VITE_AUDIO_CODEC || 'pcm';
+const OPUS_BITRATE = 32000;
+// 4096-sample PCM chunks (256 ms at 16 kHz) held while the server is paused: ~4 s, its free
+// capacity on resume
+const HELD_AUDIO_CHUNKS = 15;
+// Opus bytes held while the socket opens or the server is paused, the same ~4 s
+const HELD_OPUS_BYTES = (4 * OPUS_BITRATE) / 8;
 
 export interface FeedbackMessage {
   id: number;
@@ -38,8 +48,14 @@ const Recorder = forwardRef<RecorderHandle, RecorderProps>(function Recorder({sh
   const [feedbackMessages, setFeedbackMessages] = useState<FeedbackMessage[]>([]);
  
   const realtimeTranscriptRef = useRef('');
-  const audioCapture = useRef<RealtimeAudioCapture | null>(null);
+  const audioCapture = useRef<RealtimeAudioCapture | OpusAudioCapture | null>(null);
   const websocket = useRef<WebSocket | null>(null);
+  // Server-side ingest backpressure: hold audio back while paused, flush on resume
+  const uploadPaused = useRef(false);
+  const heldAudio = useRef<string[]>([]);
+  // Opus chunks wait for open / resume in order; the first one carries the container header
+  const heldChunks = useRef<ArrayBuffer[]>([]);
+  const heldBytes = useRef(0);
   const feedbackEndRef = useRef<HTMLDivElement | null>(null);
 
   const stopRecording = useCallback(() => {
@@ -61,17 +77,87 @@ const Recorder = forwardRef<RecorderHandle, RecorderProps>(function Recorder({sh
     setRealtimeTranscript('');
     setPartialTranscript('');
     setFeedbackMessages([]);
+    uploadPaused.current = false;
+    heldAudio.current = [];
+    heldChunks.current = [];
+    heldBytes.current = 0;
+
+    const flushChunks = () => {
+      if (websocket.current?.readyState !== WebSocket.OPEN || uploadPaused.current) return;
+      heldChunks.current.forEach((chunk) => websocket.current?.send(chunk));
+      heldChunks.current = [];
+      heldBytes.current = 0;
+    };
 
     try {
-      websocket.current = new WebSocket(`${WS_URL}/stream_audio`);
+      const opusCodec = AUDIO_CODEC === 'opus' ? supportedOpusCodec() : null;
+      // Interim transcripts arrive as suffix deltas against the previous interim
+      const params = new URLSearchParams({ delta: '1', user: userId() });
+      if (opusCodec) {
+        params.set('codec', opusCodec);
+        params.set('rate', '48000');
+        params.set('bitrate', String(OPUS_BITRATE));
+      }
+      websocket.current = new WebSocket(withSession(`${WS_URL}/stream_audio?${params}`));
+      const interim = { seq: 0, text: '' };
+      websocket.current.binaryType = 'arraybuffer';
 
       websocket.current.onopen = () => {
         console.log('WebSocket connected');
+        flushChunks();
       };
 
       websocket.current.onmessage = (event) => {
         const data = JSON.parse(event.data);
 
+        if (data.type === 'interim') {
+          if (data.base !== 0 && data.base !== interim.seq) {
+            // Missed the base text: ask for the next interim in full
+            websocket.current?.send(JSON.stringify({ resync: true }));
+            return;
+          }
+          const base = data.base === 0 ? '' : interim.text;
+          interim.text = base.slice(0, data.keep) + data.append;
+          interim.seq = data.seq;
+          setPartialTranscript(interim.text);
+          onTranscriptUpdate?.({ realtime: realtimeTranscriptRef.current, partial: interim.text });
+          return;
+        }
+
+        if (data.type === 'audio_config') {
+          console.log('Audio config:', data);
+          return;
+        }
+
+        if (data.type === 'rejected') {
+          // Admission control: the server is at capacity, the socket closes next
+          console.warn(`Session rejected (${data.status}): ${data.reason}, retry in ${data.retry_after}s`);
+          stopRecording();
+          return;
+        }
+
+        if (data.type === 'error') {
+          // The server can't use this audio (e.g. an undecodable Opus stream), the socket closes next
+          console.error('Audio stream error:', data.message);
+          stopRecording();
+          return;
+        }
+
+        if (data.type === 'degradation') {
+          console.log(`Server degradation level ${data.level} (${data.name})`);
+          return;
+        }
+
+        if (data.type === 'backpressure') {
+          uploadPaused.current = data.state === 'pause';
+          if (!uploadPaused.current) {
+            heldAudio.current.forEach((audio) => websocket.current?.send(JSON.stringify({ audio })));
+            heldAudio.current = [];
+            flushChunks();
+          }
+          return;
+        }
+
         if (data.type === 'ai_feedback') {
           const newFeedback: FeedbackMessage = {
             id: Date.now(),
@@ -93,6 +179,8 @@ const Recorder = forwardRef<RecorderHandle, RecorderProps>(function Recorder({sh
         }
 
         if (data.is_final) {
+          interim.seq = 0;
+          interim.text = '';
           setRealtimeTranscript((prev) => {
             const updated = prev ? `${prev} ${data.transcript}` : data.transcript;
             onTranscriptUpdate?.({ realtime: updated, partial: '' });
@@ -114,6 +202,29 @@ const Recorder = forwardRef<RecorderHandle, RecorderProps>(function Recorder({sh
         console.log('WebSocket closed');
       };
 
+      if (opusCodec) {
+        audioCapture.current = new OpusAudioCapture({
+          bitrate: OPUS_BITRATE,
+          // Binary messages, in order (the container header is in the first chunk)
+          onAudioData: (chunk: ArrayBuffer) => {
+            if (heldChunks.current.length && heldBytes.current + chunk.byteLength > HELD_OPUS_BYTES) {
+              // Whole chunks only, like the server's drop_chunk overflow: the header stays
+              console.warn('Audio upload held back too long, dropping a chunk');
+              return;
+            }
+            heldChunks.current.push(chunk);
+            heldBytes.current += chunk.byteLength;
+            flushChunks();
+          },
+          onError: (error) => {
+            console.error('Audio capture error:', error);
+            setIsRecording(false);
+          }
+        });
+        await audioCapture.current.start();
+        return;
+      }
+
       audioCapture.current = new RealtimeAudioCapture({
         sampleRate: 16000, // best sample rate for speech recognition
         bufferSize: 4096, // tell us how many samples to collect before sending to the server
@@ -121,6 +232,13 @@ const Recorder = forwardRef<RecorderHandle, RecorderProps>(function Recorder({sh
           if (websocket.current?.readyState === WebSocket.OPEN) {
             const bytes = new Uint8Array(audioData.buffer);
             const base64 = btoa(String.fromCharCode(...bytes)); // converts the audio data to base64
+            if (uploadPaused.current) {
+              // Keep no more than the server has room for when it resumes (it resumes with
+              // ~1 s of its 5 s buffer filled), so the flush never overflows it
+              heldAudio.current.push(base64);
+              if (heldAudio.current.length > HELD_AUDIO_CHUNKS) heldAudio.current.shift();
+              return;
+            }
             websocket.current.send(JSON.stringify({ audio: base64 })); // sends the audio data to the backend server at /stream_audio
           }
         },
@@ -1,5 +1,6 @@
 import { useRef, useState } from 'react'
 import pdfToText from 'react-pdftotext';
+import { withSession } from '../utils/identity';
 
 interface HighlightRange {
     start: number;
@@ -152,7 +153,7 @@ export default function Textbox(){
         
         try {
             const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
-            const response = await fetch(`${API_URL}/transcript`, {
+            const response = await fetch(withSession(`${API_URL}/transcript`), {
             method: "POST",
             headers: {
             "Content-Type": "application/json",
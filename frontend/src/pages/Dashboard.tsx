@@ -1,6 +1,7 @@
-import { useEffect, useMemo, useState } from 'react';
+import { useEffect, useMemo, useRef, useState } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import SimplePDFViewer from '../components/SimplePDFViewer';
+import { runId, userId, withSession } from '../utils/identity';
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
@@ -63,6 +64,8 @@ export default function Dashboard() {
   const [channelQuality, setChannelQuality] = useState<Record<string, number>>({});
   const [connectionMessage, setConnectionMessage] = useState<string | null>(null);
   const [lastUpdated, setLastUpdated] = useState<string | null>(null);
+  // Id of the running calibration: progress of the board's previous run is ignored
+  const calibrationId = useRef<string | null>(null);
 
   const navigate = useNavigate();
 
@@ -75,16 +78,19 @@ export default function Dashboard() {
   useEffect(() => {
     if (!isBaselineRecording) return;
     setBaselineProgress(0);
-    const interval = setInterval(() => {
-      setBaselineProgress(prev => {
-        if (prev >= 100) {
-          clearInterval(interval);
-          setIsBaselineRecording(false);
-          return 100;
+    // Calibration stops early once the baseline is stable, so poll its real progress
+    const interval = setInterval(async () => {
+      try {
+        const response = await fetch(withSession(`${API_URL}/eeg/baseline`));
+        const payload = await response.json();
+        const percent = payload?.calibration?.percent;
+        if (payload?.calibration?.id === calibrationId.current && typeof percent === 'number') {
+          setBaselineProgress(prev => Math.max(prev, percent));
         }
-        return prev + (100 / 60);
-      });
-    }, 1000);
+      } catch {
+        // progress is cosmetic; the POST reports the result
+      }
+    }, 500);
     return () => clearInterval(interval);
   }, [isBaselineRecording]);
 
@@ -110,7 +116,7 @@ export default function Dashboard() {
   const canStartPresentation = museSatisfied && scriptReady;
 
   const callEndpoint = async (path: string): Promise<ApiResponse> => {
-    const response = await fetch(`${API_URL}${path}`, { method: 'POST' });
+    const response = await fetch(withSession(`${API_URL}${path}`), { method: 'POST' });
     let payload: ApiResponse = {};
     try {
       payload = await response.json();
@@ -125,6 +131,12 @@ export default function Dashboard() {
     return payload;
   };
 
+  const captureBaseline = () => {
+    calibrationId.current = runId();
+    const params = new URLSearchParams({ user: userId(), calibration: calibrationId.current });
+    return callEndpoint(`/eeg/baseline?${params}`);
+  };
+
   const updateModal = (step: ConnectionStep, error: string | null = null) => {
     setConnectionStep(step);
     setModalError(error);
@@ -164,7 +176,7 @@ export default function Dashboard() {
       setIsBaselineRecording(true);
       setBaselineProgress(0);
 
-      const baselinePayload = await callEndpoint('/eeg/baseline');
+      const baselinePayload = await captureBaseline();
       setBaselineRatios((baselinePayload.baseline as BaselineRatios) ?? null);
       const baselineMessage =
         typeof baselinePayload.suggested_message === 'string'
@@ -208,7 +220,7 @@ export default function Dashboard() {
     setIsBaselineRecording(true);
     setBaselineProgress(0);
     try {
-      const baselinePayload = await callEndpoint('/eeg/baseline');
+      const baselinePayload = await captureBaseline();
       setBaselineRatios((baselinePayload.baseline as BaselineRatios) ?? null);
       const baselineMessage =
         typeof baselinePayload.suggested_message === 'string'
@@ -234,7 +246,7 @@ export default function Dashboard() {
     setScriptSaveStatus('saving');
     setScriptSaveMessage('Saving script…');
     try {
-      const response = await fetch(`${API_URL}/transcript`, {
+      const response = await fetch(withSession(`${API_URL}/transcript`), {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(scriptText)
@@ -6,6 +6,7 @@ import Recorder from '../components/Recorder';
 import type { RecorderHandle, FeedbackMessage } from '../components/Recorder';
 import SimplePDFViewer from '../components/SimplePDFViewer';
 import type { EegStatusDigest } from '../components/EEG';
+import { withSession } from '../utils/identity';
 
 interface PresentationNavState {
   boardInfo?: Record<string, unknown>;
@@ -65,7 +66,7 @@ export default function PresentationMode() {
 
   const callDetectEmotion = async () => {
     try {
-      const response = await fetch(`${API_URL}/eeg/detect`, { method: 'POST' });
+      const response = await fetch(withSession(`${API_URL}/eeg/detect`), { method: 'POST' });
       const payload = await response.json();
       if (!response.ok || payload.status === 'error') {
         throw new Error(payload?.message ?? 'EEG detection failed');
@@ -136,7 +137,7 @@ export default function PresentationMode() {
     let isMounted = true;
     const pollGestures = async () => {
       try {
-        const response = await fetch(`${API_URL}/gesture_data`);
+        const response = await fetch(withSession(`${API_URL}/gesture_data`));
         if (!response.ok) {
           throw new Error('Failed to fetch gesture data');
         }
@@ -0,0 +1,70 @@
+/**
+ * Browser-local identity
+ * A random user id kept in localStorage, so the backend can store per-user data (EEG
+ * baselines) and recognise a returning user on this browser, and a session id per tab
+ * sent as ?session= with every backend request. The backend keys live state by session
+ * and backend/router.py routes on it, so all of a tab's requests reach the same worker.
+ */
+
+const USER_KEY = 'orator-user'
+const SESSION_KEY = 'orator-session'
+let pageUserId: string | null = null
+let pageSessionId: string | null = null
+
+function randomId(): string {
+    if (typeof crypto !== 'undefined' && 'randomUUID' in crypto) {
+        return crypto.randomUUID().replace(/-/g, '')
+    }
+    return Array.from({ length: 32 }, () => Math.floor(Math.random() * 16).toString(16)).join('')
+}
+
+/**
+ * Id to send as ?user=, created on first use
+ */
+export function userId(): string {
+    try {
+        let id = localStorage.getItem(USER_KEY)
+        if (!id) {
+            id = randomId()
+            localStorage.setItem(USER_KEY, id)
+        }
+        return id
+    } catch {
+        // Storage disabled: a per-page id still groups this visit's requests
+        if (!pageUserId) pageUserId = randomId()
+        return pageUserId
+    }
+}
+
+/**
+ * Session id of this tab, kept across page navigations (sessionStorage)
+ */
+export function sessionId(): string {
+    try {
+        let id = sessionStorage.getItem(SESSION_KEY)
+        if (!id) {
+            id = randomId()
+            sessionStorage.setItem(SESSION_KEY, id)
+        }
+        return id
+    } catch {
+        if (!pageSessionId) pageSessionId = randomId()
+        return pageSessionId
+    }
+}
+
+/**
+ * url (http(s) or ws(s), with or without a query) with this tab's ?session=
+ */
+export function withSession(url: string): string {
+    const parsed = new URL(url, window.location.href)
+    parsed.searchParams.set('session', sessionId())
+    return parsed.toString()
+}
+
+/**
+ * Fresh id for one run of a long request whose progress is polled (?calibration=)
+ */
+export function runId(): string {
+    return randomId().slice(0, 12)
+}
@@ -0,0 +1,195 @@
+/**
+ * Binary keypoint stream client
+ * Receives compact pose frames from /keypoints_stream (see backend/video/wire.py) so the
+ * browser can draw the overlay on its own local camera preview instead of an MJPEG feed.
+ */
+
+export const GESTURE_KEYS = ['hipsway', 'pacing', 'headtilt', 'handtomouth', 'toostill'] as const
+
+const HEADER_BYTES = 16
+const PERSON_BYTES = 72
+
+// COCO-17 skeleton edges, same as backend/video/pose.py
+const SKELETON: Array<[number, number]> = [
+    [5, 7], [7, 9], [6, 8], [8, 10], [5, 6], [5, 11], [6, 12], [11, 12],
+    [11, 13], [13, 15], [12, 14], [14, 16], [0, 1], [0, 2], [1, 3], [2, 4],
+]
+
+export interface KeypointPerson {
+    id: number
+    flags: number // bit i = GESTURE_KEYS[i]
+    keypoints: Uint16Array // 17 x (x, y), (0, 0) = not detected
+}
+
+export interface KeypointFrame {
+    flags: number // presenter gesture flags
+    seq: number
+    ms: number
+    width: number
+    height: number
+    people: KeypointPerson[]
+}
+
+export interface KeypointStreamConfig {
+    url: string // ws(s)://.../keypoints_stream, or .../video_ingest when uploading
+    onFrame: (frame: KeypointFrame) => void
+    onError?: (error: Event) => void
+    // When set, downscaled JPEG frames of this video are uploaded for server-side inference
+    uploadSource?: HTMLVideoElement
+    uploadWidth?: number
+    uploadFps?: number
+}
+
+export function decodeKeypointFrame(buffer: ArrayBuffer): KeypointFrame {
+    const view = new DataView(buffer)
+    const count = view.getUint8(2)
+    const people: KeypointPerson[] = []
+    for (let i = 0; i < count; i++) {
+        const offset = HEADER_BYTES + i * PERSON_BYTES
+        const keypoints = new Uint16Array(34)
+        for (let k = 0; k < 34; k++) {
+            keypoints[k] = view.getUint16(offset + 4 + k * 2, true)
+        }
+        people.push({ id: view.getUint16(offset, true), flags: view.getUint8(offset + 2), keypoints })
+    }
+    return {
+        flags: view.getUint8(1),
+        seq: view.getUint32(4, true),
+        ms: view.getUint32(8, true),
+        width: view.getUint16(12, true),
+        height: view.getUint16(14, true),
+        people,
+    }
+}
+
+export function activeGestures(flags: number): string[] {
+    return GESTURE_KEYS.filter((_, i) => (flags >> i) & 1)
+}
+
+/**
+ * Draw skeletons scaled from frame pixels to the canvas size
+ */
+export function drawKeypointFrame(ctx: CanvasRenderingContext2D, frame: KeypointFrame) {
+    const { width, height } = ctx.canvas
+    ctx.clearRect(0, 0, width, height)
+    if (!frame.width || !frame.height) return
+    const sx = width / frame.width
+    const sy = height / frame.height
+
+    ctx.strokeStyle = '#00ff00'
+    ctx.lineWidth = 2
+    ctx.beginPath()
+    for (const person of frame.people) {
+        const k = person.keypoints
+        for (const [a, b] of SKELETON) {
+            if ((k[2 * a] || k[2 * a + 1]) && (k[2 * b] || k[2 * b + 1])) {
+                ctx.moveTo(k[2 * a] * sx, k[2 * a + 1] * sy)
+                ctx.lineTo(k[2 * b] * sx, k[2 * b + 1] * sy)
+            }
+        }
+    }
+    ctx.stroke()
+}
+
+export class KeypointStream {
+    private socket: WebSocket | null = null
+    private uploadTimer: number | null = null
+    private uploadCanvas: HTMLCanvasElement | null = null
+    private awaitingReply = false
+    // Reply deadline of the frame in flight, so a lost reply can't stall uploads
+    private replyDeadline = 0
+    private uploadInterval = 100
+    private accepted: { width: number; fps: number; degradation?: { fps?: number } } | null = null
+    // Upload rate for the server's current degradation level
+    private levelFps = Infinity
+    private config: KeypointStreamConfig
+
+    constructor(config: KeypointStreamConfig) {
+        this.config = config
+    }
+
+    start() {
+        this.socket = new WebSocket(this.config.url)
+        this.socket.binaryType = 'arraybuffer'
+
+        this.socket.onmessage = (event) => {
+            if (typeof event.data === 'string') {
+                // hello / accept / stats / error messages
+                const message = JSON.parse(event.data)
+                if (message.type === 'accept') {
+                    this.accepted = message
+                    this.levelFps = message.degradation?.fps ?? Infinity
+                    this.startUpload()
+                }
+                if (message.type === 'degradation' && typeof message.fps === 'number') {
+                    // The server drops frames above this rate, follow it
+                    this.levelFps = message.fps
+                    this.restartUpload()
+                }
+                // Dropped or undecodable frames are answered too, the next one can go
+                if (message.type === 'dropped' || message.type === 'error') this.awaitingReply = false
+                return
+            }
+            this.awaitingReply = false
+            this.config.onFrame(decodeKeypointFrame(event.data))
+        }
+        this.socket.onerror = (event) => this.config.onError?.(event)
+        this.socket.onopen = () => {
+            if (!this.config.uploadSource) return
+            // /video_ingest negotiates the upload size and rate first
+            this.socket?.send(JSON.stringify({
+                width: this.config.uploadWidth ?? 480,
+                height: Math.round((this.config.uploadWidth ?? 480) * 3 / 4),
+                fps: this.config.uploadFps ?? 10,
+                codec: 'jpeg',
+            }))
+        }
+    }
+
+    private startUpload() {
+        if (!this.config.uploadSource || this.uploadTimer !== null) return
+        const fps = Math.min(this.config.uploadFps ?? 10, this.accepted?.fps ?? Infinity, this.levelFps)
+        this.uploadCanvas = document.createElement('canvas')
+        this.uploadInterval = 1000 / fps
+        this.uploadTimer = window.setInterval(() => this.uploadFrame(), this.uploadInterval)
+    }
+
+    private restartUpload() {
+        if (this.uploadTimer === null) return
+        window.clearInterval(this.uploadTimer)
+        this.uploadTimer = null
+        this.startUpload()
+    }
+
+    private uploadFrame() {
+        const video = this.config.uploadSource
+        const canvas = this.uploadCanvas
+        // One frame in flight at a time so a slow server doesn't build a backlog
+        if (this.awaitingReply && performance.now() > this.replyDeadline) this.awaitingReply = false
+        if (!video || !canvas || this.awaitingReply || !video.videoWidth) return
+        if (this.socket?.readyState !== WebSocket.OPEN) return
+
+        const width = Math.min(this.accepted?.width ?? this.config.uploadWidth ?? 480, video.videoWidth)
+        canvas.width = width
+        canvas.height = Math.round(video.videoHeight * width / video.videoWidth)
+        canvas.getContext('2d')?.drawImage(video, 0, 0, canvas.width, canvas.height)
+        this.awaitingReply = true
+        this.replyDeadline = performance.now() + 2 * this.uploadInterval
+        canvas.toBlob((blob) => {
+            if (blob && this.socket?.readyState === WebSocket.OPEN) {
+                blob.arrayBuffer().then((buffer) => this.socket?.send(buffer))
+            } else {
+                this.awaitingReply = false
+            }
+        }, 'image/jpeg', 0.7)
+    }
+
+    stop() {
+        if (this.uploadTimer !== null) {
+            window.clearInterval(this.uploadTimer)
+            this.uploadTimer = null
+        }
+        this.socket?.close()
+        this.socket = null
+    }
+}
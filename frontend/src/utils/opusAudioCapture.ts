@@ -0,0 +1,74 @@
+/**
+ * Compressed audio capture using MediaRecorder
+ * Produces WebM/Opus (or Ogg/Opus) chunks, about a tenth of the upstream bandwidth of
+ * 16 kHz PCM. The backend negotiates it with /stream_audio?codec=webm_opus.
+ */
+
+export interface OpusCaptureConfig {
+    bitrate?: number // bit/s, default 32000
+    timeslice?: number // ms between chunks, default 100
+    onAudioData: (chunk: ArrayBuffer) => void
+    onError?: (error: Error) => void
+}
+
+const MIME_TYPES: Array<[string, string]> = [
+    ['audio/webm;codecs=opus', 'webm_opus'],
+    ['audio/ogg;codecs=opus', 'ogg_opus'],
+]
+
+/**
+ * Codec name for /stream_audio?codec=..., or null when the browser can't record Opus
+ */
+export function supportedOpusCodec(): string | null {
+    if (typeof MediaRecorder === 'undefined') return null
+    const match = MIME_TYPES.find(([mime]) => MediaRecorder.isTypeSupported(mime))
+    return match ? match[1] : null
+}
+
+export class OpusAudioCapture {
+    private mediaStream: MediaStream | null = null
+    private recorder: MediaRecorder | null = null
+    private pending: Promise<void> = Promise.resolve()
+    private config: OpusCaptureConfig
+
+    constructor(config: OpusCaptureConfig) {
+        this.config = config
+    }
+
+    async start(): Promise<void> {
+        const codec = supportedOpusCodec()
+        const mimeType = MIME_TYPES.find(([, name]) => name === codec)?.[0]
+        if (!mimeType) {
+            const err = new Error('Opus recording is not supported in this browser')
+            this.config.onError?.(err)
+            throw err
+        }
+        try {
+            this.mediaStream = await navigator.mediaDevices.getUserMedia({
+                audio: { channelCount: 1, echoCancellation: true, noiseSuppression: true, autoGainControl: true }
+            })
+            this.recorder = new MediaRecorder(this.mediaStream, {
+                mimeType,
+                audioBitsPerSecond: this.config.bitrate ?? 32000,
+            })
+            // Chunks must be sent in order: the first one carries the container header
+            this.recorder.ondataavailable = (event) => {
+                if (event.data.size === 0) return
+                const chunk = event.data
+                this.pending = this.pending.then(async () => this.config.onAudioData(await chunk.arrayBuffer()))
+            }
+            this.recorder.start(this.config.timeslice ?? 100)
+        } catch (error) {
+            const err = error instanceof Error ? error : new Error(String(error))
+            this.config.onError?.(err)
+            throw err
+        }
+    }
+
+    stop(): void {
+        if (this.recorder && this.recorder.state !== 'inactive') this.recorder.stop()
+        this.recorder = null
+        this.mediaStream?.getTracks().forEach((track) => track.stop())
+        this.mediaStream = null
+    }
+}